@@ -0,0 +1,194 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import router
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from blog_app.cache import is_shared_cache
+
+User = get_user_model()
+
+DEFAULTS = {
+    "ALIAS": "default",
+    "TIMEOUT": 3600,        # shared cache entry lifetime (seconds)
+    "LOCAL_TTL": 5.0,       # seconds a process trusts its own copy before rereading the shared one
+    "LOCAL_MAX_USERS": 10000,
+}
+
+# Everything UserSerializer shows, so serializing request.user needs no query.
+# The password stays deferred and is loaded only when used.
+PRINCIPAL_FIELDS = [
+    "id", "username", "email", "first_name", "last_name", "role", "avatar",
+    "avatar_variants", "bio", "is_active", "is_staff", "is_superuser",
+]
+
+# Claims added to every token (accounts.serializers)
+ROLE_CLAIM = "role"
+ACTIVE_CLAIM = "act"
+VERSION_CLAIM = "ver"
+
+
+def principal_settings():
+    return {**DEFAULTS, **getattr(settings, "PRINCIPAL_CACHE", {})}
+
+
+def credentials_version(user):
+    """Changes with the password, so tokens issued before a password change stop working"""
+    return user.get_session_auth_hash()[:16]
+
+
+def token_claims(role, is_active, version):
+    return {ROLE_CLAIM: role, ACTIVE_CLAIM: is_active, VERSION_CLAIM: version}
+
+
+# ---------------------------
+# Principal cache
+# ---------------------------
+class PrincipalCache:
+    """
+    Per-user principal rows: an in-process LRU in front of the shared
+    cache in front of one database query.
+
+    Each row carries the user's credentials version (the ``ver`` claim of
+    tokens issued now). A process trusts its own copy for LOCAL_TTL
+    seconds, then rereads the shared one. Shared copies are keyed by a
+    per-user generation that invalidate() (after every user save, see
+    accounts.signals) moves on, dropping the local copy too, so other
+    processes see a role change, deactivation or password change within
+    LOCAL_TTL. A row read before the save but stored after it lands under
+    the old generation, which nobody reads any more.
+
+    That needs a cache every process shares. When ALIAS is process-local
+    (locmem) and settings.SINGLE_PROCESS is not set, nothing is cached and
+    every get() reads the database.
+    """
+
+    def __init__(self, local_ttl=5.0, max_users=10000):
+        self.local_ttl = local_ttl
+        self.max_users = max_users
+        self._local = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _shared(self):
+        return caches[principal_settings()["ALIAS"]]
+
+    def is_shared(self):
+        return is_shared_cache(principal_settings()["ALIAS"])
+
+    @staticmethod
+    def _key(user_id, generation):
+        return f"accounts:principal:{user_id}:{generation}"
+
+    @staticmethod
+    def _generation_key(user_id):
+        return f"accounts:principal-generation:{user_id}"
+
+    def _generation(self, user_id):
+        # A time, so a generation lost from the cache restarts past every old one
+        key = self._generation_key(user_id)
+        self._shared().add(key, time.time_ns(), None)
+        return self._shared().get(key)
+
+    def get(self, user_id):
+        """The principal row of ``user_id`` as a dict, or None for no such user"""
+        # Token claims carry the id as a string
+        user_id = str(user_id)
+        if not self.is_shared():
+            return self.load(user_id)
+
+        now = time.monotonic()
+        with self._lock:
+            entry = self._local.get(user_id)
+            if entry is not None and now - entry[0] < self.local_ttl:
+                self._local.move_to_end(user_id)
+                return entry[1]
+
+        # The generation is read before the row, never after
+        key = self._key(user_id, self._generation(user_id))
+        row = self._shared().get(key)
+        if row is None:
+            row = self.load(user_id)
+            if row is None:
+                return None
+            self._shared().set(key, row, principal_settings()["TIMEOUT"])
+
+        with self._lock:
+            self._local[user_id] = (now, row)
+            self._local.move_to_end(user_id)
+            if len(self._local) > self.max_users:
+                self._local.popitem(last=False)
+        return row
+
+    def load(self, user_id):
+        values = User._default_manager.filter(pk=user_id).values(*PRINCIPAL_FIELDS, "password").first()
+        if values is None:
+            return None
+        user = User(**values)
+        row = {field: values[field] for field in PRINCIPAL_FIELDS}
+        row[VERSION_CLAIM] = credentials_version(user)
+        return row
+
+    def invalidate(self, user_id):
+        user_id = str(user_id)
+        with self._lock:
+            self._local.pop(user_id, None)
+        self._shared().set(self._generation_key(user_id), time.time_ns(), None)
+
+    def clear(self):
+        """Forget this process's copies; the shared cache is left alone"""
+        with self._lock:
+            self._local.clear()
+
+
+def _build_cache():
+    config = principal_settings()
+    return PrincipalCache(config["LOCAL_TTL"], config["LOCAL_MAX_USERS"])
+
+
+principal_cache = _build_cache()
+
+
+def build_principal(row):
+    """A User instance from a principal row; unlisted fields load on first access"""
+    # from_db() takes values in model field order
+    fields = [field.attname for field in User._meta.concrete_fields if field.attname in PRINCIPAL_FIELDS]
+    return User.from_db(router.db_for_read(User), fields, [row[field] for field in fields])
+
+
+# ---------------------------
+# Authentication
+# ---------------------------
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    simplejwt's JWTAuthentication without the per-request user query.
+
+    The user comes from the principal cache, so role and is_active checks
+    (IsAdmin, IsAdminOrAuthor, ...) are answered from memory. A token whose
+    ``ver`` claim no longer matches the user's credentials (password
+    changed since it was issued) is rejected. Tokens issued before these
+    claims existed are accepted until they expire.
+    """
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        row = principal_cache.get(user_id)
+        if row is None:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+        if not row["is_active"]:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        version = validated_token.get(VERSION_CLAIM)
+        if version is not None and version != row[VERSION_CLAIM]:
+            raise AuthenticationFailed(_("Token is no longer valid"), code="token_not_valid")
+        return build_principal(row)
@@ -10,6 +10,8 @@ class User(AbstractUser):
     )
     role = models.CharField(max_length=10, choices=ROLE_CHOICES, default="USER")
     avatar = models.ImageField(upload_to='avatars/', blank=True, null=True)
+    # Resized copies of avatar (blog_app.images)
+    avatar_variants = models.JSONField(blank=True, null=True, editable=False)
     bio = models.TextField(blank=True)
     is_active = models.BooleanField(default=True)
 
@@ -36,7 +36,8 @@ class IsAuthorOrAdminForObject(permissions.BasePermission):
             return False
         if request.user.role == "ADMIN":
             return True
-        return obj.author == request.user
+        # Compare ids: no query for the related user
+        return obj.author_id == request.user.pk
 
 class IsOwnerOrAdminForObject(permissions.BasePermission):
     """
@@ -50,4 +51,4 @@ class IsOwnerOrAdminForObject(permissions.BasePermission):
         if request.user.role == "ADMIN":
             return True
         # Works for Comment, Like, or any model with 'user' field
-        return getattr(obj, "user", None) == request.user
+        return getattr(obj, "user_id", None) == request.user.pk
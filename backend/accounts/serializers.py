@@ -1,13 +1,21 @@
 from rest_framework import serializers
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
 from django.contrib.auth import get_user_model
 from django.contrib.auth import password_validation
+from django.utils.translation import gettext_lazy as _
+from blog_app.images import SrcsetField
+from .authentication import VERSION_CLAIM, credentials_version, principal_cache, token_claims
 
 User = get_user_model()
 
 class UserSerializer(serializers.ModelSerializer):
+    avatar_srcset = SrcsetField("avatar", "avatar_variants")
+
     class Meta:
         model = User
-        fields = ["id", "username", "email", "role", "avatar", "bio","is_active"]
+        fields = ["id", "username", "email", "role", "avatar", "avatar_srcset", "bio","is_active"]
 
 
 class RegisterSerializer(serializers.ModelSerializer):
@@ -47,5 +55,55 @@ class ChangePasswordSerializer(serializers.Serializer):
     def save(self, **kwargs):
         user = self.context["request"].user
         user.set_password(self.validated_data["new_password"])
-        user.save()
-        return user
\ No newline at end of file
+        # request.user comes from the principal cache; write only the password
+        user.save(update_fields=["password"])
+        return user
+
+
+# ---------------------------
+# JWT serializers
+# ---------------------------
+class PrincipalTokenObtainPairSerializer(TokenObtainPairSerializer):
+    """Token pair carrying role, active status and credentials version claims"""
+
+    @classmethod
+    def get_token(cls, user):
+        token = super().get_token(user)
+        claims = token_claims(user.role, user.is_active, credentials_version(user))
+        for claim, value in claims.items():
+            token[claim] = value
+        return token
+
+
+class PrincipalTokenRefreshSerializer(TokenRefreshSerializer):
+    """
+    Refresh with current claims: a role change shows up in the next access
+    token, and a refresh token from before a password change is refused.
+    """
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs["refresh"])
+        user_id = refresh.payload.get(api_settings.USER_ID_CLAIM)
+        if user_id is None:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+        row = principal_cache.get(user_id)
+        if (
+            row is None
+            or not row["is_active"]
+            or refresh.payload.get(VERSION_CLAIM, row[VERSION_CLAIM]) != row[VERSION_CLAIM]
+        ):
+            raise AuthenticationFailed(self.error_messages["no_active_account"], "no_active_account")
+
+        # Access tokens copy the refresh token's claims
+        claims = token_claims(row["role"], row["is_active"], row[VERSION_CLAIM])
+        for claim, value in claims.items():
+            refresh[claim] = value
+        data = {"access": str(refresh.access_token)}
+
+        if api_settings.ROTATE_REFRESH_TOKENS:
+            # The token blacklist app is not installed, so nothing to outstand
+            refresh.set_jti()
+            refresh.set_exp()
+            refresh.set_iat()
+            data["refresh"] = str(refresh)
+        return data
\ No newline at end of file
@@ -0,0 +1,25 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .authentication import principal_cache
+
+User = get_user_model()
+
+
+# ---------------------------
+# Principal cache
+# ---------------------------
+# After commit, so no request can cache the row as it was before the change
+@receiver(post_save, sender=User)
+def forget_saved_principal(sender, instance, update_fields=None, **kwargs):
+    # Logins only touch last_login, which principals do not carry
+    if update_fields is not None and set(update_fields) <= {"last_login"}:
+        return
+    transaction.on_commit(lambda: principal_cache.invalidate(instance.pk))
+
+
+@receiver(post_delete, sender=User)
+def forget_deleted_principal(sender, instance, **kwargs):
+    transaction.on_commit(lambda: principal_cache.invalidate(instance.pk))
@@ -1,3 +1,175 @@
-from django.test import TestCase
+"""
+SQL budgets of every accounts endpoint; see blog_app.tests for how budgets
+are checked. Run with ``python manage.py test --settings=backend.test_settings``.
+"""
+import tempfile
+from io import BytesIO
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.test import override_settings
+from PIL import Image
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.settings import api_settings
+
+from blog_app.images import process_image
+from blog_app.seeding import Seeder
+from blog_app.testing import Budget, QueryBudgetMixin
+from . import urls
+from .authentication import principal_cache
+from .serializers import PrincipalTokenObtainPairSerializer
+
+User = get_user_model()
+
+AUTH = "api/auth/"
+
+PAGE_SIZES = (1, 10, 50)
+
+PASSWORD = "budget-password"
+
+
+class AccountEndpointBudgetTests(QueryBudgetMixin, APITestCase):
+    URLCONFS = (urls,)
+    VOLUMES = {"users": 100, "authors": 10, "blogs": 0, "notifications_per_user": 0, "ads": 0}
+    BUDGETS = {
+        ("POST", AUTH + "register/"): Budget(queries=3, rows=1),
+        ("GET", AUTH + "users/"): Budget(queries=3, rows=2, rows_per_item=1),
+        ("GET", AUTH + "users/<int:pk>/"): Budget(queries=2, rows=2),
+        ("PATCH", AUTH + "users/<int:pk>/"): Budget(queries=3, rows=2),
+        ("POST", AUTH + "login/"): Budget(queries=1, rows=1),
+        ("POST", AUTH + "refresh/"): Budget(queries=1, rows=1),
+        ("GET", AUTH + "protected/"): Budget(queries=1, rows=1),
+        ("PUT", AUTH + "change-password/"): Budget(queries=3, rows=2),
+    }
+
+    @classmethod
+    def setUpTestData(cls):
+        Seeder(cls.VOLUMES, prefix="budget", password=PASSWORD).run()
+        cls.admin = User.objects.filter(role="ADMIN").first()
+        cls.reader = User.objects.filter(role="USER").first()
+
+    def login(self, user):
+        token = PrincipalTokenObtainPairSerializer.get_token(user).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+
+    def test_register_and_login(self):
+        self.request_within_budget("POST", f"/{AUTH}register/", status=201, data={
+            "username": "budget-newcomer", "email": "newcomer@example.com", "password": PASSWORD,
+        })
+        response, *_ = self.request_within_budget("POST", f"/{AUTH}login/", data={
+            "username": self.reader.username, "password": PASSWORD,
+        })
+        self.request_within_budget("POST", f"/{AUTH}refresh/", data={"refresh": response.data["refresh"]})
+
+    def test_users(self):
+        self.login(self.admin)
+        self.assertPageSizeIndependent(f"/{AUTH}users/", PAGE_SIZES)
+        self.assertPageSizeIndependent(f"/{AUTH}users/?role=author&search=budget", PAGE_SIZES)
+        self.request_within_budget("GET", f"/{AUTH}users/{self.reader.pk}/")
+        self.request_within_budget("PATCH", f"/{AUTH}users/{self.reader.pk}/", data={"bio": "Edited"})
+
+    def test_current_user(self):
+        self.login(self.reader)
+        self.request_within_budget("GET", f"/{AUTH}protected/")
+        self.request_within_budget("PUT", f"/{AUTH}change-password/", data={
+            "old_password": PASSWORD, "new_password": "new-password", "confirm_password": "new-password",
+        })
+
+
+class LargeAccountEndpointBudgetTests(AccountEndpointBudgetTests):
+    """The same budgets with ten times the users"""
+    VOLUMES = {**AccountEndpointBudgetTests.VOLUMES, "users": 1000, "authors": 100}
+
+
+class PrincipalCacheTests(APITestCase):
+    """Cached principals follow every change to their user"""
+
+    @classmethod
+    def setUpTestData(cls):
+        Seeder({"users": 5, "authors": 1, "blogs": 0, "notifications_per_user": 0, "ads": 0}, prefix="principal").run()
+        cls.reader = User.objects.filter(role="USER").first()
+
+    def setUp(self):
+        principal_cache.invalidate(self.reader.pk)
+        token = PrincipalTokenObtainPairSerializer.get_token(self.reader).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+
+    def save(self, **changes):
+        # Principals are forgotten once the save commits
+        with self.captureOnCommitCallbacks(execute=True):
+            for field, value in changes.items():
+                setattr(self.reader, field, value)
+            self.reader.save()
+
+    def test_deactivation(self):
+        self.assertEqual(self.client.get(f"/{AUTH}protected/").status_code, 200)
+        self.save(is_active=False)
+        self.assertEqual(self.client.get(f"/{AUTH}protected/").status_code, 401)
+
+    def test_role_change(self):
+        self.assertEqual(self.client.get(f"/{AUTH}users/").status_code, 403)
+        self.save(role="ADMIN")
+        self.assertEqual(self.client.get(f"/{AUTH}users/").status_code, 200)
+        self.save(role="USER")
+        self.assertEqual(self.client.get(f"/{AUTH}users/").status_code, 403)
+
+    def test_late_write(self):
+        # A request that read the row before a demotion committed stores it afterwards
+        generation = principal_cache._generation(self.reader.pk)
+        stale = principal_cache.load(self.reader.pk)
+        self.save(role="ADMIN")
+        principal_cache._shared().set(principal_cache._key(self.reader.pk, generation), stale)
+        principal_cache.clear()
+        self.assertEqual(principal_cache.get(self.reader.pk)["role"], "ADMIN")
+
+    def test_refresh_without_user(self):
+        refresh = PrincipalTokenObtainPairSerializer.get_token(self.reader)
+        del refresh[api_settings.USER_ID_CLAIM]
+        response = self.client.post(f"/{AUTH}refresh/", {"refresh": str(refresh)})
+        self.assertEqual(response.status_code, 401)
+
+    def test_avatar_variants(self):
+        # Variants are stored with update(), which sends no post_save
+        with tempfile.TemporaryDirectory() as media, override_settings(MEDIA_ROOT=media):
+            image = BytesIO()
+            Image.new("RGB", (300, 300), "teal").save(image, "PNG")
+            name = User._meta.get_field("avatar").storage.save("avatars/principal.png", ContentFile(image.getvalue()))
+            User.objects.filter(pk=self.reader.pk).update(avatar=name)
+            self.assertIsNone(self.client.get(f"/{AUTH}protected/").data["avatar_srcset"])
+
+            process_image(User, self.reader.pk, name)
+            self.assertTrue(self.client.get(f"/{AUTH}protected/").data["avatar_srcset"])
+
+    def test_process_local_cache(self):
+        # Another worker's save could not reach this process's cache, so
+        # principals are read from the database on every request
+        with override_settings(SINGLE_PROCESS=False):
+            self.assertEqual(self.client.get(f"/{AUTH}users/").status_code, 403)
+            User.objects.filter(pk=self.reader.pk).update(role="ADMIN")
+            self.assertEqual(self.client.get(f"/{AUTH}users/").status_code, 200)
+
+
+class ThrottleTests(APITestCase):
+    """Login attempts are limited per client address, whatever headers the client sends"""
+
+    @classmethod
+    def setUpTestData(cls):
+        Seeder({"users": 5, "authors": 1, "blogs": 0, "notifications_per_user": 0, "ads": 0},
+               prefix="throttle", password=PASSWORD).run()
+        cls.reader = User.objects.filter(role="USER").first()
+
+    def login(self, address, **headers):
+        return self.client.post(f"/{AUTH}login/", {"username": self.reader.username, "password": PASSWORD},
+                                REMOTE_ADDR=address, **headers)
+
+    def test_login_rate(self):
+        throttling = {**settings.THROTTLING, "ENABLED": True, "STORE": "local", "RATES": {"login.ip": "2/hour"}}
+        with override_settings(THROTTLING=throttling):
+            self.assertEqual(self.login("203.0.113.1").status_code, 200)
+            self.assertEqual(self.login("203.0.113.1", HTTP_X_FORWARDED_FOR="198.51.100.1").status_code, 200)
+            # A made-up X-Forwarded-For does not open a new bucket
+            response = self.login("203.0.113.1", HTTP_X_FORWARDED_FOR="198.51.100.2")
+            self.assertEqual(response.status_code, 429)
+            self.assertGreater(int(response["Retry-After"]), 0)
+            self.assertEqual(self.login("203.0.113.2").status_code, 200)
@@ -0,0 +1,287 @@
+import fcntl
+import hashlib
+import logging
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework.throttling import BaseThrottle
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    "ENABLED": True,
+    "STORE": "local",           # local | mmap | redis
+    "LOCAL_MAX_KEYS": 100000,
+    "MMAP_PATH": os.path.join(tempfile.gettempdir(), "blog-throttle.buckets"),
+    "MMAP_SLOTS": 65536,
+    "REDIS_URL": "redis://localhost:6379/0",
+    "REDIS_PREFIX": "throttle:",
+    # "<scope>.<ip|user|username>": "<requests>/<s|min|hour|day>"; no rate, no limit
+    "RATES": {},
+}
+
+
+def throttle_settings():
+    return {**DEFAULTS, **getattr(settings, "THROTTLING", {})}
+
+
+def parse_rate(rate):
+    """``"10/min"`` -> (capacity 10, refill 10/60 tokens per second)"""
+    num, period = rate.split("/")
+    duration = {"s": 1, "m": 60, "h": 3600, "d": 86400}[period[0]]
+    return int(num), int(num) / duration
+
+
+def refill(tokens, updated_at, capacity, rate, now):
+    return min(capacity, tokens + max(now - updated_at, 0.0) * rate)
+
+
+def consume(tokens, rate):
+    """(allowed, tokens left, seconds until the next token) after taking one token"""
+    if tokens >= 1:
+        return True, tokens - 1, 0.0
+    return False, tokens, (1 - tokens) / rate
+
+
+# ---------------------------
+# Bucket stores
+# ---------------------------
+# Every store offers take(key, capacity, rate) -> (allowed, wait seconds):
+# refill the bucket for the time since its last use, then take one token.
+# A bucket seen for the first time starts full.
+class LocalStore:
+    """Per-process buckets; each worker process enforces its own limits"""
+    blocking = False
+
+    def __init__(self, max_keys=100000):
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, key, capacity, rate):
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated_at = self._buckets.pop(key, (capacity, now))
+            allowed, tokens, wait = consume(refill(tokens, updated_at, capacity, rate, now), rate)
+            self._buckets[key] = (tokens, now)
+            if len(self._buckets) > self.max_keys:
+                # Least recently used bucket; a returning client starts full
+                self._buckets.popitem(last=False)
+        return allowed, wait
+
+
+class MmapStore:
+    """
+    Buckets in a memory-mapped file shared by every worker on the host.
+
+    The file is a fixed hash table of 8-slot groups; a key lives in the
+    group its hash selects, so a lookup reads at most 8 slots under a
+    byte-range lock on that group alone. When a group is full the
+    stalest bucket is recycled (the recycled client starts full again).
+    """
+    blocking = False
+
+    SLOT = struct.Struct("<Qdd")    # key hash, tokens, updated_at
+    GROUP_SLOTS = 8
+
+    def __init__(self, path, slots=65536):
+        self.path = path
+        self.groups = max(slots // self.GROUP_SLOTS, 1)
+        self.group_size = self.GROUP_SLOTS * self.SLOT.size
+        self._lock = threading.Lock()
+        self._pid = None
+
+    def _open(self):
+        # A mapping and its locks belong to one process; reopen after fork()
+        if self._pid == os.getpid():
+            return
+        size = self.groups * self.group_size
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        if os.fstat(fd).st_size < size:
+            os.ftruncate(fd, size)
+        self._fd, self._map, self._pid = fd, mmap.mmap(fd, size), os.getpid()
+
+    @staticmethod
+    def key_hash(key):
+        # 0 marks an empty slot
+        return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "little") or 1
+
+    def take(self, key, capacity, rate):
+        key_hash = self.key_hash(key)
+        start = (key_hash % self.groups) * self.group_size
+        now = time.time()
+
+        with self._lock:
+            self._open()
+            fcntl.lockf(self._fd, fcntl.LOCK_EX, self.group_size, start)
+            try:
+                position, bucket = None, None
+                stalest = float("inf")
+                for offset in range(start, start + self.group_size, self.SLOT.size):
+                    slot_hash, tokens, updated_at = self.SLOT.unpack_from(self._map, offset)
+                    if slot_hash == key_hash:
+                        position, bucket = offset, (tokens, updated_at)
+                        break
+                    if updated_at < stalest:
+                        position, stalest = offset, updated_at
+
+                tokens, updated_at = bucket or (capacity, now)
+                allowed, tokens, wait = consume(refill(tokens, updated_at, capacity, rate, now), rate)
+                self.SLOT.pack_into(self._map, position, key_hash, tokens, now)
+            finally:
+                fcntl.lockf(self._fd, fcntl.LOCK_UN, self.group_size, start)
+        return allowed, wait
+
+
+class RedisStore:
+    """
+    Buckets in Redis (or anything speaking its protocol), shared by every
+    host. One round trip: a Lua script refills and takes atomically using
+    the server clock, and expires idle buckets once they would be full.
+    """
+    blocking = True
+
+    SCRIPT = """
+    local capacity = tonumber(ARGV[1])
+    local rate = tonumber(ARGV[2])
+    local clock = redis.call('TIME')
+    local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+    local bucket = redis.call('HMGET', KEYS[1], 't', 'u')
+    local tokens = tonumber(bucket[1]) or capacity
+    local updated_at = tonumber(bucket[2]) or now
+    tokens = math.min(capacity, tokens + math.max(now - updated_at, 0) * rate)
+    local allowed = 0
+    if tokens >= 1 then
+        tokens = tokens - 1
+        allowed = 1
+    end
+    redis.call('HSET', KEYS[1], 't', tostring(tokens), 'u', tostring(now))
+    redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / rate * 1000))
+    return {allowed, tostring(tokens)}
+    """
+
+    def __init__(self, url, prefix):
+        try:
+            import redis
+        except ImportError:
+            raise ImproperlyConfigured("THROTTLING['STORE'] = 'redis' requires the redis package.")
+        self.prefix = prefix
+        self.script = redis.Redis.from_url(url).register_script(self.SCRIPT)
+
+    def take(self, key, capacity, rate):
+        allowed, tokens = self.script(keys=[self.prefix + key], args=[capacity, rate])
+        if allowed:
+            return True, 0.0
+        return False, (1 - float(tokens)) / rate
+
+
+def _build_store():
+    config = throttle_settings()
+    if config["STORE"] == "local":
+        return LocalStore(config["LOCAL_MAX_KEYS"])
+    if config["STORE"] == "mmap":
+        return MmapStore(config["MMAP_PATH"], config["MMAP_SLOTS"])
+    if config["STORE"] == "redis":
+        return RedisStore(config["REDIS_URL"], config["REDIS_PREFIX"])
+    raise ImproperlyConfigured(f"Unknown THROTTLING['STORE']: {config['STORE']!r}")
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = _build_store()
+    return _store
+
+
+# ---------------------------
+# DRF throttles
+# ---------------------------
+class TokenBucketThrottle(BaseThrottle):
+    """
+    Token bucket for the view's ``throttle_scope``, keyed by ``kind``.
+
+    The limit is THROTTLING["RATES"]["<scope>.<kind>"]; views may narrow
+    throttling to some methods with ``throttle_methods``. A failing store
+    lets requests through rather than taking the endpoint down.
+    """
+    kind = None
+
+    def __init__(self):
+        self._wait = None
+
+    def get_key(self, request, view):
+        raise NotImplementedError
+
+    def allow_request(self, request, view):
+        config = throttle_settings()
+        scope = getattr(view, "throttle_scope", None)
+        rate = config["RATES"].get(f"{scope}.{self.kind}")
+        methods = getattr(view, "throttle_methods", None)
+        if not config["ENABLED"] or rate is None or (methods and request.method not in methods):
+            return True
+
+        key = self.get_key(request, view)
+        if key is None:
+            return True
+        capacity, refill_rate = parse_rate(rate)
+        try:
+            allowed, self._wait = get_store().take(f"{scope}:{self.kind}:{key}", capacity, refill_rate)
+        except Exception:
+            logger.exception("Throttle store failed; allowing the request")
+            return True
+        return allowed
+
+    def wait(self):
+        return self._wait
+
+
+class IPThrottle(TokenBucketThrottle):
+    kind = "ip"
+
+    def get_key(self, request, view):
+        return self.get_ident(request)
+
+
+class UserThrottle(TokenBucketThrottle):
+    """Per user; anonymous requests share their IP's bucket"""
+    kind = "user"
+
+    def get_key(self, request, view):
+        user = getattr(request, "user", None)
+        if user is not None and user.is_authenticated:
+            return str(user.pk)
+        return f"ip-{self.get_ident(request)}"
+
+
+class UsernameThrottle(TokenBucketThrottle):
+    """Per submitted username, so guessing one account's password is slow from any number of IPs"""
+    kind = "username"
+
+    def get_key(self, request, view):
+        username = request.data.get("username") if hasattr(request.data, "get") else None
+        return username.strip().lower() if isinstance(username, str) and username.strip() else None
+
+
+def check_throttles(throttles, request, view):
+    """
+    None when every throttle allows the request, else the seconds to wait.
+    For views outside DRF's dispatch (the async views).
+    """
+    waits = [throttle.wait() for throttle in throttles if not throttle.allow_request(request, view)]
+    if not waits:
+        return None
+    return max((wait for wait in waits if wait is not None), default=0.0)
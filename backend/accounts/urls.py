@@ -1,8 +1,5 @@
 from django.urls import path
-from rest_framework_simplejwt.views import (
-    TokenObtainPairView,
-    TokenRefreshView,
-)
+from rest_framework_simplejwt.views import TokenRefreshView
 from . import views
 
 urlpatterns = [
@@ -14,7 +11,7 @@ urlpatterns = [
     path("users/<int:pk>/", views.UserDetailView.as_view(), name="user-detail"),
 
     # JWT Authentication
-    path("login/", TokenObtainPairView.as_view(), name="login"),       # get access + refresh token
+    path("login/", views.LoginView.as_view(), name="login"),       # get access + refresh token
     path("refresh/", TokenRefreshView.as_view(), name="token_refresh"),
 
     # Protected Route
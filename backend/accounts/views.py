@@ -2,9 +2,11 @@ from django.shortcuts import render
 from rest_framework import generics, permissions, status
 from rest_framework.response import Response
 from rest_framework.views import APIView
+from rest_framework_simplejwt.views import TokenObtainPairView
 from django.contrib.auth import get_user_model
-from .serializers import UserSerializer, RegisterSerializer, ChangePasswordSerializer
+from .serializers import UserSerializer, RegisterSerializer, ChangePasswordSerializer, PrincipalTokenObtainPairSerializer
 from .permissions import IsAdmin
+from .throttling import IPThrottle, UsernameThrottle
 from .pagination import UserPagination
 from django.db.models import Q
 
@@ -15,6 +17,14 @@ class RegisterView(generics.CreateAPIView):
     queryset = User.objects.all()
     serializer_class = RegisterSerializer
     permission_classes = [permissions.AllowAny]
+    throttle_classes = [IPThrottle]
+    throttle_scope = "register"
+
+
+class LoginView(TokenObtainPairView):
+    """simplejwt's token pair login, throttled since every attempt hashes a password"""
+    throttle_classes = [IPThrottle, UsernameThrottle]
+    throttle_scope = "login"
 
 
 class UserListView(generics.ListAPIView):
@@ -74,5 +84,11 @@ class ChangePasswordView(generics.UpdateAPIView):
     def update(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data, context={"request": request})
         serializer.is_valid(raise_exception=True)
-        serializer.save()
-        return Response({"detail": "Password updated successfully"}, status=status.HTTP_200_OK)
+        user = serializer.save()
+        # Tokens issued before the change no longer authenticate; hand out a new pair
+        refresh = PrincipalTokenObtainPairSerializer.get_token(user)
+        return Response({
+            "detail": "Password updated successfully",
+            "refresh": str(refresh),
+            "access": str(refresh.access_token),
+        }, status=status.HTTP_200_OK)
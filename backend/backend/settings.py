@@ -60,17 +60,140 @@ AUTH_USER_MODEL = "accounts.User"
 
 REST_FRAMEWORK = { 
     'DEFAULT_AUTHENTICATION_CLASSES': ( 
-        'rest_framework_simplejwt.authentication.JWTAuthentication', 
+        'accounts.authentication.CachedJWTAuthentication', 
     ), 
     'DEFAULT_PERMISSION_CLASSES': ( 
         'rest_framework.permissions.IsAuthenticated', 
     ),
     "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",
     "PAGE_SIZE": 5,
+    # Reverse proxies in front of the app. Client IPs (throttle buckets, view
+    # dedupe) are read from X-Forwarded-For only this many hops back; with 0
+    # the header is ignored, since any client can send one
+    "NUM_PROXIES": env.int("NUM_PROXIES", default=0),
+}
+
+SIMPLE_JWT = {
+    "TOKEN_OBTAIN_SERIALIZER": "accounts.serializers.PrincipalTokenObtainPairSerializer",
+    "TOKEN_REFRESH_SERIALIZER": "accounts.serializers.PrincipalTokenRefreshSerializer",
+}
+
+# Cached user principals for JWT authentication (accounts.authentication)
+PRINCIPAL_CACHE = {
+    "TIMEOUT": env.int("PRINCIPAL_CACHE_TIMEOUT", default=3600),
+    "LOCAL_TTL": env.float("PRINCIPAL_CACHE_LOCAL_TTL", default=5.0),
 }
 
 CORS_ALLOW_ALL_ORIGINS = True
 
+# Caches: locmemcache://, filecache:///var/tmp/blog_cache or redis://host:6379/1
+# A process-local cache is only coherent with a single worker process.
+# Set SINGLE_PROCESS when one process serves every request (runserver, one
+# gunicorn worker); otherwise nothing that must be invalidated across
+# workers is kept in a locmem cache.
+SINGLE_PROCESS = env.bool("SINGLE_PROCESS", default=DEBUG)
+CACHES = {
+    "default": env.cache("CACHE_URL", default="locmemcache://"),
+    "responses": env.cache("RESPONSE_CACHE_URL", default="locmemcache://responses"),
+}
+
+# Versioned response cache for public endpoints (blog_app.cache). It also
+# holds the model versions that tell workers their copies are stale, so with
+# several workers point RESPONSE_CACHE_URL at a shared cache (redis or file);
+# on a process-local one, response caching and conditional GET are off
+RESPONSE_CACHE = {
+    "ALIAS": "responses",
+    "TIMEOUT": env.int("RESPONSE_CACHE_TIMEOUT", default=300),
+}
+
+# Full-text search (blog_app.search); PostgreSQL text search configuration
+SEARCH_CONFIG = env("SEARCH_CONFIG", default="english")
+
+# Write-behind view tracking (blog_app.tracking)
+VIEW_TRACKING = {
+    "BUFFERED": env.bool("VIEW_TRACKING_BUFFERED", default=True),
+    "BATCH_SIZE": env.int("VIEW_TRACKING_BATCH_SIZE", default=500),
+    "FLUSH_INTERVAL": env.float("VIEW_TRACKING_FLUSH_INTERVAL", default=2.0),
+    "MAX_QUEUE": env.int("VIEW_TRACKING_MAX_QUEUE", default=10000),
+    "OVERFLOW": env("VIEW_TRACKING_OVERFLOW", default="drop"),  # drop | drop_oldest | sync
+    # exact: a BlogVisitor row per (blog, ip) seen within VIEW_ROLLUP's RETENTION_DAYS;
+    # hll: HyperLogLog sketches (blog_app.visitors)
+    "UNIQUE_MODE": env("VIEW_TRACKING_UNIQUE_MODE", default="exact"),
+    "HLL_PRECISION": env.int("VIEW_TRACKING_HLL_PRECISION", default=12),
+}
+
+# Daily engagement rollup, and pruning of raw views and exact-mode visitors after
+# RETENTION_DAYS (blog_app.rollup)
+VIEW_ROLLUP = {
+    "RETENTION_DAYS": env.int("VIEW_ROLLUP_RETENTION_DAYS", default=90),
+    "BATCH_SIZE": env.int("VIEW_ROLLUP_BATCH_SIZE", default=10000),
+    "SETTLE_SECONDS": env.float("VIEW_ROLLUP_SETTLE_SECONDS", default=60.0),
+}
+
+# Notification fan-out and inbox (blog_app.notifications)
+NOTIFICATIONS = {
+    "FRONTEND_URL": env("FRONTEND_URL", default="http://localhost:5173"),
+    "FANOUT_BATCH_SIZE": env.int("NOTIFICATIONS_FANOUT_BATCH_SIZE", default=1000),
+    "UNREAD_COUNT_TIMEOUT": env.int("NOTIFICATIONS_UNREAD_COUNT_TIMEOUT", default=3600),
+    "RETENTION_DAYS": env.int("NOTIFICATIONS_RETENTION_DAYS", default=90),
+}
+
+# Live blog event streams (blog_app.events); use the redis broker with
+# more than one worker process so every stream sees every event
+EVENT_STREAM = {
+    "BROKER": env("EVENT_STREAM_BROKER", default="local"),  # local | redis
+    "REDIS_URL": env("EVENT_STREAM_REDIS_URL", default="redis://localhost:6379/0"),
+    "HEARTBEAT": env.float("EVENT_STREAM_HEARTBEAT", default=15.0),
+    "QUEUE_SIZE": env.int("EVENT_STREAM_QUEUE_SIZE", default=100),
+    "MAX_CONNECTIONS": env.int("EVENT_STREAM_MAX_CONNECTIONS", default=10000),
+    # Seconds a stream ticket (what EventSource authenticates with) stays valid
+    "TICKET_MAX_AGE": env.int("EVENT_STREAM_TICKET_MAX_AGE", default=60),
+}
+
+# Resized image variants built on upload (blog_app.images)
+IMAGE_VARIANTS = {
+    "BACKGROUND": env.bool("IMAGE_VARIANTS_BACKGROUND", default=True),
+    "WORKERS": env.int("IMAGE_VARIANTS_WORKERS", default=2),
+    "FORMATS": env.list("IMAGE_VARIANTS_FORMATS", default=["avif", "webp"]),
+    "QUALITY": env.int("IMAGE_VARIANTS_QUALITY", default=80),
+}
+
+# Ad serving (blog_app.ads): in-process index of running ads, impressions
+# and clicks written in batches
+ADS = {
+    "VERSION_CHECK_INTERVAL": env.float("ADS_VERSION_CHECK_INTERVAL", default=5.0),
+    "MAX_ADS": env.int("ADS_MAX_ADS", default=5),
+    "BATCH_SIZE": env.int("ADS_BATCH_SIZE", default=1000),
+    "FLUSH_INTERVAL": env.float("ADS_FLUSH_INTERVAL", default=10.0),
+    "MAX_QUEUE": env.int("ADS_MAX_QUEUE", default=50000),
+}
+
+# Token-bucket throttling (accounts.throttling). The mmap store (a file in
+# the temp directory) shares buckets between the worker processes of one
+# host, redis between hosts.
+THROTTLING = {
+    "ENABLED": env.bool("THROTTLE_ENABLED", default=True),
+    "STORE": env("THROTTLE_STORE", default="local"),  # local | mmap | redis
+    "REDIS_URL": env("THROTTLE_REDIS_URL", default="redis://localhost:6379/0"),
+    "RATES": {
+        "login.ip": "20/min",
+        "login.username": "5/min",
+        "register.ip": "10/hour",
+        "post_views.ip": "120/min",
+        "reactions.user": "60/min",
+        "reactions.ip": "300/min",
+        "comments.user": "10/min",
+        "comments.ip": "60/min",
+    },
+}
+
+# Serve the public read endpoints (posts, featured, stats) with async views.
+# Only worth it under an ASGI server; under WSGI each request gets its own
+# event loop. Independent queries run on separate connections unless
+# ASYNC_PARALLEL_QUERIES is off (blog_app.parallel).
+ASYNC_PUBLIC_API = env.bool("ASYNC_PUBLIC_API", default=False)
+ASYNC_PARALLEL_QUERIES = env.bool("ASYNC_PARALLEL_QUERIES", default=True)
+
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
@@ -151,6 +274,10 @@ USE_TZ = True
 
 STATIC_URL = 'static/'
 
+# Uploaded files (blog images, avatars, advertisements)
+MEDIA_URL = 'media/'
+MEDIA_ROOT = env("MEDIA_ROOT", default=str(BASE_DIR / 'media'))
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
 
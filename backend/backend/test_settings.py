@@ -0,0 +1,41 @@
+"""
+Settings for the test suite: ``python manage.py test --settings=backend.test_settings``.
+
+Runs against an in-memory SQLite database, so no .env or PostgreSQL is
+needed, and turns off the background writers and limits whose timing
+would make query counts nondeterministic.
+"""
+import os
+
+os.environ.setdefault("SECRET_KEY", "insecure-key-used-only-by-the-test-suite")
+for name in ("DB_NAME", "DB_USER", "DB_PASSWORD", "DB_HOST", "DB_PORT"):
+    os.environ.setdefault(name, "test")
+
+from .settings import *  # noqa: E402,F401,F403
+
+DATABASES = {
+    "default": {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": ":memory:",
+    }
+}
+
+CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "tests"},
+    "responses": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "tests-responses"},
+}
+# The test client and the code under test share one process
+SINGLE_PROCESS = True
+
+# Hashing is not what the tests measure
+PASSWORD_HASHERS = ["django.contrib.auth.hashers.MD5PasswordHasher"]
+
+MEDIA_ROOT = BASE_DIR / "test_media"  # noqa: F405
+
+# Writes happen in the request that causes them, never in a background thread
+VIEW_TRACKING = {**VIEW_TRACKING, "BUFFERED": False}  # noqa: F405
+IMAGE_VARIANTS = {**IMAGE_VARIANTS, "BACKGROUND": False}  # noqa: F405
+ADS = {**ADS, "FLUSH_INTERVAL": 3600.0}  # noqa: F405
+ASYNC_PUBLIC_API = False
+ASYNC_PARALLEL_QUERIES = False
+THROTTLING = {**THROTTLING, "ENABLED": False}  # noqa: F405
@@ -0,0 +1,181 @@
+import bisect
+import heapq
+import random
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.db.models import Case, F, PositiveBigIntegerField, Value, When
+from django.utils import timezone
+
+from .buffers import BufferedWriter
+from .cache import model_versions
+from .models import Advertisement
+
+
+DEFAULTS = {
+    "VERSION_CHECK_INTERVAL": 5.0,  # seconds between checks for changes made by other processes
+    "MAX_ADS": 5,                   # ads per serve request
+    "BATCH_SIZE": 1000,
+    "FLUSH_INTERVAL": 10.0,
+    "MAX_QUEUE": 50000,
+    "OVERFLOW": "drop",
+}
+
+
+def ad_settings():
+    return {**DEFAULTS, **getattr(settings, "ADS", {})}
+
+
+# ---------------------------
+# Active-window index
+# ---------------------------
+class AdIndex:
+    """
+    In-process index of the ads that are running now or scheduled to.
+
+    Loaded with one query, then every lookup is answered from memory. The
+    running set is recomputed only when the clock crosses the next start
+    or end date, and kept with cumulative weights so a weighted pick is a
+    bisect. Saves and deletes invalidate the index in this process; other
+    processes notice through the Advertisement version in the shared
+    response cache, checked at most every VERSION_CHECK_INTERVAL seconds.
+    Without a shared response cache there are no versions, and the index is
+    simply reloaded that often.
+    """
+
+    def __init__(self, check_interval=5.0):
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._ads = None
+        self._version = None
+        self._checked_at = 0.0
+        self._running = []
+        self._cumulative = []
+        self._valid_until = None
+
+    def invalidate(self):
+        with self._lock:
+            self._ads = None
+
+    def _version_now(self):
+        versions = model_versions([Advertisement])
+        return None if versions is None else versions[Advertisement._meta.label_lower]
+
+    def _load(self):
+        version = self._version_now()
+        now = timezone.now()
+        ads = list(
+            Advertisement.objects.filter(is_active=True, weight__gt=0, end_date__gt=now)
+            .only("id", "title", "image", "image_variants", "url", "start_date", "end_date", "weight")
+            .order_by("start_date", "pk")
+        )
+        self._ads, self._version, self._checked_at = ads, version, time.monotonic()
+        self._valid_until = None
+
+    def _stale(self):
+        if self._ads is None:
+            return True
+        if time.monotonic() - self._checked_at < self.check_interval:
+            return False
+        self._checked_at = time.monotonic()
+        version = self._version_now()
+        return version is None or version != self._version
+
+    def _window(self, now):
+        # Ads running at ``now`` and the next boundary where that changes
+        running = [ad for ad in self._ads if ad.start_date <= now < ad.end_date]
+        boundaries = [ad.start_date for ad in self._ads if ad.start_date > now]
+        boundaries += [ad.end_date for ad in running]
+        self._ads = [ad for ad in self._ads if ad.end_date > now]
+
+        total, cumulative = 0, []
+        for ad in running:
+            total += ad.weight
+            cumulative.append(total)
+        self._running, self._cumulative = running, cumulative
+        self._valid_until = min(boundaries, default=None)
+
+    def running(self, now=None):
+        """(ads, cumulative weights) of the ads running at ``now``"""
+        now = now or timezone.now()
+        with self._lock:
+            if self._stale():
+                self._load()
+                self._window(now)
+            elif self._valid_until is not None and now >= self._valid_until:
+                self._window(now)
+            return self._running, self._cumulative
+
+    def pick(self, count=1):
+        """Up to ``count`` distinct running ads, each drawn with probability proportional to its weight"""
+        ads, cumulative = self.running()
+        if count == 1 and ads:
+            return [ads[bisect.bisect_right(cumulative, random.random() * cumulative[-1])]]
+        return weighted_sample(ads, count)
+
+    def get(self, pk):
+        """A running ad by id, or None"""
+        ads, _ = self.running()
+        for ad in ads:
+            if ad.pk == pk:
+                return ad
+        return None
+
+
+def weighted_sample(ads, count):
+    """Weighted sampling without replacement (Efraimidis-Spirakis keys)"""
+    if len(ads) <= count:
+        return sorted(ads, key=lambda ad: random.random() ** (1 / ad.weight), reverse=True)
+    return heapq.nlargest(count, ads, key=lambda ad: random.random() ** (1 / ad.weight))
+
+
+# ---------------------------
+# Impression and click counters
+# ---------------------------
+AD_COUNTER_FIELDS = {"impression": "impressions_count", "click": "clicks_count"}
+
+
+class AdCounter(BufferedWriter):
+    """
+    Impressions and clicks queued in memory and written in batches: one
+    UPDATE ... SET field = field + CASE ... END per counter per batch.
+    """
+
+    def record(self, ad_ids, event):
+        field = AD_COUNTER_FIELDS[event]
+        for ad_id in ad_ids:
+            self.submit((ad_id, field))
+
+    def write_batch(self, items):
+        by_field = {}
+        for ad_id, field in items:
+            by_field.setdefault(field, Counter())[ad_id] += 1
+
+        for field, counts in by_field.items():
+            delta = Case(
+                *[When(pk=pk, then=Value(value)) for pk, value in counts.items()],
+                default=Value(0),
+                output_field=PositiveBigIntegerField(),
+            )
+            Advertisement.objects.filter(pk__in=counts).update(**{field: F(field) + delta})
+        return len(items)
+
+
+def _build_index():
+    return AdIndex(check_interval=ad_settings()["VERSION_CHECK_INTERVAL"])
+
+
+def _build_counter():
+    config = ad_settings()
+    return AdCounter(
+        batch_size=config["BATCH_SIZE"],
+        flush_interval=config["FLUSH_INTERVAL"],
+        max_queue=config["MAX_QUEUE"],
+        overflow=config["OVERFLOW"],
+    )
+
+
+ad_index = _build_index()
+ad_counter = _build_counter()
@@ -0,0 +1,222 @@
+import asyncio
+import math
+
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views import View
+from rest_framework.exceptions import APIException, AuthenticationFailed, NotAuthenticated, NotFound, Throttled
+from rest_framework.utils.encoders import JSONEncoder
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+
+from accounts.authentication import CachedJWTAuthentication, build_principal, principal_cache
+from accounts.throttling import IPThrottle, check_throttles, get_store
+
+from .cache import acached_response
+from .conditional import aconditional_get, version_validators
+from .events import blog_channel, event_settings, format_event, get_broker, read_stream_ticket
+from .models import Blog, Category
+from .pagination import AsyncPageNumberPagination, PublicBlogPagination
+from .search import aget_search_backend
+from .serializers import FeaturedBlogSerializer, PublicBlogListSerializer, PublicBlogSerializer
+from .stats import aget_site_stats
+from .tracking import view_tracker
+from .views import (
+    featured_blog_queryset, filter_public_blog_list, get_client_ip, post_detail_validators,
+    post_list_validators, public_blog_queryset,
+)
+
+
+# ---------------------------
+# Authentication
+# ---------------------------
+def _authenticate(request, blog_id=None):
+    """
+    The JWT user from the Authorization header, or for ``blog_id``'s event
+    stream the user of a ``?ticket=`` (blog_app.events.issue_stream_ticket),
+    since browsers' EventSource cannot send headers. Access tokens are never
+    read from the query string, where logs would keep them. None when
+    anonymous.
+    """
+    auth = CachedJWTAuthentication()
+    result = auth.authenticate(request)
+    if result is not None:
+        return result[0]
+    ticket = request.GET.get("ticket")
+    if ticket and blog_id is not None:
+        user_id = read_stream_ticket(ticket, blog_id)
+        row = principal_cache.get(user_id) if user_id is not None else None
+        return build_principal(row) if row is not None else None
+    return None
+
+
+aauthenticate = sync_to_async(_authenticate)
+
+
+# ---------------------------
+# Live blog events (Server-Sent Events)
+# ---------------------------
+async def blog_event_stream(request, blog_id):
+    """
+    ``text/event-stream`` of a published blog's live updates: ``reaction``
+    (new counts plus the per-type delta) and ``comment`` (the new comment).
+    A ``resync`` event means updates were dropped because the client read
+    too slowly, so it should refetch.
+
+    Authenticated by an Authorization header or, for EventSource, by a
+    ``?ticket=`` from POST .../events/ticket/; once a ticket expires the
+    client gets a 401 and must fetch a new one to reconnect.
+
+    Each idle connection is one suspended coroutine and a bounded queue, and
+    heartbeat comments keep proxies from closing it. Serve under ASGI:
+    under WSGI every open stream would hold a worker thread.
+    """
+    try:
+        user = await aauthenticate(request, blog_id)
+    except (AuthenticationFailed, InvalidToken, TokenError):
+        user = None
+    if user is None or not user.is_active:
+        return JsonResponse({"detail": "Authentication credentials were not provided."}, status=401)
+
+    if not await Blog.objects.filter(pk=blog_id, is_active=True, is_published=True).aexists():
+        return JsonResponse({"detail": "Not found."}, status=404)
+
+    config = event_settings()
+    broker = get_broker()
+    channel = blog_channel(blog_id)
+    subscription = broker.subscribe(channel)
+    if subscription is None:
+        return JsonResponse({"detail": "Too many open streams, retry later."}, status=503)
+
+    async def stream():
+        try:
+            yield f"retry: {config['RETRY']}\n\n"
+            while True:
+                try:
+                    message = await asyncio.wait_for(subscription.queue.get(), config["HEARTBEAT"])
+                except asyncio.TimeoutError:
+                    yield ": ping\n\n"
+                    continue
+                if subscription.lagged:
+                    subscription.lagged = False
+                    yield format_event("resync", {"blog": blog_id})
+                yield format_event(message["event"], message["data"])
+        finally:
+            broker.unsubscribe(channel, subscription)
+
+    response = StreamingHttpResponse(stream(), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+    return response
+
+
+# ---------------------------
+# Async read views for the public API
+# ---------------------------
+# Drop-in replacements for the sync DRF views of the same name, routed when
+# ASYNC_PUBLIC_API is on. Querysets come from the same builders and every
+# relation a serializer reads is loaded up front, so serializing never
+# touches the database from the event loop.
+class AsyncAPIView(View):
+    """
+    Minimal async counterpart of a read-only DRF APIView: JWT
+    authentication, throttles, DRF exceptions rendered as JSON errors, JSON
+    responses. Sets ``request.query_params`` so DRF paginators work
+    unchanged.
+    """
+    authentication_required = True
+    throttle_classes = []
+
+    async def dispatch(self, request, *args, **kwargs):
+        request.query_params = request.GET
+        try:
+            if self.authentication_required:
+                user = await aauthenticate(request)
+                if user is None:
+                    raise NotAuthenticated()
+                request.user = user
+            await self.check_throttles(request)
+            return await super().dispatch(request, *args, **kwargs)
+        except APIException as exc:
+            response = self.render({"detail": exc.detail}, status=exc.status_code)
+            if getattr(exc, "wait", None) is not None:
+                response["Retry-After"] = str(math.ceil(exc.wait))
+            return response
+
+    async def check_throttles(self, request):
+        if not self.throttle_classes:
+            return
+        throttles = [throttle() for throttle in self.throttle_classes]
+        if get_store().blocking:
+            wait = await sync_to_async(check_throttles)(throttles, request, self)
+        else:
+            wait = check_throttles(throttles, request, self)
+        if wait is not None:
+            raise Throttled(wait)
+
+    def render(self, data, status=200):
+        return JsonResponse(data, status=status, encoder=JSONEncoder, safe=False)
+
+    def serializer_context(self):
+        return {"request": self.request, "view": self}
+
+
+class BlogPostListView(AsyncAPIView):
+    @aconditional_get(post_list_validators, private=True)
+    async def get(self, request, *args, **kwargs):
+        search_backend = None
+        if request.GET.get("search", "").strip():
+            search_backend = await aget_search_backend()
+        queryset = filter_public_blog_list(
+            public_blog_queryset(request.user).defer("content"), request.GET, search_backend
+        )
+
+        paginator = PublicBlogPagination()
+        page = await paginator.apaginate_queryset(queryset, request, self)
+        serializer = PublicBlogListSerializer(page, many=True, context=self.serializer_context())
+        return self.render(paginator.get_paginated_response(serializer.data).data)
+
+
+class BlogPostDetailView(AsyncAPIView):
+    throttle_classes = [IPThrottle]
+    throttle_scope = "post_views"
+
+    @aconditional_get(post_detail_validators, private=True)
+    async def get(self, request, slug, *args, **kwargs):
+        try:
+            blog = await public_blog_queryset(request.user).aget(slug=slug)
+        except Blog.DoesNotExist:
+            raise NotFound()
+
+        # Track view (unique per IP per blog), queued without blocking, unless the validators already did
+        if not getattr(request, "tracked_view", False):
+            request.tracked_view = True
+            await view_tracker.arecord(blog.pk, get_client_ip(request), request.user.pk)
+
+        serializer = PublicBlogSerializer(blog, context=self.serializer_context())
+        return self.render(serializer.data)
+
+
+class StatsCountView(AsyncAPIView):
+    authentication_required = False
+
+    async def get(self, request, *args, **kwargs):
+        stats = await aget_site_stats()
+        return self.render({
+            "blog_count": stats.blog_count,
+            "user_count": stats.user_count,
+            "new_content_count": stats.new_content_count,
+            "computed_at": stats.computed_at,
+        })
+
+
+class FeaturedBlogListView(AsyncAPIView):
+    authentication_required = False
+
+    @aconditional_get(version_validators(Blog, Category))
+    @acached_response(Blog, Category)
+    async def get(self, request, *args, **kwargs):
+        queryset = featured_blog_queryset()
+        paginator = AsyncPageNumberPagination()
+        page = await paginator.apaginate_queryset(queryset, request, self)
+        serializer = FeaturedBlogSerializer(page, many=True, context=self.serializer_context())
+        return self.render(paginator.get_paginated_response(serializer.data).data)
@@ -0,0 +1,319 @@
+import math
+import platform
+import subprocess
+import time
+from collections import namedtuple
+
+import django
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import connection, transaction
+from django.db.models import Count
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.utils import timezone
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+
+from accounts.authentication import principal_cache
+from accounts.serializers import PrincipalTokenObtainPairSerializer, UserSerializer
+from .ads import ad_index
+from .models import Blog, BlogDailyStats, BlogVisitor, Comment, Reaction, ViewCount
+from .serializers import BlogListSerializer, CommentSerializer, PublicBlogListSerializer, PublicBlogSerializer
+from .threads import attach_threads
+from .views import filter_public_blog_list, public_blog_queryset
+
+User = get_user_model()
+
+API = "/api/blog/"
+AUTH = "/api/auth/"
+
+# Objects per serializer benchmark, like a generous page
+SERIALIZER_PAGE = 20
+
+# Models whose row counts describe the dataset in every result file
+DATASET_MODELS = (User, Blog, Comment, Reaction, ViewCount, BlogVisitor, BlogDailyStats)
+
+BenchCase = namedtuple("BenchCase", ["name", "run"])
+
+
+class BenchmarkError(Exception):
+    pass
+
+
+def clear_caches():
+    """Empty every cache a request may be answered from, in this process and the shared ones"""
+    for alias in settings.CACHES:
+        caches[alias].clear()
+    principal_cache.clear()
+    ad_index.invalidate()
+
+
+def percentile(sorted_values, percent):
+    """Nearest-rank percentile of already sorted values"""
+    rank = max(math.ceil(percent / 100 * len(sorted_values)), 1)
+    return sorted_values[rank - 1]
+
+
+def summarize(samples_ns):
+    values = sorted(sample / 1e6 for sample in samples_ns)
+    return {
+        "p50_ms": round(percentile(values, 50), 4),
+        "p95_ms": round(percentile(values, 95), 4),
+        "p99_ms": round(percentile(values, 99), 4),
+        "mean_ms": round(sum(values) / len(values), 4),
+        "min_ms": round(values[0], 4),
+        "max_ms": round(values[-1], 4),
+    }
+
+
+def git_revision():
+    """(commit, uncommitted changes?) of the working tree, or (None, None) outside git"""
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True, cwd=settings.BASE_DIR
+        ).stdout.strip()
+        status = subprocess.run(
+            ["git", "status", "--porcelain", "--untracked-files=no"],
+            capture_output=True, text=True, check=True, cwd=settings.BASE_DIR,
+        ).stdout
+    except (OSError, subprocess.CalledProcessError):
+        return None, None
+    return commit, bool(status.strip())
+
+
+# ---------------------------
+# Fixture
+# ---------------------------
+class Fixture:
+    """
+    The users and objects every case requests, picked deterministically,
+    so the same data gives the same requests on every commit.
+    """
+
+    def __init__(self, search="cache"):
+        self.search = search
+        self.admin = User.objects.filter(role="ADMIN", is_active=True).order_by("pk").first()
+        self.author = User.objects.filter(role="AUTHOR", is_active=True).order_by("pk").first()
+        self.reader = User.objects.filter(role="USER", is_active=True).order_by("pk").first()
+        self.blog = (
+            Blog.objects.filter(is_active=True, is_published=True)
+            .order_by("-comments_count", "pk").first()
+        )
+        if None in (self.admin, self.author, self.reader, self.blog):
+            raise BenchmarkError(
+                "The database needs an admin, an author, a user and a published blog; "
+                "run `manage.py seed_bench` first."
+            )
+        # The comment with the most direct replies, for the replies endpoint
+        self.thread_id = (
+            Comment.objects.filter(blog=self.blog, parent__isnull=False)
+            .values("parent").annotate(replies=Count("pk")).order_by("-replies", "parent")
+            .values_list("parent", flat=True).first()
+        )
+
+    def client(self, user=None):
+        client = APIClient()
+        if user is not None:
+            token = PrincipalTokenObtainPairSerializer.get_token(user).access_token
+            client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+        return client
+
+    def request(self, user):
+        request = Request(APIRequestFactory().get("/"))
+        request.user = user
+        return request
+
+
+# ---------------------------
+# Cases
+# ---------------------------
+def _get(client, path):
+    def run():
+        return client.get(path)
+    return run
+
+
+def endpoint_cases(fixture):
+    """Read endpoints, then the writes (which change what later reads would see)"""
+    anonymous = fixture.client()
+    admin = fixture.client(fixture.admin)
+    author = fixture.client(fixture.author)
+    reader = fixture.client(fixture.reader)
+    blog = fixture.blog
+    search = fixture.search
+
+    cases = [
+        BenchCase("posts.list", _get(reader, f"{API}posts/")),
+        BenchCase("posts.list.page_5", _get(reader, f"{API}posts/?page=5")),
+        BenchCase("posts.list.cursor", _get(reader, f"{API}posts/?pagination=cursor")),
+        BenchCase("posts.list.category", _get(reader, f"{API}posts/?category_id={blog.category_id}")),
+        BenchCase("posts.search", _get(reader, f"{API}posts/?search={search}")),
+        BenchCase("posts.detail", _get(reader, f"{API}posts/{blog.slug}/")),
+        BenchCase("blogs.list", _get(admin, f"{API}blogs/")),
+        BenchCase("blogs.list.author", _get(author, f"{API}blogs/")),
+        BenchCase("blogs.search", _get(admin, f"{API}blogs/?search={search}")),
+        BenchCase("blogs.detail", _get(anonymous, f"{API}blogs/{blog.pk}/")),
+        BenchCase("blogs.featured", _get(anonymous, f"{API}blogs/featured/")),
+        BenchCase("blogs.daily_stats", _get(admin, f"{API}blogs/{blog.pk}/daily-stats/")),
+        BenchCase("comments.list", _get(anonymous, f"{API}blogs/{blog.pk}/comments/")),
+        BenchCase("reactions.list", _get(reader, f"{API}blogs/{blog.pk}/reactions/")),
+        BenchCase("categories.list", _get(anonymous, f"{API}categories/")),
+        BenchCase("tags.list", _get(anonymous, f"{API}tags/")),
+        BenchCase("stats", _get(anonymous, f"{API}stats/")),
+        BenchCase("notifications.list", _get(reader, f"{API}notifications/")),
+        BenchCase("notifications.unread_count", _get(reader, f"{API}notifications/unread-count/")),
+        BenchCase("users.list", _get(admin, f"{AUTH}users/")),
+        BenchCase("users.me", _get(reader, f"{AUTH}protected/")),
+    ]
+    if fixture.thread_id:
+        cases.append(BenchCase("comments.replies", _get(anonymous, f"{API}comments/{fixture.thread_id}/replies/")))
+
+    def toggle_reaction():
+        # Alternately adds and removes the reader's reaction
+        return reader.post(f"{API}blogs/{blog.pk}/reactions/", {"type": "love"})
+
+    def create_comment():
+        return reader.post(f"{API}blogs/{blog.pk}/comments/", {"blog": blog.pk, "content": "Benchmark comment"})
+
+    cases += [
+        BenchCase("reactions.toggle", toggle_reaction),
+        BenchCase("comments.create", create_comment),
+    ]
+    return cases
+
+
+def serializer_cases(fixture):
+    """Serializers alone: instances are loaded once, only to_representation is timed"""
+    request = fixture.request(fixture.reader)
+    context = {"request": request}
+
+    feed = list(filter_public_blog_list(
+        public_blog_queryset(fixture.reader).defer("content"), {}
+    )[:SERIALIZER_PAGE])
+    post = public_blog_queryset(fixture.reader).get(pk=fixture.blog.pk)
+    table = list(
+        Blog.objects.select_related("author", "category").prefetch_related("tags")
+        .defer("content").order_by("-id")[:SERIALIZER_PAGE]
+    )
+    comments = list(
+        Comment.objects.select_related("user")
+        .filter(blog=fixture.blog, parent__isnull=True)[:SERIALIZER_PAGE]
+    )
+    attach_threads(comments)
+    users = list(User.objects.order_by("-id")[:SERIALIZER_PAGE])
+
+    def serialize(serializer_class, instance, many=True):
+        def run():
+            return serializer_class(instance, many=many, context=context).data
+        return run
+
+    return [
+        BenchCase("serializer.PublicBlogListSerializer", serialize(PublicBlogListSerializer, feed)),
+        BenchCase("serializer.PublicBlogSerializer", serialize(PublicBlogSerializer, post, many=False)),
+        BenchCase("serializer.BlogListSerializer", serialize(BlogListSerializer, table)),
+        BenchCase("serializer.CommentSerializer", serialize(CommentSerializer, comments)),
+        BenchCase("serializer.UserSerializer", serialize(UserSerializer, users)),
+    ]
+
+
+# ---------------------------
+# Runner
+# ---------------------------
+def _check(name, result):
+    status = getattr(result, "status_code", None)
+    if status is not None and status >= 400:
+        raise BenchmarkError(f"{name} answered {status}: {getattr(result, 'data', '')}")
+    return status
+
+
+def run_case(case, iterations, warmup, cold):
+    """Timings of ``iterations`` runs after ``warmup`` untimed ones, and the most queries one run took"""
+    for _ in range(warmup):
+        _check(case.name, case.run())
+
+    samples = []
+    for _ in range(iterations):
+        if cold:
+            clear_caches()
+        started = time.perf_counter_ns()
+        result = case.run()
+        samples.append(time.perf_counter_ns() - started)
+        status = _check(case.name, result)
+
+    # Counted apart, since capturing slows every query down; twice, as
+    # toggles cost differently on alternate runs
+    queries = 0
+    for _ in range(2):
+        if cold:
+            clear_caches()
+        with CaptureQueriesContext(connection) as captured:
+            _check(case.name, case.run())
+        queries = max(queries, len(captured))
+
+    return {"status": status, "queries": queries, **summarize(samples)}
+
+
+def dataset_summary():
+    return {model._meta.label: model._default_manager.count() for model in DATASET_MODELS}
+
+
+def run_benchmarks(iterations=200, warmup=20, cold=False, select=None, search="cache", progress=None):
+    """
+    Time every case (or those whose name contains one of ``select``) and
+    return the result document. Everything runs in one transaction that is
+    rolled back, so writes never change the data the next run sees.
+    """
+    overrides = {
+        "ALLOWED_HOSTS": [*settings.ALLOWED_HOSTS, "testserver"],
+        "THROTTLING": {**getattr(settings, "THROTTLING", {}), "ENABLED": False},
+        # Views are written by the request itself, inside the rolled-back transaction
+        "VIEW_TRACKING": {**getattr(settings, "VIEW_TRACKING", {}), "BUFFERED": False},
+        # Every request is served by this process
+        "SINGLE_PROCESS": True,
+    }
+    commit, dirty = git_revision()
+    results = {}
+
+    with override_settings(**overrides), transaction.atomic():
+        fixture = Fixture(search)
+        cases = endpoint_cases(fixture) + serializer_cases(fixture)
+        if select:
+            cases = [case for case in cases if any(term in case.name for term in select)]
+
+        meta = {
+            "commit": commit,
+            "dirty": dirty,
+            "started_at": timezone.now().isoformat(),
+            "python": platform.python_version(),
+            "django": django.get_version(),
+            "database": connection.vendor,
+            "debug": settings.DEBUG,
+            "iterations": iterations,
+            "warmup": warmup,
+            "cold": cold,
+            "dataset": dataset_summary(),
+        }
+        for case in cases:
+            results[case.name] = run_case(case, iterations, warmup, cold)
+            if progress:
+                progress(case.name, results[case.name])
+        transaction.set_rollback(True)
+
+    clear_caches()
+    return {"meta": meta, "results": results}
+
+
+def compare(baseline, current):
+    """Rows of (case, baseline p50, current p50, p50 change %, baseline p95, current p95, queries before, after)"""
+    rows = []
+    for name, result in current["results"].items():
+        before = baseline.get("results", {}).get(name)
+        if before is None:
+            continue
+        change = (result["p50_ms"] - before["p50_ms"]) / before["p50_ms"] * 100 if before["p50_ms"] else 0.0
+        rows.append((
+            name, before["p50_ms"], result["p50_ms"], change,
+            before["p95_ms"], result["p95_ms"], before["queries"], result["queries"],
+        ))
+    return rows
@@ -0,0 +1,117 @@
+import atexit
+import logging
+import os
+import threading
+from collections import deque
+
+from django.db import close_old_connections
+
+
+logger = logging.getLogger(__name__)
+
+
+class BufferedWriter:
+    """
+    Bounded in-process queue drained by a background thread.
+
+    Items are written in batches by ``write_batch`` either every
+    ``flush_interval`` seconds or as soon as ``batch_size`` items are waiting,
+    and once more when the process exits. When the queue is full the
+    ``overflow`` policy decides what happens to new items:
+      - "drop":        discard the new item
+      - "drop_oldest": discard the oldest queued item to make room
+      - "sync":        flush the queue in the caller's thread first
+    """
+
+    OVERFLOW_POLICIES = ("drop", "drop_oldest", "sync")
+
+    def __init__(self, batch_size=500, flush_interval=2.0, max_queue=10000, overflow="drop"):
+        if overflow not in self.OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy: {overflow!r}")
+        self.batch_size = max(int(batch_size), 1)
+        self.flush_interval = float(flush_interval)
+        self.max_queue = max(int(max_queue), self.batch_size)
+        self.overflow = overflow
+
+        self.dropped = 0
+        self.written = 0
+        self._items = deque()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._pid = None
+        atexit.register(self.flush)
+
+    def write_batch(self, items):
+        raise NotImplementedError
+
+    # ---------------------------
+    # Producer side
+    # ---------------------------
+    def submit(self, item):
+        """Queue an item. Returns False if it was dropped by the overflow policy."""
+        self._ensure_worker()
+        if self.overflow == "sync" and self.pending() >= self.max_queue:
+            self.flush()
+
+        with self._lock:
+            if len(self._items) >= self.max_queue:
+                if self.overflow != "drop_oldest":
+                    self.dropped += 1
+                    return False
+                self._items.popleft()
+                self.dropped += 1
+            self._items.append(item)
+            pending = len(self._items)
+
+        if pending >= self.batch_size:
+            self._wakeup.set()
+        return True
+
+    def pending(self):
+        with self._lock:
+            return len(self._items)
+
+    # ---------------------------
+    # Consumer side
+    # ---------------------------
+    def flush(self):
+        """Write everything queued so far. Safe to call from any thread."""
+        with self._flush_lock:
+            with self._lock:
+                items, self._items = self._items, deque()
+
+            written = 0
+            while items:
+                batch = [items.popleft() for _ in range(min(self.batch_size, len(items)))]
+                try:
+                    self.write_batch(batch)
+                    written += len(batch)
+                except Exception:
+                    self.dropped += len(batch)
+                    logger.exception("%s failed to write %d item(s)", type(self).__name__, len(batch))
+            self.written += written
+            return written
+
+    def _ensure_worker(self):
+        # Threads do not survive fork(), so every worker process starts its own.
+        if self._thread is not None and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is not None and self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._thread = threading.Thread(
+                target=self._run, name=type(self).__name__, daemon=True
+            )
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            finally:
+                close_old_connections()
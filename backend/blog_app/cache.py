@@ -0,0 +1,188 @@
+import hashlib
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core import checks
+from django.core.cache import caches
+from django.http import HttpResponse
+from rest_framework.response import Response
+
+
+DEFAULTS = {
+    "ALIAS": "default",
+    "TIMEOUT": 300,
+}
+
+# Backends whose entries live in one process: an entry deleted by one worker
+# survives in every other
+PROCESS_LOCAL_BACKENDS = {
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+}
+
+
+def is_shared_cache(alias):
+    """Whether every process serving requests sees the same entries in cache ``alias``"""
+    return getattr(settings, "SINGLE_PROCESS", False) or settings.CACHES[alias]["BACKEND"] not in PROCESS_LOCAL_BACKENDS
+
+
+def cache_settings():
+    return {**DEFAULTS, **getattr(settings, "RESPONSE_CACHE", {})}
+
+
+def get_response_cache():
+    """
+    The cache of responses and model versions, or None when it is
+    process-local. Versions are how one worker tells the others that cached
+    responses, Last-Modified values and the ad index are stale; a version
+    bumped in one worker's own cache never reaches the others, so without a
+    shared cache nothing is cached and no versions are handed out.
+    """
+    alias = cache_settings()["ALIAS"]
+    return caches[alias] if is_shared_cache(alias) else None
+
+
+@checks.register(checks.Tags.caches)
+def check_response_cache(app_configs, **kwargs):
+    alias = cache_settings()["ALIAS"]
+    if is_shared_cache(alias):
+        return []
+    return [checks.Warning(
+        f"RESPONSE_CACHE['ALIAS'] = {alias!r} is a process-local cache, so response caching and "
+        "conditional GET are off.",
+        hint="Point RESPONSE_CACHE_URL at a shared cache (redis://... or filecache://...), "
+             "or set SINGLE_PROCESS when one process serves every request.",
+        id="blog_app.W001",
+    )]
+
+
+# ---------------------------
+# Per-model versions
+# ---------------------------
+# A model's version is the time (in microseconds) of its last change, so it
+# doubles as a Last-Modified value. Bumping it orphans every cached response
+# built from that model; orphans simply expire.
+def _version_key(label):
+    return f"respcache:version:{label}"
+
+
+def bump_version(model):
+    # Written even to a process-local cache: it is only read from a shared one
+    caches[cache_settings()["ALIAS"]].set(_version_key(model._meta.label_lower), time.time_ns() // 1000, None)
+
+
+def model_versions(models):
+    """
+    {label: version} for ``models``, starting a version for any not seen
+    yet; None when the response cache is process-local.
+    """
+    cache = get_response_cache()
+    if cache is None:
+        return None
+    keys = {_version_key(model._meta.label_lower): model._meta.label_lower for model in models}
+    found = cache.get_many(list(keys))
+
+    now = time.time_ns() // 1000
+    for key in keys.keys() - found.keys():
+        cache.add(key, now, None)
+        found[key] = cache.get(key, now)
+    return {label: found[key] for key, label in keys.items()}
+
+
+async def amodel_versions(models):
+    """model_versions() for async views"""
+    cache = get_response_cache()
+    if cache is None:
+        return None
+    keys = {_version_key(model._meta.label_lower): model._meta.label_lower for model in models}
+    found = await cache.aget_many(list(keys))
+
+    now = time.time_ns() // 1000
+    for key in keys.keys() - found.keys():
+        await cache.aadd(key, now, None)
+        found[key] = await cache.aget(key, now)
+    return {label: found[key] for key, label in keys.items()}
+
+
+# ---------------------------
+# Response caching
+# ---------------------------
+def response_cache_key(request, versions, kind="response"):
+    """
+    ``kind`` keeps differently stored entries apart: sync views cache
+    response data, async views rendered bodies, and both may share a cache.
+    """
+    params = sorted(request.query_params.lists())
+    raw = "|".join([
+        request.get_host(),
+        request.path,
+        repr(params),
+        repr(sorted(versions.items())),
+    ])
+    return f"respcache:{kind}:" + hashlib.sha256(raw.encode()).hexdigest()
+
+
+def cached_response(*models, timeout=None):
+    """
+    Cache a DRF GET handler's 200 responses under the request's host, path,
+    query params and the current version of every model in ``models``.
+    Only for responses that are the same for every user. Adds an
+    ``X-Cache: HIT/MISS`` header; without a shared cache the handler just runs.
+    """
+    def decorator(handler):
+        @wraps(handler)
+        def wrapper(view, request, *args, **kwargs):
+            cache = get_response_cache()
+            if cache is None:
+                return handler(view, request, *args, **kwargs)
+            key = response_cache_key(request, model_versions(models))
+
+            cached = cache.get(key)
+            if cached is not None:
+                response = Response(cached)
+                response["X-Cache"] = "HIT"
+                return response
+
+            response = handler(view, request, *args, **kwargs)
+            if response.status_code == 200:
+                ttl = timeout if timeout is not None else cache_settings()["TIMEOUT"]
+                cache.set(key, response.data, ttl)
+            response["X-Cache"] = "MISS"
+            return response
+
+        return wrapper
+
+    return decorator
+
+
+def acached_response(*models, timeout=None):
+    """
+    cached_response() for async views returning an HttpResponse: stores the
+    rendered body, so a hit skips serialization as well as the queries.
+    """
+    def decorator(handler):
+        @wraps(handler)
+        async def wrapper(view, request, *args, **kwargs):
+            cache = get_response_cache()
+            if cache is None:
+                return await handler(view, request, *args, **kwargs)
+            key = response_cache_key(request, await amodel_versions(models), kind="rendered")
+
+            cached = await cache.aget(key)
+            if cached is not None:
+                content, content_type = cached
+                response = HttpResponse(content, content_type=content_type)
+                response["X-Cache"] = "HIT"
+                return response
+
+            response = await handler(view, request, *args, **kwargs)
+            if response.status_code == 200:
+                ttl = timeout if timeout is not None else cache_settings()["TIMEOUT"]
+                await cache.aset(key, (response.content, response["Content-Type"]), ttl)
+            response["X-Cache"] = "MISS"
+            return response
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,114 @@
+import hashlib
+from datetime import datetime, timezone
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+
+from .cache import model_versions
+
+
+def make_etag(*parts):
+    """Strong ETag over ``parts`` (anything with a stable repr)"""
+    return quote_etag(hashlib.sha1(repr(parts).encode()).hexdigest())
+
+
+def version_datetime(version):
+    """A model version (microseconds since the epoch, see blog_app.cache) as a datetime"""
+    return datetime.fromtimestamp(version / 1_000_000, tz=timezone.utc)
+
+
+def latest(*values):
+    values = [value for value in values if value is not None]
+    return max(values) if values else None
+
+
+def version_validators(*models):
+    """
+    Validators for responses that are the same for everyone and only change
+    with ``models``: built from their cached versions, no query at all.
+    None without versions (a process-local response cache).
+    """
+    def validators(request, *args, **kwargs):
+        versions = model_versions(models)
+        if versions is None:
+            return None
+        etag = make_etag(
+            request.get_host(),
+            request.path,
+            sorted(request.query_params.lists()),
+            sorted(versions.items()),
+        )
+        return etag, latest(*map(version_datetime, versions.values()))
+
+    return validators
+
+
+# ---------------------------
+# Conditional GET
+# ---------------------------
+def _not_modified(request, etag, last_modified):
+    timestamp = int(last_modified.timestamp()) if last_modified else None
+    return get_conditional_response(request, etag=etag, last_modified=timestamp)
+
+
+def _set_validators(response, etag, last_modified, private):
+    response.headers.setdefault("ETag", etag)
+    if last_modified:
+        response.headers.setdefault("Last-Modified", http_date(last_modified.timestamp()))
+    # Always revalidate; a revalidation is cheap
+    patch_cache_control(response, no_cache=True, **{"private" if private else "public": True})
+    return response
+
+
+def conditional_get(validators, private=False):
+    """
+    Answer If-None-Match / If-Modified-Since for a DRF GET handler before
+    it runs, so an unchanged resource costs the validators' lookup instead of
+    a full queryset and serializer pass.
+
+    ``validators(request, *args, **kwargs)`` returns ``(etag, last_modified)``
+    or None to skip (the handler then runs as usual, e.g. for its 404).
+    ``private`` marks per-user responses.
+    """
+    def decorator(handler):
+        @wraps(handler)
+        def wrapper(view, request, *args, **kwargs):
+            found = validators(request, *args, **kwargs)
+            if found is None:
+                return handler(view, request, *args, **kwargs)
+
+            etag, last_modified = found
+            response = _not_modified(request, etag, last_modified)
+            if response is None:
+                response = handler(view, request, *args, **kwargs)
+                if response.status_code != 200:
+                    return response
+            return _set_validators(response, etag, last_modified, private)
+
+        return wrapper
+
+    return decorator
+
+
+def aconditional_get(validators, private=False):
+    """conditional_get() for async handlers; the validators run in one thread hop"""
+    def decorator(handler):
+        @wraps(handler)
+        async def wrapper(view, request, *args, **kwargs):
+            found = await sync_to_async(validators)(request, *args, **kwargs)
+            if found is None:
+                return await handler(view, request, *args, **kwargs)
+
+            etag, last_modified = found
+            response = _not_modified(request, etag, last_modified)
+            if response is None:
+                response = await handler(view, request, *args, **kwargs)
+                if response.status_code != 200:
+                    return response
+            return _set_validators(response, etag, last_modified, private)
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,114 @@
+from django.db.models import Case, Count, F, IntegerField, OuterRef, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce, Greatest, Now
+
+from .models import Blog, BlogDailyStats, Comment, Reaction, ViewCount
+from .rollup import rolled_up_to
+
+
+# Counter column on Blog for every reaction type
+REACTION_COUNTER_FIELDS = {
+    rtype: f"{rtype}_count" for rtype, _ in Reaction.REACTION_CHOICES
+}
+
+COUNTER_FIELDS = ["views_count", "comments_count", *REACTION_COUNTER_FIELDS.values()]
+
+
+# ---------------------------
+# Incremental updates
+# ---------------------------
+def apply_deltas(blog_id, deltas):
+    """
+    Add ``deltas`` ({counter_field: delta}) to a blog's counters with a
+    single UPDATE, which also stamps ``last_engaged_at``. F-expressions keep
+    concurrent writers from losing updates, and negative deltas are clamped
+    at zero so drift can never break a write.
+    """
+    updates = {}
+    for field, delta in deltas.items():
+        if not delta:
+            continue
+        expression = F(field) + delta
+        updates[field] = expression if delta > 0 else Greatest(expression, 0)
+
+    if updates:
+        Blog.objects.filter(pk=blog_id).update(last_engaged_at=Now(), **updates)
+
+
+def apply_bulk_deltas(field, deltas_by_blog):
+    """
+    Add per-blog deltas ({blog_id: delta}) to one counter column of many
+    blogs with a single UPDATE ... SET field = field + CASE ... END.
+    """
+    deltas_by_blog = {pk: delta for pk, delta in deltas_by_blog.items() if delta}
+    if not deltas_by_blog:
+        return
+
+    delta = Case(
+        *[When(pk=pk, then=Value(value)) for pk, value in deltas_by_blog.items()],
+        default=Value(0),
+        output_field=IntegerField(),
+    )
+    Blog.objects.filter(pk__in=deltas_by_blog).update(
+        last_engaged_at=Now(), **{field: Greatest(F(field) + delta, 0)}
+    )
+
+
+def reaction_deltas(old_type=None, new_type=None):
+    """Counter deltas for a reaction moving from ``old_type`` to ``new_type``"""
+    deltas = {}
+    if old_type:
+        deltas[REACTION_COUNTER_FIELDS[old_type]] = -1
+    if new_type:
+        field = REACTION_COUNTER_FIELDS[new_type]
+        deltas[field] = deltas.get(field, 0) + 1
+    return deltas
+
+
+# ---------------------------
+# Reconciliation
+# ---------------------------
+def _count_subquery(model, **filters):
+    rows = (
+        model.objects.filter(blog=OuterRef("pk"), **filters)
+        .order_by()
+        .values("blog")
+        .annotate(total=Count("pk"))
+        .values("total")
+    )
+    return Coalesce(Subquery(rows), 0)
+
+
+def _sum_subquery(model, field):
+    rows = (
+        model.objects.filter(blog=OuterRef("pk"))
+        .order_by()
+        .values("blog")
+        .annotate(total=Sum(field))
+        .values("total")
+    )
+    return Coalesce(Subquery(rows), 0)
+
+
+def counter_expressions():
+    """Correlated subqueries that recompute every counter column"""
+    expressions = {
+        # Rolled-up views (raw rows may be pruned) plus the raw rows since
+        "views_count": (
+            _sum_subquery(BlogDailyStats, "views")
+            + _count_subquery(ViewCount, pk__gt=rolled_up_to(ViewCount))
+        ),
+        "comments_count": _count_subquery(Comment),
+    }
+    for rtype, field in REACTION_COUNTER_FIELDS.items():
+        expressions[field] = _count_subquery(Reaction, type=rtype)
+    return expressions
+
+
+def rebuild_counters(queryset=None):
+    """
+    Recompute the counters of every blog in ``queryset`` from the source
+    tables with one UPDATE statement. Returns the number of blogs updated.
+    """
+    if queryset is None:
+        queryset = Blog.objects.all()
+    return queryset.order_by().update(last_engaged_at=Now(), **counter_expressions())
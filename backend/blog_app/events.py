@@ -0,0 +1,205 @@
+import asyncio
+import json
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.core import signing
+from django.core.exceptions import ImproperlyConfigured
+from django.db import transaction
+
+
+DEFAULTS = {
+    "BROKER": "local",          # local | redis
+    "REDIS_URL": "redis://localhost:6379/0",
+    "CHANNEL_PREFIX": "blog-events:",
+    "HEARTBEAT": 15.0,          # seconds between keep-alive comments
+    "QUEUE_SIZE": 100,          # pending events per connection
+    "MAX_CONNECTIONS": 10000,   # open streams per process
+    "RETRY": 5000,              # client reconnect delay (ms)
+    "TICKET_MAX_AGE": 60,       # seconds a stream ticket can open its stream
+}
+
+TICKET_SALT = "blog_app.events.stream-ticket"
+
+
+def event_settings():
+    return {**DEFAULTS, **getattr(settings, "EVENT_STREAM", {})}
+
+
+def blog_channel(blog_id):
+    return f"blog:{blog_id}"
+
+
+# ---------------------------
+# Stream tickets
+# ---------------------------
+def issue_stream_ticket(user_id, blog_id):
+    """
+    A signed ticket that opens ``blog_id``'s stream as ``user_id`` for
+    TICKET_MAX_AGE seconds. EventSource cannot send an Authorization header,
+    so the stream is authenticated from its URL, which access logs keep: a
+    ticket there is good for one blog's stream for a minute, where an access
+    token would be good for the whole API until it expires.
+    """
+    return signing.dumps({"user": user_id, "blog": blog_id}, salt=TICKET_SALT)
+
+
+def read_stream_ticket(ticket, blog_id):
+    """The user id of ``ticket`` if it is genuine, unexpired and for ``blog_id``, else None"""
+    try:
+        payload = signing.loads(ticket, salt=TICKET_SALT, max_age=event_settings()["TICKET_MAX_AGE"])
+    except signing.BadSignature:
+        return None
+    return payload["user"] if payload["blog"] == blog_id else None
+
+
+# ---------------------------
+# Subscriptions
+# ---------------------------
+class Subscription:
+    """
+    One open stream: a bounded queue that lives on the stream's event loop.
+    A slow client never blocks publishers; when its queue is full the oldest
+    event is dropped and the stream is flagged ``lagged`` so it can tell the
+    client to resync.
+    """
+
+    def __init__(self, loop, maxsize):
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize)
+        self.lagged = False
+
+    def put(self, message):
+        # Runs on self.loop
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.lagged = True
+        self.queue.put_nowait(message)
+
+
+# ---------------------------
+# Brokers
+# ---------------------------
+class LocalBroker:
+    """
+    In-process pub/sub. Publishers may run on any thread (sync views do);
+    delivery is handed to each subscriber's event loop. Only reaches streams
+    served by the same process.
+    """
+
+    def __init__(self, queue_size=100, max_connections=10000):
+        self.queue_size = queue_size
+        self.max_connections = max_connections
+        self._lock = threading.Lock()
+        self._subscribers = defaultdict(set)
+        self._count = 0
+
+    def subscribe(self, channel):
+        """New Subscription for ``channel``, or None at MAX_CONNECTIONS; call from the stream's loop"""
+        subscription = Subscription(asyncio.get_running_loop(), self.queue_size)
+        with self._lock:
+            if self._count >= self.max_connections:
+                return None
+            self._subscribers[channel].add(subscription)
+            self._count += 1
+        return subscription
+
+    def unsubscribe(self, channel, subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(channel)
+            if subscribers and subscription in subscribers:
+                subscribers.discard(subscription)
+                self._count -= 1
+                if not subscribers:
+                    del self._subscribers[channel]
+
+    def publish(self, channel, message):
+        self.deliver(channel, message)
+
+    def deliver(self, channel, message):
+        with self._lock:
+            subscribers = list(self._subscribers.get(channel, ()))
+        for subscription in subscribers:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.put, message)
+            except RuntimeError:
+                # Loop already closed; the stream's cleanup will unsubscribe it
+                pass
+
+
+class RedisBroker(LocalBroker):
+    """
+    Redis pub/sub for multi-worker deployments: every process publishes to
+    Redis, and a process with open streams runs one listener thread that
+    hands incoming messages to its local subscribers.
+    """
+
+    def __init__(self, url, prefix, **kwargs):
+        super().__init__(**kwargs)
+        try:
+            import redis
+        except ImportError:
+            raise ImproperlyConfigured("EVENT_STREAM['BROKER'] = 'redis' requires the redis package.")
+        self.prefix = prefix
+        self.client = redis.Redis.from_url(url)
+        self._listener = None
+        self._listener_lock = threading.Lock()
+
+    def subscribe(self, channel):
+        self._start_listener()
+        return super().subscribe(channel)
+
+    def publish(self, channel, message):
+        self.client.publish(self.prefix + channel, json.dumps(message))
+
+    def _start_listener(self):
+        with self._listener_lock:
+            if self._listener is not None and self._listener.is_alive():
+                return
+            pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+            pubsub.psubscribe(**{f"{self.prefix}*": self._on_message})
+            self._listener = pubsub.run_in_thread(sleep_time=1.0, daemon=True)
+
+    def _on_message(self, message):
+        channel = message["channel"]
+        if isinstance(channel, bytes):
+            channel = channel.decode()
+        self.deliver(channel[len(self.prefix):], json.loads(message["data"]))
+
+
+def _build_broker():
+    config = event_settings()
+    options = {"queue_size": config["QUEUE_SIZE"], "max_connections": config["MAX_CONNECTIONS"]}
+    if config["BROKER"] == "redis":
+        return RedisBroker(config["REDIS_URL"], config["CHANNEL_PREFIX"], **options)
+    if config["BROKER"] == "local":
+        return LocalBroker(**options)
+    raise ImproperlyConfigured(f"Unknown EVENT_STREAM['BROKER']: {config['BROKER']!r}")
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                _broker = _build_broker()
+    return _broker
+
+
+# ---------------------------
+# Publishing
+# ---------------------------
+def publish_blog_event(blog_id, event, data):
+    """Push ``event`` to every stream of a blog once the current transaction commits"""
+    message = {"event": event, "data": data}
+    transaction.on_commit(lambda: get_broker().publish(blog_channel(blog_id), message))
+
+
+def format_event(event, data):
+    """One SSE frame"""
+    return f"event: {event}\ndata: {json.dumps(data, separators=(',', ':'), default=str)}\n\n"
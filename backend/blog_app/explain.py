@@ -0,0 +1,201 @@
+import re
+from collections import namedtuple
+
+from django.apps import apps
+from django.contrib.auth.models import AnonymousUser
+from django.db import connection
+from django.http import Http404
+from django.urls import URLPattern, URLResolver, get_resolver
+from rest_framework.exceptions import APIException
+from rest_framework.mixins import RetrieveModelMixin
+from rest_framework.settings import api_settings
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from .benchmarks import Fixture
+from .models import Blog
+
+# A problem in a query plan: kind is "scan" (reads a whole table) or "sort"
+# (orders rows in a temporary structure instead of reading an index in order)
+Finding = namedtuple("Finding", ["kind", "table", "detail"])
+
+QueryPlan = namedtuple("QueryPlan", ["route", "variant", "user", "sql", "plan", "findings"])
+
+SQLITE_SCAN = re.compile(r"\bSCAN (\w+)$")
+SQLITE_SORT = re.compile(r"\bUSE TEMP B-TREE FOR (.+)$")
+POSTGRES_SCAN = re.compile(r"\bSeq Scan on (\w+)")
+POSTGRES_SORT = re.compile(r"^\s*(?:->\s+)?((?:Incremental )?Sort)\s+\(")
+
+
+class AdvisorError(Exception):
+    pass
+
+
+# ---------------------------
+# Plans
+# ---------------------------
+def plan_findings(vendor, plan):
+    """Sequential scans and sorts in the text of an EXPLAIN on ``vendor``"""
+    findings = []
+    lines = plan.splitlines()
+    for number, line in enumerate(lines):
+        if vendor == "sqlite":
+            # "SCAN table" without "USING INDEX" reads every row
+            if match := SQLITE_SCAN.search(line):
+                findings.append(Finding("scan", match[1], line.strip()))
+            elif match := SQLITE_SORT.search(line):
+                findings.append(Finding("sort", None, match[0]))
+        elif vendor == "postgresql":
+            if match := POSTGRES_SCAN.search(line):
+                findings.append(Finding("scan", match[1], line.strip()))
+            elif match := POSTGRES_SORT.search(line):
+                key = lines[number + 1].strip() if number + 1 < len(lines) else ""
+                findings.append(Finding("sort", None, f"{match[1]} {key}".strip()))
+        else:
+            raise AdvisorError(f"EXPLAIN is only interpreted on SQLite and PostgreSQL, not {vendor}.")
+    return findings
+
+
+def table_sizes():
+    """Row count of every table a model (or many-to-many field) owns"""
+    return {
+        model._meta.db_table: model._default_manager.count()
+        for model in apps.get_models(include_auto_created=True)
+        if model._meta.managed and not model._meta.proxy
+    }
+
+
+# ---------------------------
+# Views
+# ---------------------------
+def api_patterns(resolver=None, prefix=""):
+    """(full route, URLPattern) of every REST framework view in the URLconf that answers GET"""
+    resolver = resolver or get_resolver()
+    for pattern in resolver.url_patterns:
+        route = prefix + str(pattern.pattern)
+        if isinstance(pattern, URLResolver):
+            yield from api_patterns(pattern, route)
+        elif isinstance(pattern, URLPattern) and getattr(pattern.callback, "cls", None):
+            actions = getattr(pattern.callback, "actions", None)
+            if ("get" in actions) if actions else hasattr(pattern.callback.cls, "get"):
+                yield route, pattern
+
+
+class ViewQueries:
+    """
+    The list and lookup querysets every view builds for representative
+    requests: each user role, with no parameters and with each of the
+    parameters views read; shapes already seen (the same SQL) are skipped.
+    """
+
+    def __init__(self, search="cache"):
+        self.fixture = Fixture(search)
+        blog = self.fixture.blog
+        self.users = {
+            "anonymous": AnonymousUser(),
+            "reader": self.fixture.reader,
+            "author": self.fixture.author,
+            "admin": self.fixture.admin,
+        }
+        self.params = {
+            "": {},
+            "category": {"category_id": str(blog.category_id or "")},
+            "search": {"search": search},
+            "role": {"role": "author"},
+            "unread": {"unread": "1"},
+        }
+        self.factory = APIRequestFactory()
+
+    def kwargs(self, pattern, model=None):
+        """URL kwargs naming the fixture's blog, or a real row of ``model`` once it is known"""
+        kwargs = {}
+        for name in pattern.pattern.converters:
+            if name == "slug":
+                kwargs[name] = self.fixture.blog.slug
+            elif "blog" in name or model in (None, Blog):
+                kwargs[name] = self.fixture.blog.pk
+            else:
+                kwargs[name] = model._default_manager.order_by("pk").values_list("pk", flat=True).first() or 0
+        return kwargs
+
+    def view(self, pattern, kwargs, user, params):
+        callback = pattern.callback
+        view = callback.cls(**callback.initkwargs)
+        if getattr(callback, "actions", None):
+            view.action_map = callback.actions
+            view.action = callback.actions.get("get")
+        request = self.factory.get("/", params)
+        force_authenticate(request, user=user)
+        view.setup(request, **kwargs)
+        view.request = view.initialize_request(request, **kwargs)
+        view.format_kwarg = None
+        return view
+
+    def queryset(self, pattern, user, params):
+        """The queryset a GET would run, limited to a page or to the looked-up object; None if there is none"""
+        if not hasattr(pattern.callback.cls, "get_queryset"):
+            return None
+        kwargs = self.kwargs(pattern)
+        try:
+            queryset = self.view(pattern, kwargs, user, params).get_queryset()
+            # Look up real rows of the view's own model
+            kwargs = self.kwargs(pattern, queryset.model)
+            view = self.view(pattern, kwargs, user, params)
+            queryset = view.filter_queryset(view.get_queryset())
+        except (APIException, Http404, AssertionError, AttributeError, TypeError, ValueError, KeyError):
+            # No queryset, or one that needs a user, permission or parameters this request lacks
+            return None
+
+        lookup = view.lookup_url_kwarg or view.lookup_field
+        if isinstance(view, RetrieveModelMixin) and lookup in kwargs:
+            return queryset.filter(**{view.lookup_field: kwargs[lookup]})
+        paginator = view.paginator
+        # Keyset and cursor paginators impose their own ordering
+        ordering = getattr(paginator, "ordering", None)
+        if ordering:
+            queryset = queryset.order_by(*([ordering] if isinstance(ordering, str) else ordering))
+        page_size = getattr(paginator, "page_size", None) or api_settings.PAGE_SIZE
+        if paginator is not None and page_size and not queryset.query.is_sliced:
+            return queryset[:page_size]
+        return queryset
+
+    def __iter__(self):
+        """(route, variant, user label, queryset) of every distinct query shape"""
+        seen = set()
+        for route, pattern in api_patterns():
+            for variant, params in self.params.items():
+                for label, user in self.users.items():
+                    queryset = self.queryset(pattern, user, params)
+                    if queryset is None:
+                        continue
+                    sql = queryset.query.sql_with_params()[0]
+                    if sql in seen:
+                        continue
+                    seen.add(sql)
+                    yield route, variant, label, queryset
+
+
+def advise(search="cache", min_rows=1000):
+    """
+    EXPLAIN every distinct query the API views build and return a
+    QueryPlan for each. Scans of tables with fewer than ``min_rows`` rows
+    are not findings: reading a small table whole is what a planner should do.
+    """
+    sizes = table_sizes()
+    plans = []
+    for route, variant, user, queryset in ViewQueries(search):
+        plan = queryset.explain()
+        findings = plan_findings(connection.vendor, plan)
+        # SQLite also says SCAN when it reads a table in rowid order; for a
+        # page with nothing to sort that stops after ``LIMIT`` rows
+        in_order = (
+            connection.vendor == "sqlite" and queryset.query.is_sliced
+            and not any(finding.kind == "sort" for finding in findings)
+        )
+        findings = [
+            finding for finding in findings
+            if finding.kind == "sort"
+            or (sizes.get(finding.table, min_rows) >= min_rows and not in_order)
+        ]
+        sql = str(queryset.query)
+        plans.append(QueryPlan(route, variant, user, sql, plan, findings))
+    return plans
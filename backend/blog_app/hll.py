@@ -0,0 +1,77 @@
+import hashlib
+import math
+import zlib
+
+# 2 ** -rank for every rank a 64-bit hash can produce
+_INVERSE_POWERS = [2.0 ** -rank for rank in range(65)]
+
+
+class HyperLogLog:
+    """
+    Distinct-count sketch in ``2 ** precision`` one-byte registers, with a
+    standard error of about ``1.04 / sqrt(2 ** precision)`` (1.6% at the
+    default precision of 12, in 4 KiB). Sketches of the same precision merge
+    into the sketch of the union, whatever worker or day built them.
+    """
+
+    def __init__(self, precision=12, registers=None):
+        if not 4 <= precision <= 16:
+            raise ValueError("precision must be between 4 and 16")
+        self.precision = precision
+        self.size = 1 << precision
+        self.registers = bytearray(self.size) if registers is None else bytearray(registers)
+        if len(self.registers) != self.size:
+            raise ValueError(f"a precision {precision} sketch has {self.size} registers")
+
+    @property
+    def error(self):
+        """Relative standard error of count()"""
+        return 1.04 / math.sqrt(self.size)
+
+    @staticmethod
+    def hash(value):
+        return int.from_bytes(hashlib.blake2b(str(value).encode(), digest_size=8).digest(), "big")
+
+    def add(self, value):
+        bits = 64 - self.precision
+        hashed = self.hash(value)
+        index = hashed >> bits
+        # Position of the first 1 bit in what is left of the hash
+        rank = bits - (hashed & ((1 << bits) - 1)).bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def update(self, values):
+        for value in values:
+            self.add(value)
+        return self
+
+    def merge(self, other):
+        """Fold ``other`` into this sketch, which then counts the union of both"""
+        if other.precision != self.precision:
+            raise ValueError("only sketches of the same precision merge")
+        self.registers = bytearray(map(max, self.registers, other.registers))
+        return self
+
+    def count(self):
+        size = self.size
+        if size >= 128:
+            alpha = 0.7213 / (1 + 1.079 / size)
+        else:
+            alpha = {16: 0.673, 32: 0.697, 64: 0.709}[size]
+        estimate = alpha * size * size / sum(_INVERSE_POWERS[rank] for rank in self.registers)
+
+        # Linear counting is more accurate while many registers are empty
+        zeros = self.registers.count(0)
+        if zeros and estimate <= 2.5 * size:
+            estimate = size * math.log(size / zeros)
+        return round(estimate)
+
+    def to_bytes(self):
+        """Precision byte plus the compressed registers (mostly empty for small audiences)"""
+        return bytes([self.precision]) + zlib.compress(bytes(self.registers))
+
+    @classmethod
+    def from_bytes(cls, data):
+        data = bytes(data)
+        return cls(data[0], zlib.decompress(data[1:]))
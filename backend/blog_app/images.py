@@ -0,0 +1,261 @@
+import logging
+import os
+import posixpath
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import close_old_connections, transaction
+from django.db.models import Q
+from django.db.models.functions import Now
+from PIL import Image, ImageOps, features
+from rest_framework import serializers
+
+from accounts.authentication import principal_cache
+
+from .ads import ad_index
+from .cache import bump_version
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    "BACKGROUND": True,         # build variants in the worker pool after commit
+    "WORKERS": 2,
+    "FORMATS": ["avif", "webp"],  # modern formats, skipped if Pillow lacks the codec
+    "QUALITY": 80,
+    "WIDTHS": {
+        "blog": [320, 640, 960, 1280],
+        "avatar": [64, 128, 256],
+        "advertisement": [320, 640, 1280],
+    },
+}
+
+
+def image_settings():
+    config = {**DEFAULTS, **getattr(settings, "IMAGE_VARIANTS", {})}
+    config["WIDTHS"] = {**DEFAULTS["WIDTHS"], **config["WIDTHS"]}
+    return config
+
+
+# model label: (image field, variants field, WIDTHS key)
+IMAGE_FIELDS = {
+    "blog_app.blog": ("image", "image_variants", "blog"),
+    "blog_app.advertisement": ("image", "image_variants", "advertisement"),
+    settings.AUTH_USER_MODEL.lower(): ("avatar", "avatar_variants", "avatar"),
+}
+
+
+def image_fields(model):
+    return IMAGE_FIELDS[model._meta.label_lower]
+
+
+def image_models():
+    return [apps.get_model(label) for label in IMAGE_FIELDS]
+
+
+# ---------------------------
+# Rendering
+# ---------------------------
+EXTENSIONS = {"avif": "avif", "webp": "webp", "jpeg": "jpg", "png": "png"}
+
+
+def supported_formats(formats):
+    return [fmt for fmt in formats if features.check(fmt)]
+
+
+def variant_name(name, width, fmt):
+    """``blog_images/cat.jpg`` -> ``blog_images/cat.640w.webp``"""
+    root, _ = posixpath.splitext(name)
+    return f"{root}.{width}w.{EXTENSIONS[fmt]}"
+
+
+def variant_widths(width, widths):
+    """Configured widths below the original, plus the original width when it is smaller than the largest"""
+    below = sorted(w for w in widths if w < width)
+    if widths and width <= max(widths) and width not in below:
+        below.append(width)
+    return below
+
+
+def _prepare(source):
+    """Upright, metadata-free copy of the first frame in an encodable mode"""
+    image = ImageOps.exif_transpose(source)
+    has_alpha = image.mode in ("RGBA", "LA", "PA") or "transparency" in image.info
+    image = image.convert("RGBA" if has_alpha else "RGB")
+    return image, has_alpha
+
+
+def _encode(image, fmt, quality):
+    buffer = BytesIO()
+    options = {"quality": quality} if fmt != "png" else {"optimize": True}
+    # No exif/xmp/icc passed, so nothing from the upload survives
+    image.save(buffer, format=fmt.upper(), **options)
+    return buffer.getvalue()
+
+
+def render_variants(storage, name, widths, config=None):
+    """
+    Resized, re-encoded copies of an uploaded image, saved next to it with
+    deterministic names. Returns the variants record stored on the model::
+
+        {"source": name, "width": w, "height": h,
+         "formats": {fmt: {width: name, ...}, ...}}
+
+    Every width gets each supported modern format plus a JPEG (PNG when the
+    image has transparency) fallback.
+    """
+    config = config or image_settings()
+    with storage.open(name, "rb") as handle, Image.open(handle) as source:
+        source.seek(0)
+        image, has_alpha = _prepare(source)
+
+    formats = [*supported_formats(config["FORMATS"]), "png" if has_alpha else "jpeg"]
+    record = {"source": name, "width": image.width, "height": image.height, "formats": {}}
+    for width in variant_widths(image.width, widths):
+        height = max(round(image.height * width / image.width), 1)
+        resized = image if width == image.width else image.resize((width, height), Image.Resampling.LANCZOS)
+        for fmt in formats:
+            target = variant_name(name, width, fmt)
+            if storage.exists(target):
+                storage.delete(target)
+            saved = storage.save(target, ContentFile(_encode(resized, fmt, config["QUALITY"])))
+            record["formats"].setdefault(fmt, {})[str(width)] = saved
+    return record
+
+
+def variant_files(record):
+    return {name for names in (record or {}).get("formats", {}).values() for name in names.values()}
+
+
+def delete_variants(storage, names):
+    for name in names:
+        try:
+            storage.delete(name)
+        except OSError:
+            logger.warning("Could not delete image variant %s", name)
+
+
+# ---------------------------
+# Processing
+# ---------------------------
+def process_image(model, pk, name):
+    """
+    Build the variants of ``name`` for one row and store them, unless the
+    row's image changed in the meantime. Variants of the image it replaced
+    are deleted. Clears the record when the image was removed.
+    """
+    image_field, variants_field, size = image_fields(model)
+    storage = model._meta.get_field(image_field).storage
+    current = Q(**{image_field: name}) if name else Q(**{image_field: ""}) | Q(**{f"{image_field}__isnull": True})
+    rows = model._default_manager.filter(current, pk=pk)
+    old_record = rows.values_list(variants_field, flat=True).first()
+    if old_record is None and not rows.exists():
+        return None
+    old_files = variant_files(old_record)
+
+    record = render_variants(storage, name, image_settings()["WIDTHS"][size]) if name else None
+
+    updates = {variants_field: record}
+    if any(field.name == "updated_at" for field in model._meta.concrete_fields):
+        updates["updated_at"] = Now()
+    if not rows.update(**updates):
+        # Replaced while rendering; its own job will build the current image
+        delete_variants(storage, variant_files(record))
+        return None
+    delete_variants(storage, old_files - variant_files(record))
+    # update() sends no post_save, so what the signals would forget is forgotten here
+    bump_version(model)
+    if model._meta.label == settings.AUTH_USER_MODEL:
+        principal_cache.invalidate(pk)
+    elif model._meta.label == "blog_app.Advertisement":
+        ad_index.invalidate()
+    return record
+
+
+class ImageProcessor:
+    """
+    Worker pool for variant builds, so uploads return without waiting on
+    Pillow. Each pool thread uses its own database connection.
+    """
+
+    def __init__(self, workers=2):
+        self.workers = max(int(workers), 1)
+        self._executor = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def _pool(self):
+        # Threads do not survive fork(), so every worker process starts its own.
+        with self._lock:
+            if self._executor is None or self._pid != os.getpid():
+                self._pid = os.getpid()
+                self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix="ImageProcessor")
+            return self._executor
+
+    def _run(self, model, pk, name):
+        try:
+            return process_image(model, pk, name)
+        except Exception:
+            logger.exception("Building image variants of %s %s failed", model._meta.label, pk)
+        finally:
+            close_old_connections()
+
+    def submit(self, model, pk, name):
+        """Build variants once the current transaction commits"""
+        if not image_settings()["BACKGROUND"]:
+            transaction.on_commit(lambda: self._run(model, pk, name))
+            return
+        transaction.on_commit(lambda: self._pool().submit(self._run, model, pk, name))
+
+    def shutdown(self, wait=True):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=wait)
+                self._executor = None
+
+
+image_processor = ImageProcessor(image_settings()["WORKERS"])
+
+
+# ---------------------------
+# Serialization
+# ---------------------------
+def srcset(record, name, request=None, storage=None):
+    """
+    {format: "url 320w, url 640w"} for ``<source srcset>``, best format
+    first. None until variants of the current image exist.
+    """
+    if not record or not name or record.get("source") != name:
+        return None
+    result = {}
+    for fmt, names in record["formats"].items():
+        entries = []
+        for width, variant in sorted(names.items(), key=lambda item: int(item[0])):
+            url = storage.url(variant)
+            if request is not None:
+                url = request.build_absolute_uri(url)
+            entries.append(f"{url} {width}w")
+        result[fmt] = ", ".join(entries)
+    return result
+
+
+class SrcsetField(serializers.Field):
+    """Read-only srcset map of an image field's variants"""
+
+    def __init__(self, image_field, variants_field, **kwargs):
+        self.image_field = image_field
+        self.variants_field = variants_field
+        super().__init__(source="*", read_only=True, **kwargs)
+
+    def to_representation(self, instance):
+        fieldfile = getattr(instance, self.image_field)
+        return srcset(
+            getattr(instance, self.variants_field),
+            fieldfile.name,
+            self.context.get("request"),
+            fieldfile.storage,
+        )
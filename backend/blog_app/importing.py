@@ -0,0 +1,288 @@
+import csv
+import json
+import time
+from itertools import islice
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from django.utils.text import slugify
+
+from .cache import bump_version
+from .models import Blog, Category, Tag
+from .search import get_search_backend
+from .slugs import unique_slugs
+from .stats import refresh_site_stats
+
+User = get_user_model()
+
+TRUE_VALUES = {"1", "true", "yes", "y", "on"}
+
+# Room left on generated slugs for a "-<n>" suffix
+SLUG_SUFFIX_ROOM = 8
+
+
+class RecordError(ValueError):
+    pass
+
+
+# ---------------------------
+# Readers
+# ---------------------------
+def read_ndjson(stream):
+    """(line number, record) for every non-blank line; None for invalid JSON"""
+    for line_no, line in enumerate(stream, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield line_no, json.loads(line)
+        except json.JSONDecodeError:
+            yield line_no, None
+
+
+def read_csv(stream):
+    """(line number, row) for every CSV row; tags are comma-separated"""
+    reader = csv.DictReader(stream)
+    for row in reader:
+        yield reader.line_num, row
+
+
+# ---------------------------
+# Records
+# ---------------------------
+def _text(record, name, max_length=None, required=False):
+    value = record.get(name)
+    value = "" if value is None else str(value).strip()
+    if required and not value:
+        raise RecordError(f"{name} is required")
+    if max_length and len(value) > max_length:
+        raise RecordError(f"{name} is longer than {max_length} characters")
+    return value
+
+
+def _flag(record, name):
+    value = record.get(name)
+    if isinstance(value, bool):
+        return value
+    return str(value or "").strip().lower() in TRUE_VALUES
+
+
+def normalize_record(record):
+    """Validate one input record into the fields the importer writes"""
+    if not isinstance(record, dict):
+        raise RecordError("not a JSON object")
+
+    tags = record.get("tags") or []
+    if isinstance(tags, str):
+        tags = tags.split(",")
+    tag_max_length = Tag._meta.get_field("name").max_length
+    tags = list(dict.fromkeys(str(tag).strip() for tag in tags if str(tag).strip()))
+    if any(len(tag) > tag_max_length for tag in tags):
+        raise RecordError(f"tag is longer than {tag_max_length} characters")
+
+    published_at = None
+    if record.get("published_at"):
+        published_at = parse_datetime(str(record["published_at"]))
+        if published_at is None:
+            raise RecordError("published_at is not a valid datetime")
+        if timezone.is_naive(published_at):
+            published_at = timezone.make_aware(published_at)
+
+    return {
+        "title": _text(record, "title", Blog._meta.get_field("title").max_length, required=True),
+        "content": _text(record, "content", required=True),
+        "slug": _text(record, "slug"),
+        "author": _text(record, "author"),
+        "category": _text(record, "category", Category._meta.get_field("name").max_length),
+        "tags": tags,
+        "is_published": _flag(record, "is_published"),
+        "is_featured": _flag(record, "is_featured"),
+        "published_at": published_at,
+    }
+
+
+def upsert_named(model, names):
+    """
+    {name: id} for Category/Tag ``names``: one lookup, then the missing ones
+    are bulk created with unique slugs and read back. Rows created
+    concurrently by someone else are simply picked up.
+    """
+    names = set(names)
+    if not names:
+        return {}
+
+    ids = dict(model.objects.filter(name__in=names).values_list("name", "pk"))
+    missing = sorted(names - ids.keys())
+    if missing:
+        max_length = model._meta.get_field("slug").max_length - SLUG_SUFFIX_ROOM
+        bases = [slugify(name)[:max_length] or model._meta.model_name for name in missing]
+        slugs = unique_slugs(model.objects.all(), bases)
+        model.objects.bulk_create(
+            [model(name=name, slug=slug) for name, slug in zip(missing, slugs)],
+            ignore_conflicts=True,
+        )
+        ids.update(model.objects.filter(name__in=missing).values_list("name", "pk"))
+    return ids
+
+
+# ---------------------------
+# Importer
+# ---------------------------
+class BlogImporter:
+    """
+    Import blog records in transactional chunks. Per chunk, whatever its
+    size: one query for taken titles, one for authors, three each for
+    categories and tags, a prefix query for slugs, then bulk INSERTs for
+    the blogs and their tag rows and one search index statement.
+
+    ``bulk_create`` skips signals, so site stats and response cache versions
+    are refreshed once at the end; new blogs start with zero counters.
+    """
+    MAX_ERRORS_KEPT = 50
+
+    def __init__(self, default_author=None, batch_size=1000):
+        self.default_author = default_author
+        self.batch_size = max(batch_size, 1)
+        self.author_ids = {}
+        self.created = 0
+        self.skipped = 0
+        self.errors = []
+
+    def fail(self, line_no, message):
+        self.skipped += 1
+        if len(self.errors) < self.MAX_ERRORS_KEPT:
+            self.errors.append((line_no, message))
+
+    def run(self, records, progress=None):
+        """
+        Import ``records`` ((line number, raw record) pairs) and call
+        ``progress(created, rows, seconds)`` after every chunk.
+        """
+        records = iter(records)
+        try:
+            while True:
+                chunk = list(islice(records, self.batch_size))
+                if not chunk:
+                    break
+                started = time.monotonic()
+                created = self.import_chunk(chunk)
+                if progress:
+                    progress(created, len(chunk), time.monotonic() - started)
+        finally:
+            self.finish()
+        return self.created
+
+    def import_chunk(self, chunk):
+        rows = []
+        for line_no, raw in chunk:
+            try:
+                rows.append((line_no, normalize_record(raw)))
+            except RecordError as exc:
+                self.fail(line_no, str(exc))
+
+        with transaction.atomic():
+            rows = self.drop_taken_titles(rows)
+            rows = self.resolve_authors(rows)
+            if not rows:
+                return 0
+
+            category_ids = upsert_named(Category, {row["category"] for _, row in rows if row["category"]})
+            tag_ids = upsert_named(Tag, {tag for _, row in rows for tag in row["tags"]})
+            rows = self.drop_unresolved(rows, category_ids, tag_ids)
+            if not rows:
+                return 0
+
+            max_length = Blog._meta.get_field("slug").max_length - SLUG_SUFFIX_ROOM
+            bases = [slugify(row["slug"] or row["title"])[:max_length] or "blog" for _, row in rows]
+            slugs = unique_slugs(Blog.objects.all(), bases)
+
+            now = timezone.now()
+            blogs = []
+            for (_, row), slug in zip(rows, slugs):
+                published_at = row["published_at"]
+                if row["is_published"] and published_at is None:
+                    published_at = now
+                blogs.append(Blog(
+                    title=row["title"],
+                    slug=slug,
+                    content=row["content"],
+                    excerpt=Blog.make_excerpt(row["content"]),
+                    author_id=row["author_id"],
+                    category_id=category_ids.get(row["category"]),
+                    is_published=row["is_published"],
+                    is_featured=row["is_featured"],
+                    is_active=True,
+                    published_at=published_at,
+                ))
+            Blog.objects.bulk_create(blogs)
+
+            # Backends without RETURNING leave pks unset; slugs are unique
+            if any(blog.pk is None for blog in blogs):
+                pks = dict(Blog.objects.filter(slug__in=slugs).values_list("slug", "pk"))
+                for blog in blogs:
+                    blog.pk = pks[blog.slug]
+
+            Through = Blog.tags.through
+            Through.objects.bulk_create([
+                Through(blog_id=blog.pk, tag_id=tag_ids[tag])
+                for blog, (_, row) in zip(blogs, rows)
+                for tag in row["tags"]
+            ])
+
+            get_search_backend().index([blog.pk for blog in blogs])
+
+        self.created += len(blogs)
+        return len(blogs)
+
+    def drop_taken_titles(self, rows):
+        """Titles are unique: skip ones already stored or repeated in the chunk"""
+        titles = {row["title"] for _, row in rows}
+        taken = set(Blog.objects.filter(title__in=titles).values_list("title", flat=True))
+        kept = []
+        for line_no, row in rows:
+            if row["title"] in taken:
+                self.fail(line_no, f"title already exists: {row['title']!r}")
+                continue
+            taken.add(row["title"])
+            kept.append((line_no, row))
+        return kept
+
+    def drop_unresolved(self, rows, category_ids, tag_ids):
+        """Skip records whose category or tags could not be created (e.g. a name whose slug is taken)"""
+        kept = []
+        for line_no, row in rows:
+            missing = [tag for tag in row["tags"] if tag not in tag_ids]
+            if row["category"] and row["category"] not in category_ids:
+                self.fail(line_no, f"category could not be created: {row['category']!r}")
+            elif missing:
+                self.fail(line_no, f"tags could not be created: {', '.join(map(repr, missing))}")
+            else:
+                kept.append((line_no, row))
+        return kept
+
+    def resolve_authors(self, rows):
+        """Set ``author_id`` from the username (or the default author)"""
+        unseen = {row["author"] for _, row in rows if row["author"]} - self.author_ids.keys()
+        if unseen:
+            found = dict(User.objects.filter(username__in=unseen).values_list("username", "pk"))
+            self.author_ids.update({username: found.get(username) for username in unseen})
+
+        kept = []
+        for line_no, row in rows:
+            if row["author"]:
+                row["author_id"] = self.author_ids[row["author"]]
+            else:
+                row["author_id"] = self.default_author.pk if self.default_author else None
+            if row["author_id"] is None:
+                self.fail(line_no, f"unknown author: {row['author'] or '(none)'}")
+                continue
+            kept.append((line_no, row))
+        return kept
+
+    def finish(self):
+        if self.created:
+            refresh_site_stats()
+            for model in (Blog, Category, Tag):
+                bump_version(model)
@@ -0,0 +1,424 @@
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+from collections import Counter, defaultdict, namedtuple
+from importlib.util import find_spec
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+
+from .benchmarks import BenchmarkError, percentile
+from .cache import PROCESS_LOCAL_BACKENDS, cache_settings
+from .models import Blog, Reaction
+
+User = get_user_model()
+
+API = "/api/blog/"
+AUTH = "/api/auth/"
+
+REACTION_TYPES = [rtype for rtype, _ in Reaction.REACTION_CHOICES]
+
+# (action, weight) mixes of the two kinds of virtual user
+READER_MIX = [("feed", 40), ("post", 30), ("comments", 10), ("react", 10), ("comment", 5), ("login", 5)]
+ANONYMOUS_MIX = [("blogs", 30), ("comments", 30), ("featured", 20), ("stats", 10), ("categories", 10)]
+
+Response = namedtuple("Response", ["status", "headers", "body"])
+
+
+class LoadTestError(BenchmarkError):
+    pass
+
+
+# ---------------------------
+# HTTP/1.1 client
+# ---------------------------
+class HTTPConnection:
+    """
+    One keep-alive HTTP/1.1 connection on asyncio streams, enough for JSON
+    APIs: Content-Length and chunked bodies, reconnects when the server
+    closes the connection.
+    """
+
+    def __init__(self, host, port, timeout=30.0):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.reader = self.writer = None
+
+    async def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            try:
+                await self.writer.wait_closed()
+            except (ConnectionError, OSError):
+                pass
+        self.reader = self.writer = None
+
+    async def request(self, method, path, headers=None, body=None):
+        reused = self.writer is not None
+        try:
+            return await asyncio.wait_for(self._request(method, path, headers, body), self.timeout)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            await self.close()
+            if not reused:
+                raise
+            # The server dropped an idle keep-alive connection; one fresh try
+            return await asyncio.wait_for(self._request(method, path, headers, body), self.timeout)
+        except BaseException:
+            await self.close()
+            raise
+
+    async def _request(self, method, path, headers, body):
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+
+        lines = [f"{method} {path} HTTP/1.1", f"Host: {self.host}:{self.port}", "Connection: keep-alive"]
+        lines += [f"{name}: {value}" for name, value in (headers or {}).items()]
+        if body is not None:
+            lines.append(f"Content-Length: {len(body)}")
+        self.writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + (body or b""))
+        await self.writer.drain()
+
+        status_line = await self.reader.readuntil(b"\r\n")
+        status = int(status_line.split()[1])
+        response_headers = {}
+        while True:
+            line = await self.reader.readuntil(b"\r\n")
+            if line == b"\r\n":
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            response_headers[name.strip().lower()] = value.strip()
+
+        if response_headers.get("transfer-encoding", "").lower() == "chunked":
+            chunks = []
+            while True:
+                size = int((await self.reader.readuntil(b"\r\n")).split(b";")[0], 16)
+                chunks.append(await self.reader.readexactly(size + 2))
+                if size == 0:
+                    break
+            payload = b"".join(chunk[:-2] for chunk in chunks)
+        elif "content-length" in response_headers:
+            payload = await self.reader.readexactly(int(response_headers["content-length"]))
+        else:
+            payload = await self.reader.read()
+            response_headers["connection"] = "close"
+
+        if response_headers.get("connection", "").lower() == "close":
+            await self.close()
+        return Response(status, response_headers, payload)
+
+
+# ---------------------------
+# Server
+# ---------------------------
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def server_command(server, port, workers):
+    """Command line starting the project on 127.0.0.1:``port``"""
+    address = f"127.0.0.1:{port}"
+    if server == "runserver":
+        # Django's threaded development server (WSGI)
+        return [sys.executable, "manage.py", "runserver", address, "--noreload"]
+    if server == "gunicorn":
+        if find_spec("gunicorn") is None:
+            raise LoadTestError("--server gunicorn requires the gunicorn package.")
+        return [
+            sys.executable, "-m", "gunicorn", "backend.wsgi:application",
+            "--bind", address, "--workers", str(workers), "--threads", "4", "--log-level", "warning",
+        ]
+    if server == "uvicorn":
+        if find_spec("uvicorn") is None:
+            raise LoadTestError("--server uvicorn requires the uvicorn package.")
+        return [
+            sys.executable, "-m", "uvicorn", "backend.asgi:application",
+            "--host", "127.0.0.1", "--port", str(port), "--workers", str(workers),
+            "--no-access-log", "--log-level", "warning",
+        ]
+    raise LoadTestError(f"Unknown server: {server!r}")
+
+
+class Server:
+    """The project running in a child process for the duration of a ``with`` block"""
+
+    def __init__(self, server="runserver", workers=2, throttling=False, log=None):
+        self.port = free_port()
+        self.command = server_command(server, self.port, workers)
+        # runserver is one process however many threads it runs
+        self.single_process = server == "runserver" or workers == 1
+        # Several workers on a process-local response cache serve uncached,
+        # which the results should say (RESPONSE_CACHE_URL=redis://... to cache)
+        alias = cache_settings()["ALIAS"]
+        local = settings.CACHES[alias]["BACKEND"] in PROCESS_LOCAL_BACKENDS
+        self.response_cache = "off" if local and not self.single_process else "on"
+        self.throttling = throttling
+        self.log = log
+        self.process = None
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.port}"
+
+    def __enter__(self):
+        env = {
+            **os.environ,
+            "ALLOWED_HOSTS": "127.0.0.1,localhost",
+            "THROTTLE_ENABLED": "true" if self.throttling else "false",
+            "SINGLE_PROCESS": "true" if self.single_process else "false",
+        }
+        env.setdefault("DJANGO_SETTINGS_MODULE", settings.SETTINGS_MODULE)
+        output = open(self.log, "ab") if self.log else subprocess.DEVNULL
+        self.process = subprocess.Popen(self.command, cwd=settings.BASE_DIR, env=env, stdout=output, stderr=output)
+        if self.log:
+            output.close()
+        try:
+            self.wait_ready()
+        except BaseException:
+            self.stop()
+            raise
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def wait_ready(self, timeout=60.0):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise LoadTestError(f"The server exited with status {self.process.returncode}; see --server-log.")
+            try:
+                with socket.create_connection(("127.0.0.1", self.port), timeout=1):
+                    return
+            except OSError:
+                time.sleep(0.2)
+        raise LoadTestError(f"The server did not accept connections within {timeout:.0f}s.")
+
+    def stop(self):
+        if self.process and self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(10)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+                self.process.wait()
+
+
+# ---------------------------
+# Traffic
+# ---------------------------
+class Targets:
+    """Accounts to log in as and posts to open, read from the database once"""
+
+    def __init__(self, password, max_users=1000, max_blogs=1000):
+        self.password = password
+        self.usernames = list(
+            User.objects.filter(role="USER", is_active=True).order_by("pk")
+            .values_list("username", flat=True)[:max_users]
+        )
+        self.blogs = list(
+            Blog.objects.filter(is_active=True, is_published=True).order_by("-published_at", "pk")
+            .values_list("pk", "slug")[:max_blogs]
+        )
+        if not self.usernames or not self.blogs:
+            raise LoadTestError("The database needs users and published blogs; run `manage.py seed_bench` first.")
+
+
+class Recorder:
+    """Latencies and outcomes per route; only records once ``active``"""
+
+    def __init__(self):
+        self.active = False
+        self.latencies = defaultdict(list)
+        self.statuses = defaultdict(Counter)
+        self.failures = Counter()
+
+    def record(self, route, started, status=None):
+        if not self.active:
+            return
+        self.latencies[route].append(time.perf_counter() - started)
+        if status is None:
+            self.failures[route] += 1
+        else:
+            self.statuses[route][status] += 1
+
+    def summary(self, duration):
+        routes = {}
+        for route in sorted(self.latencies):
+            values = sorted(latency * 1000 for latency in self.latencies[route])
+            statuses = self.statuses[route]
+            errors = self.failures[route] + sum(count for status, count in statuses.items() if status >= 400)
+            routes[route] = {
+                "requests": len(values),
+                "throughput_rps": round(len(values) / duration, 2),
+                "p50_ms": round(percentile(values, 50), 3),
+                "p95_ms": round(percentile(values, 95), 3),
+                "p99_ms": round(percentile(values, 99), 3),
+                "max_ms": round(values[-1], 3),
+                "error_rate": round(errors / len(values), 4),
+                "statuses": {str(status): count for status, count in sorted(statuses.items())},
+                "connection_errors": self.failures[route],
+            }
+        total = sum(route["requests"] for route in routes.values())
+        errors = sum(route["error_rate"] * route["requests"] for route in routes.values())
+        return {
+            "requests": total,
+            "throughput_rps": round(total / duration, 2),
+            "error_rate": round(errors / total, 4) if total else 0.0,
+            "routes": routes,
+        }
+
+
+class VirtualUser:
+    """One simulated client on its own keep-alive connection"""
+
+    def __init__(self, host, port, targets, recorder, rng, anonymous, think_time):
+        self.connection = HTTPConnection(host, port)
+        self.targets = targets
+        self.recorder = recorder
+        self.rng = rng
+        self.anonymous = anonymous
+        self.think_time = think_time
+        self.token = None
+        self.username = None if anonymous else rng.choice(targets.usernames)
+        self.mix = ANONYMOUS_MIX if anonymous else READER_MIX
+
+    async def call(self, route, method, path, data=None):
+        headers = {"Accept": "application/json"}
+        body = None
+        if data is not None:
+            headers["Content-Type"] = "application/json"
+            body = json.dumps(data).encode()
+        if self.token:
+            headers["Authorization"] = f"Bearer {self.token}"
+
+        started = time.perf_counter()
+        try:
+            response = await self.connection.request(method, path, headers, body)
+        except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, ValueError):
+            self.recorder.record(route, started)
+            return None
+        self.recorder.record(route, started, response.status)
+        return response
+
+    async def login(self):
+        response = await self.call(
+            f"POST {AUTH}login/", "POST", f"{AUTH}login/",
+            {"username": self.username, "password": self.targets.password},
+        )
+        if response is not None and response.status == 200:
+            self.token = json.loads(response.body)["access"]
+
+    async def act(self, action):
+        blog_id, slug = self.rng.choice(self.targets.blogs)
+        if action == "feed":
+            await self.call(f"GET {API}posts/", "GET", f"{API}posts/?page={self.rng.randint(1, 5)}")
+        elif action == "post":
+            await self.call(f"GET {API}posts/<slug>/", "GET", f"{API}posts/{slug}/")
+        elif action == "comments":
+            await self.call(f"GET {API}blogs/<id>/comments/", "GET", f"{API}blogs/{blog_id}/comments/")
+        elif action == "react":
+            await self.call(
+                f"POST {API}blogs/<id>/reactions/", "POST", f"{API}blogs/{blog_id}/reactions/",
+                {"type": self.rng.choice(REACTION_TYPES)},
+            )
+        elif action == "comment":
+            await self.call(
+                f"POST {API}blogs/<id>/comments/", "POST", f"{API}blogs/{blog_id}/comments/",
+                {"blog": blog_id, "content": "Load test comment"},
+            )
+        elif action == "login":
+            await self.login()
+        elif action == "blogs":
+            await self.call(f"GET {API}blogs/", "GET", f"{API}blogs/?page={self.rng.randint(1, 5)}")
+        elif action == "featured":
+            await self.call(f"GET {API}blogs/featured/", "GET", f"{API}blogs/featured/")
+        elif action == "stats":
+            await self.call(f"GET {API}stats/", "GET", f"{API}stats/")
+        elif action == "categories":
+            await self.call(f"GET {API}categories/", "GET", f"{API}categories/")
+
+    async def run(self, stop_at):
+        actions, weights = zip(*self.mix)
+        try:
+            if not self.anonymous:
+                await self.login()
+            while time.monotonic() < stop_at:
+                # Readers whose login failed keep browsing what needs no account
+                action = self.rng.choices(actions, weights)[0]
+                if not self.anonymous and self.token is None and action != "login":
+                    action = "login"
+                await self.act(action)
+                if self.think_time:
+                    await asyncio.sleep(self.rng.expovariate(1 / self.think_time))
+        finally:
+            await self.connection.close()
+
+
+async def run_stage(url, targets, concurrency, duration, warmup, anonymous_ratio, think_time, seed):
+    """``concurrency`` virtual users for ``warmup`` + ``duration`` seconds; the summary of the measured part"""
+    parts = urlsplit(url)
+    recorder = Recorder()
+    rng = random.Random(seed)
+    users = [
+        VirtualUser(
+            parts.hostname, parts.port or 80, targets, recorder,
+            random.Random(rng.random()), rng.random() < anonymous_ratio, think_time,
+        )
+        for _ in range(concurrency)
+    ]
+
+    started = time.monotonic()
+    stop_at = started + warmup + duration
+    tasks = [asyncio.create_task(user.run(stop_at)) for user in users]
+    await asyncio.sleep(warmup)
+    recorder.active = True
+    measured_from = time.monotonic()
+    await asyncio.gather(*tasks)
+    return recorder.summary(max(time.monotonic() - measured_from, 1e-9))
+
+
+def run_load_test(concurrency_levels, duration=30.0, warmup=5.0, server="runserver", workers=2, url=None,
+                  password="password", anonymous_ratio=0.3, think_time=0.0, throttling=False, seed=0,
+                  server_log=None, progress=None):
+    """
+    Drive the traffic mix at each concurrency level in turn against ``url``,
+    or against a server started for the run, and return the result document.
+    """
+    targets = Targets(password)
+    meta = {
+        "server": "external" if url else server,
+        "workers": None if url else workers,
+        "database": settings.DATABASES["default"]["ENGINE"].rsplit(".", 1)[-1],
+        "duration": duration,
+        "warmup": warmup,
+        "anonymous_ratio": anonymous_ratio,
+        "think_time": think_time,
+        "throttling": throttling,
+        "reader_mix": dict(READER_MIX),
+        "anonymous_mix": dict(ANONYMOUS_MIX),
+    }
+
+    def stages(base_url):
+        results = {}
+        for concurrency in concurrency_levels:
+            results[str(concurrency)] = asyncio.run(run_stage(
+                base_url, targets, concurrency, duration, warmup, anonymous_ratio, think_time, seed,
+            ))
+            if progress:
+                progress(concurrency, results[str(concurrency)])
+        return results
+
+    if url:
+        return {"meta": meta, "stages": stages(url)}
+    with Server(server, workers, throttling, server_log) as running:
+        meta["response_cache"] = running.response_cache
+        return {"meta": meta, "stages": stages(running.url)}
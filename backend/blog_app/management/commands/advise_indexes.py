@@ -0,0 +1,51 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from blog_app.benchmarks import BenchmarkError
+from blog_app.explain import AdvisorError, advise
+
+
+class Command(BaseCommand):
+    help = (
+        "EXPLAIN the queryset of every API view for representative users and parameters "
+        "(SQLite or PostgreSQL) and flag sequential scans and sorts that an index could avoid. "
+        "Run it on a seeded database (see seed_bench); planners scan tiny tables on purpose."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--min-rows",
+            type=int,
+            default=1000,
+            help="Ignore scans of tables with fewer rows than this. Default 1000.",
+        )
+        parser.add_argument("--search", default="cache", help="Search term of the search variants.")
+        parser.add_argument("--verbose-plans", action="store_true", help="Print the SQL and plan of every query.")
+        parser.add_argument("--strict", action="store_true", help="Exit with an error if anything is flagged.")
+
+    def handle(self, *args, **options):
+        try:
+            plans = advise(search=options["search"], min_rows=max(options["min_rows"], 0))
+        except (AdvisorError, BenchmarkError) as exc:
+            raise CommandError(str(exc))
+
+        flagged = 0
+        for plan in plans:
+            variant = f" [{plan.variant}]" if plan.variant else ""
+            label = f"GET /{plan.route}{variant} as {plan.user}"
+            if plan.findings:
+                flagged += 1
+                self.stdout.write(self.style.WARNING(label))
+                for finding in plan.findings:
+                    self.stdout.write(f"    {finding.kind}: {finding.detail}")
+            else:
+                self.stdout.write(f"{label}: ok")
+            if options["verbose_plans"]:
+                self.stdout.write(f"    {plan.sql}")
+                for line in plan.plan.splitlines():
+                    self.stdout.write(f"      {line}")
+
+        summary = f"{len(plans)} queries explained on {connection.vendor}, {flagged} flagged."
+        if flagged and options["strict"]:
+            raise CommandError(summary)
+        self.stdout.write(self.style.SUCCESS(summary) if not flagged else summary)
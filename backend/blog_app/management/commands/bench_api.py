@@ -0,0 +1,76 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from blog_app.benchmarks import BenchmarkError, compare, run_benchmarks
+
+
+class Command(BaseCommand):
+    help = (
+        "Time the API endpoints and serializers in-process against the current database "
+        "(seed it with seed_bench) and report p50/p95/p99 latency and queries per request as JSON."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=200, help="Timed runs per case.")
+        parser.add_argument("--warmup", type=int, default=20, help="Untimed runs before timing each case.")
+        parser.add_argument(
+            "--cold",
+            action="store_true",
+            help="Clear the response, principal and ad caches before every run.",
+        )
+        parser.add_argument(
+            "--case",
+            action="append",
+            dest="cases",
+            help="Only run cases whose name contains this (can be repeated), e.g. posts. or serializer.",
+        )
+        parser.add_argument("--search", default="cache", help="Search term of the search cases.")
+        parser.add_argument("--output", help="Write the JSON results to this file instead of stdout.")
+        parser.add_argument("--compare", help="JSON results of an earlier run to compare against.")
+
+    def handle(self, *args, **options):
+        baseline = None
+        if options["compare"]:
+            with open(options["compare"]) as f:
+                baseline = json.load(f)
+
+        def progress(name, result):
+            self.stderr.write(
+                f"{name:<40} p50 {result['p50_ms']:>9.3f} ms  p95 {result['p95_ms']:>9.3f} ms  "
+                f"p99 {result['p99_ms']:>9.3f} ms  {result['queries']:>3} queries"
+            )
+
+        try:
+            report = run_benchmarks(
+                iterations=max(options["iterations"], 1),
+                warmup=max(options["warmup"], 0),
+                cold=options["cold"],
+                select=options["cases"],
+                search=options["search"],
+                progress=progress,
+            )
+        except BenchmarkError as exc:
+            raise CommandError(str(exc))
+
+        document = json.dumps(report, indent=2)
+        if options["output"]:
+            with open(options["output"], "w") as f:
+                f.write(document + "\n")
+            self.stderr.write(self.style.SUCCESS(f"Results written to {options['output']}."))
+        else:
+            self.stdout.write(document)
+
+        if baseline is not None:
+            self.write_comparison(baseline, report)
+
+    def write_comparison(self, baseline, report):
+        if baseline.get("meta", {}).get("dataset") != report["meta"]["dataset"]:
+            self.stderr.write(self.style.WARNING("The baseline was measured on a different dataset."))
+        self.stderr.write(f"\n{'case':<40} {'p50 before':>11} {'p50 after':>10} {'change':>8} "
+                          f"{'p95 before':>11} {'p95 after':>10} {'queries':>9}")
+        for name, p50_before, p50_after, change, p95_before, p95_after, q_before, q_after in compare(baseline, report):
+            self.stderr.write(
+                f"{name:<40} {p50_before:>11.3f} {p50_after:>10.3f} {change:>+7.1f}% "
+                f"{p95_before:>11.3f} {p95_after:>10.3f} {q_before:>4}->{q_after:<4}"
+            )
@@ -0,0 +1,75 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from blog_app.images import IMAGE_FIELDS, image_fields, image_models, image_settings, process_image
+
+
+MODEL_CHOICES = {label.rsplit(".", 1)[1]: label for label in IMAGE_FIELDS}
+
+
+def _process(model, pk, name):
+    try:
+        return process_image(model, pk, name)
+    finally:
+        close_old_connections()
+
+
+class Command(BaseCommand):
+    help = "Build the resized image variants of existing blog images, avatars and advertisements."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--model",
+            choices=sorted(MODEL_CHOICES),
+            action="append",
+            dest="models",
+            help="Only process this model (can be repeated).",
+        )
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Rebuild variants that are already up to date.",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=image_settings()["WORKERS"],
+            help="Images processed in parallel.",
+        )
+
+    def handle(self, *args, **options):
+        labels = {MODEL_CHOICES[name] for name in options["models"] or MODEL_CHOICES}
+        workers = max(options["workers"], 1)
+
+        for model in image_models():
+            if model._meta.label_lower not in labels:
+                continue
+            image_field, variants_field, _ = image_fields(model)
+            rows = (
+                model._default_manager.exclude(**{f"{image_field}__isnull": True})
+                .exclude(**{image_field: ""})
+                .order_by("pk")
+                .values_list("pk", image_field, variants_field)
+            )
+            pending = [
+                (pk, name) for pk, name, record in rows.iterator()
+                if options["force"] or (record or {}).get("source") != name
+            ]
+
+            built = failed = 0
+            with ThreadPoolExecutor(workers) as pool:
+                futures = [pool.submit(_process, model, pk, name) for pk, name in pending]
+                for (pk, name), future in zip(pending, futures):
+                    try:
+                        future.result()
+                        built += 1
+                    except Exception as exc:
+                        failed += 1
+                        self.stderr.write(f"{model._meta.verbose_name} {pk} ({name}): {exc}")
+
+            message = f"{model._meta.verbose_name_plural}: built variants for {built} image(s)"
+            if failed:
+                message += f", {failed} failed"
+            self.stdout.write(self.style.SUCCESS(message + "."))
@@ -0,0 +1,81 @@
+import sys
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from blog_app.importing import BlogImporter, read_csv, read_ndjson
+
+User = get_user_model()
+
+READERS = {"ndjson": read_ndjson, "csv": read_csv}
+
+
+class Command(BaseCommand):
+    help = (
+        "Bulk import blogs from NDJSON or CSV. Each record has title and content, "
+        "optionally slug, author (username), category (name), tags (list, or "
+        "comma-separated in CSV), is_published, is_featured and published_at. "
+        "Missing categories and tags are created."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Input file, or - for stdin.")
+        parser.add_argument(
+            "--format",
+            choices=sorted(READERS),
+            help="Input format (default: from the file extension, else ndjson).",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Records written per transaction.",
+        )
+        parser.add_argument(
+            "--author",
+            help="Username used for records without an author.",
+        )
+
+    def handle(self, *args, **options):
+        fmt = options["format"] or ("csv" if options["path"].lower().endswith(".csv") else "ndjson")
+
+        default_author = None
+        if options["author"]:
+            default_author = User.objects.filter(username=options["author"]).first()
+            if default_author is None:
+                raise CommandError(f"Unknown author: {options['author']}")
+
+        importer = BlogImporter(default_author=default_author, batch_size=options["batch_size"])
+        batches = 0
+
+        def progress(created, rows, seconds):
+            nonlocal batches
+            batches += 1
+            if options["verbosity"] >= 1:
+                self.stdout.write(
+                    f"Batch {batches}: {created}/{rows} row(s) imported in {seconds:.2f}s "
+                    f"({rows / seconds if seconds else 0:.0f} rows/s)"
+                )
+
+        started = time.monotonic()
+        if options["path"] == "-":
+            importer.run(READERS[fmt](sys.stdin), progress)
+        else:
+            try:
+                with open(options["path"], encoding="utf-8", newline="") as stream:
+                    importer.run(READERS[fmt](stream), progress)
+            except OSError as exc:
+                raise CommandError(str(exc))
+        elapsed = time.monotonic() - started
+
+        for line_no, message in importer.errors:
+            self.stderr.write(f"Line {line_no}: {message}")
+        if importer.skipped > len(importer.errors):
+            self.stderr.write(f"... and {importer.skipped - len(importer.errors)} more skipped row(s)")
+
+        total = importer.created + importer.skipped
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {importer.created} blog(s), skipped {importer.skipped}, in {elapsed:.2f}s "
+            f"({total / elapsed if elapsed else 0:.0f} rows/s)."
+        ))
@@ -0,0 +1,100 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from blog_app.loadtest import LoadTestError, run_load_test
+
+
+def concurrency_levels(value):
+    levels = [int(level) for level in value.split(",") if level.strip()]
+    if not levels or min(levels) < 1:
+        raise ValueError(value)
+    return levels
+
+
+class Command(BaseCommand):
+    help = (
+        "Start the project on a local server and drive a mix of anonymous and logged-in traffic "
+        "(feed, posts, comments, reactions, logins) at each concurrency level, reporting throughput, "
+        "latency percentiles and error rates per route as JSON. Reactions and comments are really "
+        "written, so run it against a seeded copy of the database (see seed_bench)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--concurrency",
+            type=concurrency_levels,
+            default=[1, 10, 50],
+            help="Comma-separated numbers of virtual users, one stage each. Default 1,10,50.",
+        )
+        parser.add_argument("--duration", type=float, default=30.0, help="Measured seconds per stage.")
+        parser.add_argument("--warmup", type=float, default=5.0, help="Unmeasured seconds before each stage.")
+        parser.add_argument(
+            "--server",
+            choices=["runserver", "gunicorn", "uvicorn"],
+            default="runserver",
+            help="runserver (threaded WSGI), gunicorn (backend.wsgi) or uvicorn (backend.asgi).",
+        )
+        parser.add_argument("--workers", type=int, default=2, help="Worker processes of gunicorn or uvicorn.")
+        parser.add_argument("--url", help="Load an already running server instead of starting one.")
+        parser.add_argument("--password", default="password", help="Password of the seeded users.")
+        parser.add_argument(
+            "--anonymous-ratio",
+            type=float,
+            default=0.3,
+            help="Share of virtual users that never log in.",
+        )
+        parser.add_argument(
+            "--think-time",
+            type=float,
+            default=0.0,
+            help="Mean seconds a virtual user waits between requests (exponentially distributed).",
+        )
+        parser.add_argument(
+            "--throttling",
+            action="store_true",
+            help="Keep request throttling on in the started server; all traffic comes from one IP.",
+        )
+        parser.add_argument("--seed", type=int, default=0, help="Random seed of the traffic.")
+        parser.add_argument("--server-log", help="Append the server's output to this file.")
+        parser.add_argument("--output", help="Write the JSON results to this file instead of stdout.")
+
+    def handle(self, *args, **options):
+        def progress(concurrency, stage):
+            self.stderr.write(
+                f"\nconcurrency {concurrency}: {stage['requests']} requests, "
+                f"{stage['throughput_rps']:.1f} req/s, {stage['error_rate']:.2%} errors"
+            )
+            self.stderr.write(f"{'route':<40} {'req/s':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>7}")
+            for route, result in stage["routes"].items():
+                self.stderr.write(
+                    f"{route:<40} {result['throughput_rps']:>8.1f} {result['p50_ms']:>9.2f} "
+                    f"{result['p95_ms']:>9.2f} {result['p99_ms']:>9.2f} {result['error_rate']:>7.2%}"
+                )
+
+        try:
+            report = run_load_test(
+                options["concurrency"],
+                duration=max(options["duration"], 1.0),
+                warmup=max(options["warmup"], 0.0),
+                server=options["server"],
+                workers=max(options["workers"], 1),
+                url=options["url"],
+                password=options["password"],
+                anonymous_ratio=min(max(options["anonymous_ratio"], 0.0), 1.0),
+                think_time=max(options["think_time"], 0.0),
+                throttling=options["throttling"],
+                seed=options["seed"],
+                server_log=options["server_log"],
+                progress=progress,
+            )
+        except LoadTestError as exc:
+            raise CommandError(str(exc))
+
+        document = json.dumps(report, indent=2)
+        if options["output"]:
+            with open(options["output"], "w") as f:
+                f.write(document + "\n")
+            self.stderr.write(self.style.SUCCESS(f"Results written to {options['output']}."))
+        else:
+            self.stdout.write(document)
@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+
+from blog_app.notifications import notification_settings, purge_notifications
+
+
+class Command(BaseCommand):
+    help = "Delete read notifications older than the retention period."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            help="Retention in days (default: NOTIFICATIONS['RETENTION_DAYS']).",
+        )
+        parser.add_argument(
+            "--include-unread",
+            action="store_true",
+            help="Also delete unread notifications past the retention period.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=5000,
+            help="Rows deleted per DELETE statement.",
+        )
+
+    def handle(self, *args, **options):
+        days = options["days"]
+        if days is None:
+            days = notification_settings()["RETENTION_DAYS"]
+        deleted = purge_notifications(
+            days=days,
+            include_unread=options["include_unread"],
+            batch_size=max(options["batch_size"], 1),
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Deleted {deleted} notification(s) older than {days} day(s)."
+        ))
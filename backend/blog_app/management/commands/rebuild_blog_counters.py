@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from blog_app.counters import rebuild_counters
+from blog_app.models import Blog
+
+
+class Command(BaseCommand):
+    help = "Recompute the denormalized view, comment and reaction counters on every blog."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of blogs recomputed per UPDATE statement.",
+        )
+        parser.add_argument(
+            "--blog",
+            type=int,
+            action="append",
+            dest="blog_ids",
+            help="Only rebuild this blog id (can be repeated).",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = max(options["batch_size"], 1)
+        queryset = Blog.objects.order_by("pk")
+        if options["blog_ids"]:
+            queryset = queryset.filter(pk__in=options["blog_ids"])
+
+        ids = list(queryset.values_list("pk", flat=True))
+        updated = 0
+        for start in range(0, len(ids), batch_size):
+            chunk = ids[start:start + batch_size]
+            with transaction.atomic():
+                updated += rebuild_counters(Blog.objects.filter(pk__in=chunk))
+
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt counters for {updated} blog(s)."))
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+
+from blog_app.search import backend_for
+
+
+class Command(BaseCommand):
+    help = "Rebuild the full-text search documents of every blog."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--database",
+            default=DEFAULT_DB_ALIAS,
+            help="Database alias to rebuild the index on.",
+        )
+
+    def handle(self, *args, **options):
+        backend = backend_for(connections[options["database"]])
+        with transaction.atomic(using=options["database"]):
+            backend.create_schema()
+            indexed = backend.rebuild()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Indexed {indexed} blog(s) with {type(backend).__name__}."
+        ))
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from blog_app.stats import refresh_site_stats
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the homepage site statistics. Run it periodically (e.g. hourly "
+        "from cron) so the 7-day new content window keeps moving."
+    )
+
+    def handle(self, *args, **options):
+        stats = refresh_site_stats()
+        self.stdout.write(self.style.SUCCESS(
+            f"Site stats: {stats.blog_count} blog(s), {stats.user_count} user(s), "
+            f"{stats.new_content_count} new this week."
+        ))
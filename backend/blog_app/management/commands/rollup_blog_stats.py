@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand
+
+from blog_app.rollup import prune_views, prune_visitors, rollup, rollup_settings
+
+
+class Command(BaseCommand):
+    help = (
+        "Add views, reactions and comments recorded since the last run to the per-blog daily "
+        "rollup, then delete rolled-up ViewCount rows, and the BlogVisitor rows of visitors first "
+        "seen, older than the retention period. "
+        "Run it periodically (e.g. every few minutes from cron), one at a time."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            help="Retention of raw views and visitors in days (default: VIEW_ROLLUP['RETENTION_DAYS']).",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            help="Rows aggregated per transaction and deleted per DELETE (default: VIEW_ROLLUP['BATCH_SIZE']).",
+        )
+        parser.add_argument("--no-prune", action="store_true", help="Only roll up; keep every raw view and visitor.")
+
+    def handle(self, *args, **options):
+        batch_size = max(options["batch_size"] or rollup_settings()["BATCH_SIZE"], 1)
+        for label, count in rollup(batch_size=batch_size).items():
+            self.stdout.write(f"{label}: {count} row(s) rolled up")
+
+        if not options["no_prune"]:
+            days = options["days"]
+            if days is None:
+                days = rollup_settings()["RETENTION_DAYS"]
+            deleted = prune_views(days=days, batch_size=batch_size)
+            forgotten = prune_visitors(days=days, batch_size=batch_size)
+            self.stdout.write(self.style.SUCCESS(
+                f"Deleted {deleted} raw view(s) and {forgotten} visitor(s) older than {days} day(s)."
+            ))
@@ -0,0 +1,58 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from blog_app.seeding import DEFAULT_VOLUMES, Seeder
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate synthetic users, categories, tags, blogs, comment trees, reactions, views, "
+        "notifications and ads for benchmarks. The same --seed and volumes give the same data."
+    )
+
+    def add_arguments(self, parser):
+        for name, default in DEFAULT_VOLUMES.items():
+            parser.add_argument(
+                f"--{name.replace('_', '-')}",
+                type=int,
+                default=default,
+                dest=name,
+                help=f"Default {default}.",
+            )
+        parser.add_argument("--seed", type=int, default=0, help="Random seed.")
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=5000,
+            help="Rows per INSERT statement; blogs are written in chunks of about this many child rows.",
+        )
+        parser.add_argument(
+            "--prefix",
+            default="bench",
+            help="Prefix of generated usernames, titles and slugs; use a new one to seed again on top.",
+        )
+        parser.add_argument("--password", default="password", help="Password of every generated user.")
+
+    def handle(self, *args, **options):
+        volumes = {name: max(options[name], 0) for name in DEFAULT_VOLUMES}
+        if volumes["users"] < 1:
+            volumes["users"] = 1
+
+        seeder = Seeder(
+            volumes,
+            seed=options["seed"],
+            batch_size=options["batch_size"],
+            prefix=options["prefix"],
+            password=options["password"],
+        )
+        started = time.perf_counter()
+        created = seeder.run()
+        elapsed = time.perf_counter() - started
+
+        total = sum(created.values())
+        for label, count in sorted(created.items()):
+            self.stdout.write(f"{label}: {count}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {total} rows in {elapsed:.1f}s ({total / max(elapsed, 1e-9):.0f} rows/s)."
+        ))
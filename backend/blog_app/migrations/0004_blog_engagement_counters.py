@@ -0,0 +1,86 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:48
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+REACTION_TYPES = ["like", "love", "haha", "wow", "sad", "angry"]
+
+
+def backfill_counters(apps, schema_editor):
+    Blog = apps.get_model("blog_app", "Blog")
+
+    def count_of(model_name, **filters):
+        rows = (
+            apps.get_model("blog_app", model_name).objects
+            .filter(blog=OuterRef("pk"), **filters)
+            .order_by()
+            .values("blog")
+            .annotate(total=Count("pk"))
+            .values("total")
+        )
+        return Coalesce(Subquery(rows), 0)
+
+    updates = {
+        "views_count": count_of("ViewCount"),
+        "comments_count": count_of("Comment"),
+    }
+    for rtype in REACTION_TYPES:
+        updates[f"{rtype}_count"] = count_of("Reaction", type=rtype)
+    Blog.objects.update(**updates)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog_app', '0003_reaction_delete_like'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='viewcount',
+            options={'ordering': ['-viewed_at']},
+        ),
+        migrations.AddField(
+            model_name='blog',
+            name='angry_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='blog',
+            name='comments_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='blog',
+            name='haha_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='blog',
+            name='like_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='blog',
+            name='love_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='blog',
+            name='sad_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='blog',
+            name='views_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='blog',
+            name='wow_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,26 @@
+from django.db import migrations
+
+
+def create_search_index(apps, schema_editor):
+    from blog_app.search import backend_for
+
+    backend = backend_for(schema_editor.connection)
+    backend.create_schema()
+    backend.rebuild()
+
+
+def drop_search_index(apps, schema_editor):
+    from blog_app.search import backend_for
+
+    backend_for(schema_editor.connection).drop_schema()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog_app', '0004_blog_engagement_counters'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
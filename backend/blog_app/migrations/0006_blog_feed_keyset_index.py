@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:51
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog_app', '0005_blog_search_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='blog',
+            index=models.Index(fields=['-published_at', '-created_at', '-id'], name='blog_feed_keyset_idx'),
+        ),
+    ]
@@ -0,0 +1,67 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:52
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+PATH_STEP = 8
+
+
+def path_step(pk):
+    digits = "0123456789abcdefghijklmnopqrstuvwxyz"
+    step = ""
+    while pk:
+        pk, remainder = divmod(pk, 36)
+        step = digits[remainder] + step
+    return step.rjust(PATH_STEP, "0")
+
+
+def backfill_paths(apps, schema_editor):
+    Comment = apps.get_model("blog_app", "Comment")
+
+    def assign(queryset, parent_paths, depth):
+        batch = []
+        for comment in queryset.only("pk", "parent_id").iterator(chunk_size=2000):
+            comment.path = parent_paths.get(comment.parent_id, "") + path_step(comment.pk)
+            comment.depth = depth
+            batch.append(comment)
+        Comment.objects.bulk_update(batch, ["path", "depth"], batch_size=1000)
+        return {comment.pk: comment.path for comment in batch}
+
+    # Walk the forest one level at a time, parents before their replies
+    parent_paths = assign(Comment.objects.filter(parent__isnull=True), {}, 0)
+    depth = 1
+    while parent_paths:
+        parent_ids = list(parent_paths)
+        next_paths = {}
+        for start in range(0, len(parent_ids), 1000):
+            chunk = parent_ids[start:start + 1000]
+            next_paths.update(assign(Comment.objects.filter(parent_id__in=chunk), parent_paths, depth))
+        parent_paths = next_paths
+        depth += 1
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog_app', '0006_blog_feed_keyset_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='depth',
+            field=models.PositiveSmallIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='path',
+            field=models.CharField(blank=True, default='', editable=False, max_length=255),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['blog', 'path'], name='blog_app_co_blog_id_f974b5_idx'),
+        ),
+        migrations.RunPython(backfill_paths, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:55
+
+from django.db import migrations, models
+from django.utils.html import strip_tags
+from django.utils.text import Truncator
+
+
+def backfill_excerpts(apps, schema_editor):
+    Blog = apps.get_model("blog_app", "Blog")
+    batch = []
+    for blog in Blog.objects.only("pk", "content").iterator(chunk_size=1000):
+        blog.excerpt = Truncator(" ".join(strip_tags(blog.content or "").split())).chars(200)
+        batch.append(blog)
+        if len(batch) >= 1000:
+            Blog.objects.bulk_update(batch, ["excerpt"])
+            batch = []
+    Blog.objects.bulk_update(batch, ["excerpt"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog_app', '0007_comment_materialized_path'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='blog',
+            name='excerpt',
+            field=models.CharField(blank=True, default='', editable=False, max_length=300),
+        ),
+        migrations.RunPython(backfill_excerpts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:57
+
+from datetime import timedelta
+
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def compute_site_stats(apps, schema_editor):
+    Blog = apps.get_model("blog_app", "Blog")
+    SiteStats = apps.get_model("blog_app", "SiteStats")
+    User = apps.get_model(settings.AUTH_USER_MODEL)
+
+    now = timezone.now()
+    public = Blog.objects.filter(is_published=True, is_active=True)
+    SiteStats.objects.update_or_create(pk=1, defaults={
+        "blog_count": public.count(),
+        "user_count": User.objects.filter(is_active=True).count(),
+        "new_content_count": public.filter(created_at__gte=now - timedelta(days=7)).count(),
+        "computed_at": now,
+    })
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog_app', '0008_blog_excerpt'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SiteStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('blog_count', models.PositiveIntegerField(default=0)),
+                ('user_count', models.PositiveIntegerField(default=0)),
+                ('new_content_count', models.PositiveIntegerField(default=0)),
+                ('computed_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'verbose_name_plural': 'Site stats',
+            },
+        ),
+        migrations.RunPython(compute_site_stats, migrations.RunPython.noop),
+    ]
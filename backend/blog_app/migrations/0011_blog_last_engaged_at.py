@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog_app', '0010_notification_inbox_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='blog',
+            name='last_engaged_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog_app', '0012_image_variants'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='advertisement',
+            name='clicks_count',
+            field=models.PositiveBigIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='advertisement',
+            name='impressions_count',
+            field=models.PositiveBigIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='advertisement',
+            name='weight',
+            field=models.PositiveIntegerField(default=1),
+        ),
+        migrations.AddIndex(
+            model_name='advertisement',
+            index=models.Index(fields=['is_active', 'end_date'], name='ad_serving_idx'),
+        ),
+    ]
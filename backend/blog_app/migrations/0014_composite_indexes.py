@@ -0,0 +1,51 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:37
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog_app', '0013_advertisement_serving'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='blog',
+            name='blog_app_bl_slug_e1183e_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='blog',
+            name='blog_feed_keyset_idx',
+        ),
+        migrations.AddIndex(
+            model_name='blog',
+            index=models.Index(condition=models.Q(('is_active', True), ('is_published', True)), fields=['-published_at', '-created_at', '-id'], name='blog_public_feed_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='blog',
+            index=models.Index(condition=models.Q(('is_active', True), ('is_published', True)), fields=['category', '-published_at', '-created_at'], name='blog_category_feed_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='blog',
+            index=models.Index(condition=models.Q(('is_active', True), ('is_published', True), ('is_featured', True)), fields=['-published_at', '-created_at'], name='blog_featured_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['blog', 'parent', '-created_at'], name='comment_blog_roots_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['parent', '-created_at'], name='comment_replies_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['user', '-created_at', '-id'], name='notification_list_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reaction',
+            index=models.Index(fields=['blog', 'type'], name='reaction_blog_type_idx'),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:43
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog_app', '0015_blog_daily_stats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VisitorSketch',
+            fields=[
+                ('blog', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='visitor_sketch', serialize=False, to='blog_app.blog')),
+                ('sketch', models.BinaryField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='blogdailystats',
+            name='visitor_sketch',
+            field=models.BinaryField(blank=True, null=True),
+        ),
+    ]
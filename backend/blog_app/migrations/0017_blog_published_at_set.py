@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:52
+
+from django.db import migrations, models
+
+
+def backfill_published_at(apps, schema_editor):
+    # Rows published with queryset.update() never went through Blog.save()
+    Blog = apps.get_model("blog_app", "Blog")
+    Blog.objects.filter(is_published=True, published_at__isnull=True).update(published_at=models.F("created_at"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog_app', '0016_visitor_sketches'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_published_at, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='blog',
+            constraint=models.CheckConstraint(condition=models.Q(('is_published', False), ('published_at__isnull', False), _connector='OR'), name='blog_published_at_set'),
+        ),
+    ]
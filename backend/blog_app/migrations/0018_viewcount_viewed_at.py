@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:57
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog_app', '0017_blog_published_at_set'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='viewcount',
+            name='viewed_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def backfill_visitors(apps, schema_editor):
+    # Every (blog, ip) recorded so far is a visitor
+    BlogVisitor = apps.get_model("blog_app", "BlogVisitor")
+    ViewCount = apps.get_model("blog_app", "ViewCount")
+    pairs = ViewCount.objects.filter(ip_address__isnull=False).order_by().values_list("blog_id", "ip_address")
+    batch = []
+    for blog_id, ip_address in pairs.iterator(chunk_size=10000):
+        batch.append(BlogVisitor(blog_id=blog_id, ip_address=ip_address))
+        if len(batch) >= 10000:
+            BlogVisitor.objects.bulk_create(batch, ignore_conflicts=True)
+            batch = []
+    BlogVisitor.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog_app', '0018_viewcount_viewed_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BlogVisitor',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ip_address', models.CharField(max_length=45)),
+                ('blog', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='visitors', to='blog_app.blog')),
+            ],
+            options={
+                'unique_together': {('blog', 'ip_address')},
+            },
+        ),
+        migrations.RunPython(backfill_visitors, migrations.RunPython.noop),
+    ]
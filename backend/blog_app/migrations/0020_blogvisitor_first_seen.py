@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:26
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog_app', '0019_blog_visitors'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='blogvisitor',
+            name='first_seen',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='blogvisitor',
+            index=models.Index(fields=['first_seen'], name='blog_app_bl_first_s_25bba3_idx'),
+        ),
+    ]
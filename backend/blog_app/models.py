@@ -1,8 +1,11 @@
 from django.db import models
 from django.contrib.auth import get_user_model
-from django.utils.text import slugify
+from django.utils.html import strip_tags
+from django.utils.text import Truncator, slugify
 from django.utils import timezone
 
+from .slugs import unique_slugs
+
 User = get_user_model()
 # Create your models here.
 
@@ -52,6 +55,10 @@ class Tag(models.Model):
 # ---------------------------
 # Blog (Post) Model
 # ---------------------------
+# The blogs anyone may read
+PUBLIC = models.Q(is_active=True, is_published=True)
+
+
 class Blog(models.Model):
     title = models.CharField(max_length=255, unique=True, db_index=True)
     slug = models.SlugField(max_length=255, unique=True, blank=True)
@@ -63,7 +70,11 @@ class Blog(models.Model):
     )
     tags = models.ManyToManyField(Tag, blank=True, related_name="blogs")
     content = models.TextField()
+    # Plain-text preview of content for list pages, refreshed on save
+    excerpt = models.CharField(max_length=300, blank=True, default="", editable=False)
     image = models.ImageField(upload_to="blog_images/", blank=True, null=True)
+    # Resized WebP/AVIF/JPEG copies of image (blog_app.images)
+    image_variants = models.JSONField(blank=True, null=True, editable=False)
     is_active = models.BooleanField(default=True)
     is_featured = models.BooleanField(default=False)
     is_published = models.BooleanField(default=False)
@@ -71,30 +82,85 @@ class Blog(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     published_at = models.DateTimeField(blank=True, null=True)
 
+    # Denormalized engagement counters (kept up to date by blog_app.counters)
+    views_count = models.PositiveIntegerField(default=0)
+    comments_count = models.PositiveIntegerField(default=0)
+    like_count = models.PositiveIntegerField(default=0)
+    love_count = models.PositiveIntegerField(default=0)
+    haha_count = models.PositiveIntegerField(default=0)
+    wow_count = models.PositiveIntegerField(default=0)
+    sad_count = models.PositiveIntegerField(default=0)
+    angry_count = models.PositiveIntegerField(default=0)
+    # Last time any counter moved, for Last-Modified (blog_app.conditional)
+    last_engaged_at = models.DateTimeField(blank=True, null=True, editable=False)
+
     class Meta:
         ordering = ["-published_at", "-created_at"]
         indexes = [
-            models.Index(fields=["slug"]),
             models.Index(fields=["is_published"]),
+            # The public feed in page and keyset order (blog_app.pagination).
+            # Partial rather than led by the flags: Django filters booleans as
+            # bare WHERE "is_active", which SQLite cannot match to a column
+            models.Index(
+                fields=["-published_at", "-created_at", "-id"],
+                condition=PUBLIC,
+                name="blog_public_feed_idx",
+            ),
+            # The public feed of one category
+            models.Index(
+                fields=["category", "-published_at", "-created_at"],
+                condition=PUBLIC,
+                name="blog_category_feed_idx",
+            ),
+            # FeaturedBlogListView
+            models.Index(
+                fields=["-published_at", "-created_at"],
+                condition=PUBLIC & models.Q(is_featured=True),
+                name="blog_featured_idx",
+            ),
+        ]
+        constraints = [
+            # Keyset pages compare published_at, so no public row may lack one
+            models.CheckConstraint(
+                condition=models.Q(is_published=False) | models.Q(published_at__isnull=False),
+                name="blog_published_at_set",
+            ),
         ]
 
     def __str__(self):
         return self.title
 
+    @property
+    def reaction_counts(self):
+        """Reaction totals per type, read from the counter columns"""
+        return {
+            rtype: getattr(self, f"{rtype}_count")
+            for rtype, _ in Reaction.REACTION_CHOICES
+        }
+
+    EXCERPT_LENGTH = 200
+
+    @classmethod
+    def make_excerpt(cls, content):
+        text = " ".join(strip_tags(content or "").split())
+        return Truncator(text).chars(cls.EXCERPT_LENGTH)
+
     def save(self, *args, **kwargs):
-        # Generate unique slug
+        update_fields = kwargs.get("update_fields")
+        if update_fields is None or "content" in update_fields:
+            self.excerpt = self.make_excerpt(self.content)
+            if update_fields is not None:
+                kwargs["update_fields"] = {*update_fields, "excerpt"}
+
+        # Generate unique slug (one query for every candidate suffix)
         if not self.slug:
-            base_slug = slugify(self.title)
-            slug = base_slug
-            counter = 1
-            while Blog.objects.filter(slug=slug).exclude(pk=self.pk).exists():
-                slug = f"{base_slug}-{counter}"
-                counter += 1
-            self.slug = slug
+            self.slug = unique_slugs(Blog.objects.exclude(pk=self.pk), [slugify(self.title)])[0]
 
         # Auto set published date
         if self.is_published and self.published_at is None:
             self.published_at = timezone.now()
+            if kwargs.get("update_fields") is not None:
+                kwargs["update_fields"] = {*kwargs["update_fields"], "published_at"}
 
         # new blogs are always active
         if self.pk is None:
@@ -115,6 +181,12 @@ class Notification(models.Model):
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            # Inbox pages and unread counts (blog_app.notifications)
+            models.Index(fields=["user", "is_read", "-created_at"], name="notification_inbox_idx"),
+            # NotificationListView in keyset order, read or not
+            models.Index(fields=["user", "-created_at", "-id"], name="notification_list_idx"),
+        ]
 
     def __str__(self):
         return f"Notification for {self.user.username}: {self.message[:50]}"
@@ -131,15 +203,60 @@ class Comment(models.Model):
         "self", on_delete=models.CASCADE, null=True, blank=True, related_name="replies"
     )
 
+    # Materialized path: the fixed-width ids of every ancestor and of the
+    # comment itself, so a thread or a subtree is one prefix range scan
+    path = models.CharField(max_length=255, blank=True, default="", editable=False)
+    depth = models.PositiveSmallIntegerField(default=0, editable=False)
+
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    PATH_STEP = 8
+    MAX_DEPTH = 255 // PATH_STEP - 1
+
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["blog", "path"]),
+            # Top-level comments of a blog, newest first
+            models.Index(fields=["blog", "parent", "-created_at"], name="comment_blog_roots_idx"),
+            # Direct replies of a comment, newest first
+            models.Index(fields=["parent", "-created_at"], name="comment_replies_idx"),
+        ]
 
     def __str__(self):
         return f"Comment by {self.user} on {self.blog}"
 
+    @classmethod
+    def path_step(cls, pk):
+        """Zero-padded base36 id, so path order is tree (pre-)order"""
+        digits = "0123456789abcdefghijklmnopqrstuvwxyz"
+        step = ""
+        while pk:
+            pk, remainder = divmod(pk, 36)
+            step = digits[remainder] + step
+        return step.rjust(cls.PATH_STEP, "0")
+
+    @classmethod
+    def subtree(cls, path):
+        """
+        The comment at ``path`` and every reply below it, as a range of paths
+        that the (blog, path) index serves under any collation, unlike the LIKE
+        of ``path__startswith``: the upper bound is the path of the next id.
+        """
+        following = path[:-cls.PATH_STEP] + cls.path_step(int(path[-cls.PATH_STEP:], 36) + 1)
+        return models.Q(path__gte=path, path__lt=following)
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+
+        # The path needs our own id, so it is written right after the insert
+        if not self.path:
+            prefix = self.parent.path if self.parent_id else ""
+            self.path = prefix + self.path_step(self.pk)
+            self.depth = len(self.path) // self.PATH_STEP - 1
+            Comment.objects.filter(pk=self.pk).update(path=self.path, depth=self.depth)
+
 
 # ---------------------------
 # Like / Reaction Model
@@ -168,6 +285,10 @@ class Reaction(models.Model):
 
     class Meta:
         unique_together = ("blog", "user")
+        indexes = [
+            # Per-type counts of a blog (blog_app.counters)
+            models.Index(fields=["blog", "type"], name="reaction_blog_type_idx"),
+        ]
 
     def __str__(self):
         return f"{self.user} reacted {self.type} on {self.blog.title}"
@@ -182,7 +303,8 @@ class ViewCount(models.Model):
         User, on_delete=models.SET_NULL, null=True, blank=True, related_name="views"
     )
     ip_address = models.CharField(max_length=45, blank=True, null=True)
-    viewed_at = models.DateTimeField(auto_now_add=True)
+    # When the view happened, which buffered views are written a little after
+    viewed_at = models.DateTimeField(default=timezone.now, editable=False)
 
     class Meta:
         unique_together = [['blog', 'ip_address']]
@@ -197,6 +319,103 @@ class ViewCount(models.Model):
         return f"{self.blog.title} viewed by {self.user.username if self.user else self.ip_address}"
 
 
+class BlogVisitor(models.Model):
+    """
+    Every address that has viewed a blog: what view tracking deduplicates
+    on in "exact" unique mode (blog_app.tracking). Kept apart from ViewCount
+    so old ViewCount rows can be pruned without their visitors counting
+    again; one narrow row per distinct visitor. Visitors first seen more than
+    the rollup retention ago are pruned too (blog_app.rollup.prune_visitors),
+    so a visitor is unique per blog within that window, not forever.
+    """
+    blog = models.ForeignKey(Blog, on_delete=models.CASCADE, related_name="visitors")
+    ip_address = models.CharField(max_length=45)
+    first_seen = models.DateTimeField(default=timezone.now, editable=False)
+
+    class Meta:
+        unique_together = [["blog", "ip_address"]]
+        indexes = [
+            models.Index(fields=["first_seen"]),
+        ]
+
+    def __str__(self):
+        return f"{self.ip_address} visited {self.blog_id}"
+
+
+# ---------------------------
+# Daily engagement rollup
+# ---------------------------
+class BlogDailyStats(models.Model):
+    """
+    A blog's views, unique visitors, reactions and comments on one day,
+    aggregated from the raw rows by ``rollup_blog_stats`` (blog_app.rollup)
+    so analytics read one row per day and old ViewCount rows can be pruned.
+    """
+    blog = models.ForeignKey(Blog, on_delete=models.CASCADE, related_name="daily_stats")
+    date = models.DateField()
+    views = models.PositiveIntegerField(default=0)
+    unique_visitors = models.PositiveIntegerField(default=0)
+    reactions = models.PositiveIntegerField(default=0)
+    comments = models.PositiveIntegerField(default=0)
+    # HyperLogLog sketch of the day's visitors in "hll" unique mode (blog_app.visitors)
+    visitor_sketch = models.BinaryField(blank=True, null=True, editable=False)
+
+    class Meta:
+        unique_together = [["blog", "date"]]
+        ordering = ["-date"]
+        verbose_name_plural = "Blog daily stats"
+
+    def __str__(self):
+        return f"{self.blog_id} on {self.date}: {self.views} view(s)"
+
+
+class VisitorSketch(models.Model):
+    """
+    HyperLogLog sketch of every visitor a blog has had, kept instead of
+    ViewCount rows when VIEW_TRACKING["UNIQUE_MODE"] is "hll" (blog_app.visitors)
+    """
+    blog = models.OneToOneField(Blog, on_delete=models.CASCADE, primary_key=True, related_name="visitor_sketch")
+    sketch = models.BinaryField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Visitor sketch of {self.blog_id}"
+
+
+class RollupWatermark(models.Model):
+    """Highest primary key of a source table already added to BlogDailyStats"""
+    source = models.CharField(max_length=100, primary_key=True)
+    last_id = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.source} rolled up to {self.last_id}"
+
+
+# ---------------------------
+# Site statistics
+# ---------------------------
+class SiteStats(models.Model):
+    """
+    Single-row rollup of the public homepage statistics. Signals keep it up
+    to date as blogs are published or users come and go; the
+    ``refresh_site_stats`` command recomputes it, which also moves the
+    7-day window of ``new_content_count`` forward.
+    """
+    SINGLETON_ID = 1
+
+    blog_count = models.PositiveIntegerField(default=0)
+    user_count = models.PositiveIntegerField(default=0)
+    new_content_count = models.PositiveIntegerField(default=0)
+    computed_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        verbose_name_plural = "Site stats"
+
+    def __str__(self):
+        return f"Site stats at {self.computed_at:%Y-%m-%d %H:%M}"
+
+
 # ---------------------------
 # ContactMessage Model
 # ---------------------------
@@ -222,28 +441,26 @@ class ContactMessage(models.Model):
 class Advertisement(models.Model):
     title = models.CharField(max_length=255)
     image = models.ImageField(upload_to="advertisements/")
+    image_variants = models.JSONField(blank=True, null=True, editable=False)
     url = models.URLField(max_length=2000)
     start_date = models.DateTimeField(default=timezone.now)
     end_date = models.DateTimeField()
     is_active = models.BooleanField(default=True)
+    # Relative share of impressions while running (blog_app.ads)
+    weight = models.PositiveIntegerField(default=1)
+    # Flushed in batches by blog_app.ads
+    impressions_count = models.PositiveBigIntegerField(default=0, editable=False)
+    clicks_count = models.PositiveBigIntegerField(default=0, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            # Loading the serving index: active ads that have not ended
+            models.Index(fields=["is_active", "end_date"], name="ad_serving_idx"),
+        ]
 
 
     def __str__(self):
         return self.title
-
-    def save(self, *args, **kwargs):
-        if not self.slug:
-            base_slug = slugify(self.title)
-            counter = 1
-            slug = base_slug
-            while Advertisement.objects.filter(slug=slug).exclude(pk=self.pk).exists():
-                slug = f"{base_slug}-{counter}"
-                counter += 1
-            self.slug = slug
-
-        super().save(*args, **kwargs)
\ No newline at end of file
@@ -0,0 +1,159 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import DEFAULT_CACHE_ALIAS, cache
+from django.db import transaction
+from django.utils import timezone
+
+from .cache import is_shared_cache
+from .models import Comment, Notification
+
+
+DEFAULTS = {
+    "FRONTEND_URL": "http://localhost:5173",
+    "FANOUT_BATCH_SIZE": 1000,
+    "UNREAD_COUNT_TIMEOUT": 3600,
+    "RETENTION_DAYS": 90,
+}
+
+
+def notification_settings():
+    return {**DEFAULTS, **getattr(settings, "NOTIFICATIONS", {})}
+
+
+def post_link(blog):
+    return f"{notification_settings()['FRONTEND_URL'].rstrip('/')}/posts/{blog.slug}"
+
+
+# ---------------------------
+# Unread counts
+# ---------------------------
+# Cached per user; fan-out increments it, anything else that can change it
+# (mark-read, purge) drops it so the next read recounts from the index. A
+# process-local cache would only drop the copy of the worker that wrote, so
+# then every read counts.
+def _unread_key(user_id):
+    return f"notifications:unread:{user_id}"
+
+
+def unread_count(user_id):
+    if not is_shared_cache(DEFAULT_CACHE_ALIAS):
+        return Notification.objects.filter(user_id=user_id, is_read=False).count()
+    key = _unread_key(user_id)
+    count = cache.get(key)
+    if count is None:
+        count = Notification.objects.filter(user_id=user_id, is_read=False).count()
+        cache.add(key, count, notification_settings()["UNREAD_COUNT_TIMEOUT"])
+        count = cache.get(key, count)
+    return count
+
+
+def forget_unread_counts(user_ids):
+    cache.delete_many([_unread_key(user_id) for user_id in set(user_ids)])
+
+
+def _increment_unread(user_ids):
+    for user_id in user_ids:
+        try:
+            cache.incr(_unread_key(user_id))
+        except ValueError:
+            # Not cached: the next read counts it
+            pass
+
+
+# ---------------------------
+# Fan-out
+# ---------------------------
+def notify(user_ids, message, link=None, exclude=None):
+    """
+    Create one notification per recipient with bulk INSERTs of
+    FANOUT_BATCH_SIZE rows, and bump their cached unread counts.
+    ``exclude`` (usually the acting user) is never notified.
+    """
+    recipients = [user_id for user_id in dict.fromkeys(user_ids) if user_id and user_id != exclude]
+    batch_size = notification_settings()["FANOUT_BATCH_SIZE"]
+
+    for start in range(0, len(recipients), batch_size):
+        batch = recipients[start:start + batch_size]
+        with transaction.atomic():
+            Notification.objects.bulk_create([
+                Notification(user_id=user_id, message=message, link=link)
+                for user_id in batch
+            ])
+            transaction.on_commit(lambda batch=batch: _increment_unread(batch))
+
+    return len(recipients)
+
+
+def notify_comment(comment):
+    """
+    A new comment notifies the post author, the author of the comment it
+    replies to and everyone else who took part in the thread, once each.
+    Thread participants come from one prefix scan of the materialized path.
+    """
+    blog = comment.blog
+    actor = comment.user
+    link = post_link(blog)
+    notified = {actor.pk}
+
+    def send(user_ids, message):
+        user_ids = [user_id for user_id in user_ids if user_id not in notified]
+        notified.update(user_ids)
+        notify(user_ids, message, link)
+
+    send([blog.author_id], f'{actor.username} commented on your post "{blog.title}"')
+
+    if comment.parent_id:
+        parent = comment.parent
+        send([parent.user_id], f'{actor.username} replied to your comment on "{blog.title}"')
+
+        # The reply's own path is written after post_save; its root is the parent's
+        root_path = parent.path[:Comment.PATH_STEP]
+        participants = (
+            Comment.objects.filter(Comment.subtree(root_path), blog_id=blog.pk)
+            .order_by()
+            .values_list("user_id", flat=True)
+            .distinct()
+        )
+        send(participants, f'{actor.username} also replied in a thread on "{blog.title}"')
+
+
+def notify_published(blog):
+    notify([blog.author_id], f'Your post "{blog.title}" has been published', post_link(blog))
+
+
+# ---------------------------
+# Inbox maintenance
+# ---------------------------
+def mark_read(user_id, ids=None):
+    """Mark the user's unread notifications (or just ``ids``) read with one UPDATE"""
+    queryset = Notification.objects.filter(user_id=user_id, is_read=False)
+    if ids is not None:
+        queryset = queryset.filter(pk__in=ids)
+    updated = queryset.update(is_read=True)
+    if updated:
+        forget_unread_counts([user_id])
+    return updated
+
+
+def purge_notifications(days=None, include_unread=False, batch_size=5000):
+    """
+    Delete notifications older than ``days`` (RETENTION_DAYS by default) in
+    batches of primary keys, so no single DELETE holds locks for long.
+    Unread ones are kept unless ``include_unread``. Returns rows deleted.
+    """
+    if days is None:
+        days = notification_settings()["RETENTION_DAYS"]
+    queryset = Notification.objects.filter(created_at__lt=timezone.now() - timedelta(days=days))
+    if not include_unread:
+        queryset = queryset.filter(is_read=True)
+
+    deleted = 0
+    while True:
+        rows = list(queryset.order_by("pk").values_list("pk", "user_id", "is_read")[:batch_size])
+        if not rows:
+            break
+        Notification.objects.filter(pk__in=[pk for pk, _, _ in rows]).delete()
+        forget_unread_counts([user_id for _, user_id, is_read in rows if not is_read])
+        deleted += len(rows)
+    return deleted
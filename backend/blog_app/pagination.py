@@ -1,4 +1,19 @@
-from rest_framework.pagination import PageNumberPagination
+import base64
+import binascii
+import json
+from collections import OrderedDict
+from datetime import datetime
+
+from asgiref.sync import sync_to_async
+from django.core.exceptions import ValidationError
+from django.core.paginator import InvalidPage, Page
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+from .parallel import gather_queries
 
 class BlogPagination(PageNumberPagination):
     page_size = 4
@@ -15,7 +30,261 @@ class TagPagination(PageNumberPagination):
     page_size_query_param = 'page_size'
     max_page_size = 100
 
-class PublicBlogPagination(PageNumberPagination):
+# ---------------------------
+# Page numbers for async views
+# ---------------------------
+class AsyncPageNumberPagination(PageNumberPagination):
+    """
+    PageNumberPagination plus ``apaginate_queryset`` for async views: the
+    COUNT and the page rows are independent queries, so they run
+    concurrently; responses are identical to the sync paginator's.
+    """
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+
+        self.request = request
+        page_number = request.query_params.get(self.page_query_param) or 1
+        paginator = self.django_paginator_class(queryset, page_size)
+
+        try:
+            if page_number in self.last_page_strings:
+                # The last page is only known once the count is
+                paginator.count = await queryset.acount()
+                number = paginator.num_pages
+            else:
+                number = int(page_number)
+                if number < 1:
+                    raise InvalidPage("That page number is less than 1")
+
+            bottom = (number - 1) * page_size
+
+            def page_rows():
+                return list(queryset[bottom:bottom + page_size])
+
+            if "count" in paginator.__dict__:
+                rows = await sync_to_async(page_rows)()
+            else:
+                paginator.count, rows = await gather_queries(queryset.count, page_rows)
+            paginator.validate_number(number)
+        except (InvalidPage, ValueError) as exc:
+            msg = self.invalid_page_message.format(page_number=page_number, message=str(exc))
+            raise NotFound(msg)
+
+        self.page = Page(rows, number, paginator)
+        if paginator.num_pages > 1 and self.template is not None:
+            self.display_page_controls = True
+        return rows
+
+
+class CommentPagination(PageNumberPagination):
+    page_size = 5
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+
+# ---------------------------
+# Keyset (cursor) pagination
+# ---------------------------
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination over a fixed ordering whose last field is unique.
+
+    The cursor holds the sort key of the row it was taken from, so each page
+    is a single range query that an index on ``ordering`` can answer: no
+    COUNT(*), no OFFSET, same cost on page 1 and page 10,000. Ordering fields
+    must not be NULL for the rows being paginated (a database constraint
+    should say so); cursors with NULL keys are rejected.
+    """
+    ordering = ("-id",)
+    page_size = 10
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        return self.set_page(list(self.page_queryset(queryset, request)))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        return self.set_page([obj async for obj in self.page_queryset(queryset, request)])
+
+    def page_queryset(self, queryset, request):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.base_url = request.build_absolute_uri()
+
+        cursor = self.decode_cursor(request, queryset.model)
+        self.has_cursor = cursor is not None
+        self.reverse = bool(cursor and cursor["reverse"])
+
+        ordering = self.reversed_ordering() if self.reverse else self.ordering
+        queryset = queryset.order_by(*ordering)
+        if cursor:
+            queryset = queryset.filter(self.keyset_filter(cursor["key"], ordering))
+
+        # One extra row tells us whether another page exists
+        return queryset[:self.page_size + 1]
+
+    def set_page(self, rows):
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if self.reverse:
+            rows.reverse()
+
+        self.page = rows
+        self.has_next = has_more if not self.reverse else self.has_cursor
+        self.has_previous = self.has_cursor if not self.reverse else has_more
+        return rows
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.build_link(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.build_link(self.page[0], reverse=True)
+
+    def build_link(self, obj, reverse):
+        return replace_query_param(
+            self.base_url, self.cursor_query_param, self.encode_cursor(obj, reverse)
+        )
+
+    # Ordering helpers
+    def field_names(self):
+        return [field.lstrip('-') for field in self.ordering]
+
+    def reversed_ordering(self):
+        return tuple(field[1:] if field.startswith('-') else f'-{field}' for field in self.ordering)
+
+    def keyset_filter(self, key, ordering):
+        """Rows strictly after ``key`` in ``ordering``: (a < x) OR (a = x AND b < y) OR ..."""
+        condition = Q()
+        equal = Q()
+        for field, value in zip(ordering, key):
+            name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            condition |= equal & Q(**{f'{name}__{lookup}': value})
+            equal &= Q(**{name: value})
+        return condition
+
+    # Cursor encoding
+    def encode_cursor(self, obj, reverse):
+        key = []
+        for name in self.field_names():
+            value = getattr(obj, name)
+            key.append(value.isoformat() if isinstance(value, datetime) else value)
+        payload = json.dumps({'k': key, 'r': int(reverse)}, separators=(',', ':'))
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+    def decode_cursor(self, request, model):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            padded = encoded + '=' * (-len(encoded) % 4)
+            payload = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+            names = self.field_names()
+            if len(payload['k']) != len(names):
+                raise ValueError
+            key = [
+                model._meta.get_field(name).to_python(value)
+                for name, value in zip(names, payload['k'])
+            ]
+            # NULL never compares, so no row could follow such a key
+            if None in key:
+                raise ValueError
+            return {'key': key, 'reverse': bool(payload.get('r'))}
+        except (binascii.Error, KeyError, TypeError, ValueError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+
+class PublicBlogKeysetPagination(KeysetPagination):
+    ordering = ("-published_at", "-created_at", "-id")
+    page_size = 6
+
+
+class NotificationPagination(KeysetPagination):
+    ordering = ("-created_at", "-id")
+    page_size = 20
+
+
+class PublicBlogPagination(AsyncPageNumberPagination):
+    """
+    Page numbers by default (the frontend needs ``count`` for its pager);
+    infinite-scroll clients ask for ``?pagination=cursor`` or follow a
+    ``cursor`` link and get keyset pages instead. Ranked search results
+    always use page numbers.
+    """
     page_size = 6
     page_size_query_param = 'page_size'
-    max_page_size = 100
\ No newline at end of file
+    max_page_size = 100
+    cursor_pagination_class = PublicBlogKeysetPagination
+
+    def use_cursor(self, request):
+        params = request.query_params
+        if params.get('search', '').strip():
+            return False
+        return params.get('pagination') == 'cursor' or 'cursor' in params
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.cursor_paginator = None
+        if self.use_cursor(request):
+            self.cursor_paginator = self.cursor_pagination_class()
+            return self.cursor_paginator.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        self.cursor_paginator = None
+        if self.use_cursor(request):
+            self.cursor_paginator = self.cursor_pagination_class()
+            return await self.cursor_paginator.apaginate_queryset(queryset, request, view)
+        return await super().apaginate_queryset(queryset, request, view)
+
+    def page_window(self, queryset, request):
+        """
+        The slice of ``queryset`` that paginating ``request`` would show, for
+        a cheap look at a page without paginating; None if it needs a COUNT.
+        """
+        if self.use_cursor(request):
+            return self.cursor_pagination_class().page_queryset(queryset, request)
+        page_number = str(request.query_params.get(self.page_query_param) or 1)
+        if not page_number.isdigit() or int(page_number) < 1:
+            return None
+        page_size = self.get_page_size(request)
+        bottom = (int(page_number) - 1) * page_size
+        return queryset[bottom:bottom + page_size]
+
+    def get_paginated_response(self, data):
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.get_paginated_response(data)
+        return super().get_paginated_response(data)
@@ -0,0 +1,37 @@
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+
+
+def parallel_queries_enabled():
+    return getattr(settings, "ASYNC_PARALLEL_QUERIES", True)
+
+
+def _isolated(function):
+    def run():
+        try:
+            return function()
+        finally:
+            # Worker threads keep their own connections; honour CONN_MAX_AGE
+            close_old_connections()
+    return run
+
+
+async def gather_queries(*functions):
+    """
+    Run independent sync ORM calls concurrently and return their results.
+
+    The async ORM runs every query on the one shared sync thread, so
+    ``asyncio.gather(a.acount(), b.acount())`` still waits for each in turn.
+    Here each call gets a pool thread and therefore its own DB connection.
+    With ASYNC_PARALLEL_QUERIES off (e.g. inside test transactions, which
+    other connections cannot see) they share the sync thread instead.
+    """
+    if not parallel_queries_enabled():
+        return [await sync_to_async(function)() for function in functions]
+    return await asyncio.gather(*[
+        sync_to_async(_isolated(function), thread_sensitive=False)()
+        for function in functions
+    ])
@@ -0,0 +1,61 @@
+from django.db import IntegrityError, transaction
+
+from .counters import REACTION_COUNTER_FIELDS
+from .models import Blog, Reaction
+
+
+def reaction_counts(blog_id):
+    """Per-type reaction totals read from the blog's counter columns, or None"""
+    row = Blog.objects.filter(pk=blog_id).values(*REACTION_COUNTER_FIELDS.values()).first()
+    if row is None:
+        return None
+    return {rtype: row[field] for rtype, field in REACTION_COUNTER_FIELDS.items()}
+
+
+def toggle_reaction(blog_id, user_id, reaction_type):
+    """
+    Add, switch or (when it is already ``reaction_type``) remove a user's
+    reaction on a blog, in one short transaction.
+
+    Only the user's own reaction row is locked, so reactions from different
+    users on a hot post never wait on each other beyond the counter UPDATE.
+    Two concurrent first reactions from the same user race on the unique
+    (blog, user) constraint: the loser's insert is rolled back to a
+    savepoint and it retries against the row that won.
+
+    Returns ``(previous_reaction, user_reaction, counts)``; raises
+    Blog.DoesNotExist.
+    """
+    with transaction.atomic():
+        for attempt in range(2):
+            existing = (
+                Reaction.objects.select_for_update()
+                .filter(blog_id=blog_id, user_id=user_id)
+                .only("id", "blog_id", "type")
+                .first()
+            )
+
+            previous = existing.type if existing else None
+            if existing and existing.type == reaction_type:
+                existing.delete()
+                user_reaction = None
+            elif existing:
+                existing.type = reaction_type
+                existing.save(update_fields=["type"])
+                user_reaction = reaction_type
+            else:
+                try:
+                    with transaction.atomic():
+                        Reaction.objects.create(blog_id=blog_id, user_id=user_id, type=reaction_type)
+                except IntegrityError:
+                    if attempt:
+                        raise
+                    continue
+                user_reaction = reaction_type
+            break
+
+        # Counters were moved by the Reaction signals in this transaction
+        counts = reaction_counts(blog_id)
+        if counts is None:
+            raise Blog.DoesNotExist
+        return previous, user_reaction, counts
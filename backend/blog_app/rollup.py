@@ -0,0 +1,187 @@
+from collections import namedtuple
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Exists, OuterRef
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import BlogDailyStats, BlogVisitor, Comment, Reaction, RollupWatermark, ViewCount
+
+DEFAULTS = {
+    "RETENTION_DAYS": 90,
+    "BATCH_SIZE": 10000,
+    "SETTLE_SECONDS": 60.0,
+}
+
+# A table rolled up into BlogDailyStats: the day of each row is the date of
+# ``time_field`` and ``metrics`` maps BlogDailyStats fields to aggregates
+RollupSource = namedtuple("RollupSource", ["model", "time_field", "metrics"])
+
+SOURCES = [
+    RollupSource(ViewCount, "viewed_at", {
+        "views": Count("pk"),
+        "unique_visitors": Count("ip_address", distinct=True),
+    }),
+    RollupSource(Reaction, "created_at", {"reactions": Count("pk")}),
+    RollupSource(Comment, "created_at", {"comments": Count("pk")}),
+]
+
+
+def rollup_settings():
+    return {**DEFAULTS, **getattr(settings, "VIEW_ROLLUP", {})}
+
+
+def rolled_up_to(model):
+    """Primary key up to which ``model``'s rows are in BlogDailyStats (0 before the first rollup)"""
+    return RollupWatermark.objects.filter(source=model._meta.label).values_list("last_id", flat=True).first() or 0
+
+
+# ---------------------------
+# Aggregation
+# ---------------------------
+def locked_daily_stats(keys, fields):
+    """
+    The rollup rows of ``keys`` ((blog_id, date) pairs), created if missing
+    and locked, with only ``fields`` loaded. Inserting with conflicts
+    ignored first lets any number of writers meet on a new day safely.
+    """
+    BlogDailyStats.objects.bulk_create(
+        [BlogDailyStats(blog_id=blog_id, date=date) for blog_id, date in keys], ignore_conflicts=True
+    )
+    rows = BlogDailyStats.objects.select_for_update().filter(
+        blog_id__in={blog_id for blog_id, _ in keys},
+        date__in={date for _, date in keys},
+    ).only("id", "blog_id", "date", *fields)
+    return {(stats.blog_id, stats.date): stats for stats in rows}
+
+
+def add_daily_totals(totals):
+    """Add {(blog_id, date): {field: value}} to the rollup: one INSERT, one SELECT, one UPDATE batch"""
+    fields = sorted({field for values in totals.values() for field in values})
+    rows = locked_daily_stats(totals, fields)
+    for key, values in totals.items():
+        for field, value in values.items():
+            setattr(rows[key], field, getattr(rows[key], field) + value)
+    BlogDailyStats.objects.bulk_update([rows[key] for key in totals], fields)
+
+
+def rollup_batch(source, batch_size, settled_before):
+    """
+    Add the next ``batch_size`` rows of ``source`` past its watermark to the
+    rollup and move the watermark, in one transaction. Rows newer than
+    ``settled_before`` are left for later: a lower primary key may still
+    belong to a transaction that has not committed. Returns rows added.
+    """
+    model = source.model
+    with transaction.atomic():
+        # Also keeps two rollups of the same table from counting rows twice
+        watermark, _ = RollupWatermark.objects.select_for_update().get_or_create(source=model._meta.label)
+        pks = list(
+            model.objects.filter(pk__gt=watermark.last_id, **{f"{source.time_field}__lt": settled_before})
+            .order_by("pk").values_list("pk", flat=True)[:batch_size]
+        )
+        if not pks:
+            return 0
+
+        rows = (
+            model.objects.filter(pk__gt=watermark.last_id, pk__lte=pks[-1])
+            .order_by()
+            .values("blog_id", day=TruncDate(source.time_field))
+            .annotate(**source.metrics)
+        )
+        add_daily_totals({
+            (row["blog_id"], row["day"]): {field: row[field] for field in source.metrics}
+            for row in rows
+        })
+        watermark.last_id = pks[-1]
+        watermark.save(update_fields=["last_id", "updated_at"])
+    return len(pks)
+
+
+def rollup(batch_size=None, settle_seconds=None):
+    """
+    Bring BlogDailyStats up to date with every source table, processing only
+    rows past each watermark. Run one at a time (e.g. from cron). Returns
+    {model label: rows added}.
+    """
+    config = rollup_settings()
+    batch_size = batch_size or config["BATCH_SIZE"]
+    if settle_seconds is None:
+        settle_seconds = config["SETTLE_SECONDS"]
+    settled_before = timezone.now() - timedelta(seconds=settle_seconds)
+
+    added = {}
+    for source in SOURCES:
+        total = 0
+        while processed := rollup_batch(source, batch_size, settled_before):
+            total += processed
+        added[source.model._meta.label] = total
+    return added
+
+
+# ---------------------------
+# Compaction
+# ---------------------------
+def prune_views(days=None, batch_size=None):
+    """
+    Delete ViewCount rows older than ``days`` (RETENTION_DAYS by default)
+    that are already rolled up, in batches of primary keys. Their views stay
+    in BlogDailyStats and in views_count, and their visitors in BlogVisitor
+    until prune_visitors(), so a returning visitor does not count twice
+    within the window. Returns rows deleted.
+    """
+    config = rollup_settings()
+    if days is None:
+        days = config["RETENTION_DAYS"]
+    batch_size = batch_size or config["BATCH_SIZE"]
+    queryset = ViewCount.objects.filter(
+        viewed_at__lt=timezone.now() - timedelta(days=days),
+        pk__lte=rolled_up_to(ViewCount),
+    )
+
+    deleted = 0
+    while True:
+        pks = list(queryset.order_by("pk").values_list("pk", flat=True)[:batch_size])
+        if not pks:
+            break
+        ViewCount.objects.filter(pk__in=pks).delete()
+        deleted += len(pks)
+    return deleted
+
+
+def prune_visitors(days=None, batch_size=None):
+    """
+    Delete BlogVisitor rows first seen more than ``days`` ago (RETENTION_DAYS
+    by default) whose ViewCount row is already pruned, in batches of primary
+    keys, so exact unique counting keeps a bounded table. The approximation:
+    a visitor who comes back after that counts as a new view. Returns rows
+    deleted.
+    """
+    config = rollup_settings()
+    if days is None:
+        days = config["RETENTION_DAYS"]
+    batch_size = batch_size or config["BATCH_SIZE"]
+    queryset = BlogVisitor.objects.filter(
+        ~Exists(ViewCount.objects.filter(blog_id=OuterRef("blog_id"), ip_address=OuterRef("ip_address"))),
+        first_seen__lt=timezone.now() - timedelta(days=days),
+    )
+
+    deleted = 0
+    while True:
+        pks = list(queryset.order_by("pk").values_list("pk", flat=True)[:batch_size])
+        if not pks:
+            break
+        BlogVisitor.objects.filter(pk__in=pks).delete()
+        deleted += len(pks)
+    return deleted
+
+
+# ---------------------------
+# Reads
+# ---------------------------
+def daily_stats(blog_id, days=30):
+    """The blog's rollup rows of the last ``days`` days, oldest first"""
+    since = timezone.localdate() - timedelta(days=days - 1)
+    return BlogDailyStats.objects.filter(blog_id=blog_id, date__gte=since).defer("visitor_sketch").order_by("date")
@@ -0,0 +1,288 @@
+import re
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, OperationalError, connections
+from django.db.models import FloatField, Q, TextField
+from django.db.models.expressions import RawSQL
+
+from .models import Blog, Tag
+
+
+SEARCH_TABLE = "blog_app_blogsearch"
+FTS_TABLE = "blog_app_blog_fts"
+
+SNIPPET_START = "<mark>"
+SNIPPET_STOP = "</mark>"
+
+
+def search_terms(query):
+    """Split user input into plain word tokens; no operator ever reaches the engine"""
+    return re.findall(r"\w+", query.lower())[:16]
+
+
+# ---------------------------
+# Backends
+# ---------------------------
+class SimpleSearchBackend:
+    """
+    Fallback for databases without a full-text engine: the old icontains
+    filter, unranked and without snippets.
+    """
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def qn(self, name):
+        return self.connection.ops.quote_name(name)
+
+    def create_schema(self):
+        pass
+
+    def drop_schema(self):
+        pass
+
+    def index(self, blog_ids):
+        pass
+
+    def remove(self, blog_ids):
+        pass
+
+    def rebuild(self):
+        return 0
+
+    def search(self, queryset, query):
+        queryset = queryset.filter(
+            Q(title__icontains=query)
+            | Q(content__icontains=query)
+            | Q(tags__name__icontains=query)
+        ).distinct()
+        return self.unranked(queryset)
+
+    def unranked(self, queryset):
+        """Same annotations as a ranked search, so callers can always order by rank"""
+        return queryset.annotate(
+            search_rank=RawSQL("0", [], output_field=FloatField()),
+            search_snippet=RawSQL("NULL", [], output_field=TextField()),
+        )
+
+    def source_tables(self):
+        """Quoted names of the tables a search document is built from"""
+        through = Blog.tags.through._meta
+        return {
+            "blog": self.qn(Blog._meta.db_table),
+            "tag": self.qn(Tag._meta.db_table),
+            "through": self.qn(through.db_table),
+            "through_blog": self.qn(through.get_field("blog").column),
+            "through_tag": self.qn(through.get_field("tag").column),
+        }
+
+    def _id_filter(self, blog_ids, column):
+        if blog_ids is None:
+            return "", []
+        blog_ids = list(blog_ids)
+        if not blog_ids:
+            return "WHERE 1 = 0", []
+        placeholders = ", ".join(["%s"] * len(blog_ids))
+        return f"WHERE {column} IN ({placeholders})", blog_ids
+
+
+class PostgresSearchBackend(SimpleSearchBackend):
+    """
+    Weighted tsvector per blog (title A, tags B, content C) in a side table
+    with a GIN index; ranked with ts_rank, highlighted with ts_headline.
+    """
+
+    HEADLINE_OPTIONS = (
+        f"StartSel={SNIPPET_START}, StopSel={SNIPPET_STOP}, "
+        "MaxWords=35, MinWords=15, MaxFragments=2"
+    )
+
+    @property
+    def config(self):
+        return getattr(settings, "SEARCH_CONFIG", "english")
+
+    def create_schema(self):
+        table = self.qn(SEARCH_TABLE)
+        blog = self.qn(Blog._meta.db_table)
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f"CREATE TABLE IF NOT EXISTS {table} ("
+                f"blog_id bigint PRIMARY KEY REFERENCES {blog} (id) "
+                "ON DELETE CASCADE DEFERRABLE INITIALLY DEFERRED, "
+                "document tsvector NOT NULL)"
+            )
+            cursor.execute(
+                f"CREATE INDEX IF NOT EXISTS {self.qn(SEARCH_TABLE + '_document_gin')} "
+                f"ON {table} USING GIN (document)"
+            )
+
+    def drop_schema(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(f"DROP TABLE IF EXISTS {self.qn(SEARCH_TABLE)}")
+
+    def index(self, blog_ids):
+        t = self.source_tables()
+        where, params = self._id_filter(blog_ids, "b.id")
+        # An explicit WHERE keeps ON CONFLICT from parsing as part of the join
+        where = where or "WHERE true"
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {self.qn(SEARCH_TABLE)} (blog_id, document) "
+                "SELECT b.id, "
+                "setweight(to_tsvector(%s::regconfig, coalesce(b.title, '')), 'A') || "
+                "setweight(to_tsvector(%s::regconfig, coalesce(tg.names, '')), 'B') || "
+                "setweight(to_tsvector(%s::regconfig, coalesce(b.content, '')), 'C') "
+                f"FROM {t['blog']} b "
+                "LEFT JOIN LATERAL ("
+                "SELECT string_agg(tag.name, ' ') AS names "
+                f"FROM {t['through']} bt JOIN {t['tag']} tag ON tag.id = bt.{t['through_tag']} "
+                f"WHERE bt.{t['through_blog']} = b.id"
+                ") tg ON true "
+                f"{where} "
+                "ON CONFLICT (blog_id) DO UPDATE SET document = EXCLUDED.document",
+                [self.config] * 3 + params,
+            )
+            return cursor.rowcount
+
+    def remove(self, blog_ids):
+        # Rows go away with their blog through ON DELETE CASCADE
+        pass
+
+    def rebuild(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(f"TRUNCATE {self.qn(SEARCH_TABLE)}")
+        return self.index(None)
+
+    def search(self, queryset, query):
+        terms = search_terms(query)
+        if not terms:
+            return self.unranked(queryset).none()
+
+        table = self.qn(SEARCH_TABLE)
+        blog = self.qn(Blog._meta.db_table)
+        tsquery = "to_tsquery(%s::regconfig, %s)"
+        params = [self.config, " & ".join(f"{term}:*" for term in terms)]
+
+        return queryset.filter(
+            pk__in=RawSQL(f"SELECT blog_id FROM {table} WHERE document @@ {tsquery}", params)
+        ).annotate(
+            search_rank=RawSQL(
+                f"SELECT ts_rank(document, {tsquery}) FROM {table} WHERE blog_id = {blog}.id",
+                params,
+                output_field=FloatField(),
+            ),
+            search_snippet=RawSQL(
+                f"ts_headline(%s::regconfig, {blog}.content, {tsquery}, %s)",
+                [self.config, *params, self.HEADLINE_OPTIONS],
+                output_field=TextField(),
+            ),
+        )
+
+
+class SQLiteSearchBackend(SimpleSearchBackend):
+    """
+    FTS5 shadow table keyed by blog id, for local and test runs; ranked with
+    bm25 (title weighted over tags over content), highlighted with snippet().
+    """
+
+    def create_schema(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {self.qn(FTS_TABLE)} "
+                "USING fts5(title, tags, content, tokenize='porter unicode61')"
+            )
+
+    def drop_schema(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(f"DROP TABLE IF EXISTS {self.qn(FTS_TABLE)}")
+
+    def index(self, blog_ids):
+        t = self.source_tables()
+        self.remove(blog_ids)
+        where, params = self._id_filter(blog_ids, "b.id")
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {self.qn(FTS_TABLE)} (rowid, title, tags, content) "
+                "SELECT b.id, b.title, coalesce(("
+                "SELECT group_concat(tag.name, ' ') "
+                f"FROM {t['through']} bt JOIN {t['tag']} tag ON tag.id = bt.{t['through_tag']} "
+                f"WHERE bt.{t['through_blog']} = b.id"
+                f"), ''), b.content FROM {t['blog']} b {where}",
+                params,
+            )
+            return cursor.rowcount
+
+    def remove(self, blog_ids):
+        where, params = self._id_filter(blog_ids, "rowid")
+        with self.connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {self.qn(FTS_TABLE)} {where}", params)
+
+    def rebuild(self):
+        return self.index(None)
+
+    def search(self, queryset, query):
+        terms = search_terms(query)
+        if not terms:
+            return self.unranked(queryset).none()
+
+        fts = self.qn(FTS_TABLE)
+        blog = self.qn(Blog._meta.db_table)
+        match = " ".join(f'"{term}"*' for term in terms)
+
+        def correlated(expression, output_field):
+            return RawSQL(
+                f"SELECT {expression} FROM {fts} WHERE {fts} MATCH %s AND rowid = {blog}.id",
+                [match],
+                output_field=output_field,
+            )
+
+        return queryset.filter(
+            pk__in=RawSQL(f"SELECT rowid FROM {fts} WHERE {fts} MATCH %s", [match])
+        ).annotate(
+            # bm25() is lower-is-better, flip it so rank sorts descending everywhere
+            search_rank=correlated(f"-bm25({fts}, 10.0, 5.0, 1.0)", FloatField()),
+            search_snippet=correlated(
+                f"snippet({fts}, 2, '{SNIPPET_START}', '{SNIPPET_STOP}', '…', 24)",
+                TextField(),
+            ),
+        )
+
+
+# ---------------------------
+# Backend selection
+# ---------------------------
+_backends = {}
+
+
+def _fts5_available(connection):
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT sqlite_compileoption_used('ENABLE_FTS5')")
+            if cursor.fetchone()[0]:
+                return True
+            cursor.execute("PRAGMA module_list")
+            return any(row[0] == "fts5" for row in cursor.fetchall())
+    except OperationalError:
+        return False
+
+
+def backend_for(connection):
+    if connection.vendor == "postgresql":
+        return PostgresSearchBackend(connection)
+    if connection.vendor == "sqlite" and _fts5_available(connection):
+        return SQLiteSearchBackend(connection)
+    return SimpleSearchBackend(connection)
+
+
+def get_search_backend(using=DEFAULT_DB_ALIAS):
+    if using not in _backends:
+        _backends[using] = backend_for(connections[using])
+    return _backends[using]
+
+
+async def aget_search_backend(using=DEFAULT_DB_ALIAS):
+    """get_search_backend() for async views; probing the database only happens once"""
+    if using not in _backends:
+        await sync_to_async(get_search_backend)(using)
+    return _backends[using]
@@ -0,0 +1,256 @@
+import random
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from .ads import ad_index
+from .cache import bump_version
+from .models import Advertisement, Blog, BlogVisitor, Category, Comment, Notification, Reaction, Tag, ViewCount
+from .rollup import rollup
+from .search import get_search_backend
+from .stats import refresh_site_stats
+
+User = get_user_model()
+
+# Rows generated per kind; per-blog and per-user volumes apply to every blog/user
+DEFAULT_VOLUMES = {
+    "users": 50,
+    "authors": 5,
+    "categories": 8,
+    "tags": 30,
+    "blogs": 40,
+    "tags_per_blog": 3,
+    "comments_per_blog": 30,
+    "comment_depth": 8,
+    "reactions_per_blog": 25,
+    "views_per_blog": 100,
+    "notifications_per_user": 10,
+    "ads": 5,
+}
+
+REACTION_TYPES = [rtype for rtype, _ in Reaction.REACTION_CHOICES]
+
+WORDS = (
+    "django react query index cache thread comment post view reaction tag category "
+    "author server client latency budget page cursor search feed stream model field"
+).split()
+
+
+class Seeder:
+    """
+    Synthetic users, blogs, comment trees, reactions, views and
+    notifications written with bulk_create.
+
+    Primary keys are handed out here, after the current maximum of each
+    table, so comment paths and the blog counters are known before anything
+    is written. Blogs and everything hanging off them are generated and
+    written ``batch_size`` rows at a time, one transaction per blog chunk,
+    so memory stays flat at any volume. The same ``seed`` yields the same
+    data.
+    """
+
+    def __init__(self, volumes=None, seed=0, batch_size=2000, prefix="seed", password="password"):
+        self.volumes = {**DEFAULT_VOLUMES, **(volumes or {})}
+        self.rng = random.Random(seed)
+        self.batch_size = max(int(batch_size), 1)
+        self.prefix = prefix
+        self.password = password
+        self.now = timezone.now()
+        self.created = {}
+
+    def next_ids(self, model, count):
+        start = (model._default_manager.aggregate(top=Max("pk"))["top"] or 0) + 1
+        return range(start, start + count)
+
+    def write(self, model, objs):
+        model._default_manager.bulk_create(objs, batch_size=self.batch_size)
+        self.created[model._meta.label] = self.created.get(model._meta.label, 0) + len(objs)
+
+    def words(self, count):
+        return " ".join(self.rng.choice(WORDS) for _ in range(count))
+
+    # ---------------------------
+    # Generators
+    # ---------------------------
+    def seed_users(self):
+        volumes = self.volumes
+        password = make_password(self.password)
+        users = []
+        for n, pk in enumerate(self.next_ids(User, volumes["users"])):
+            role = "ADMIN" if n == 0 else "AUTHOR" if n <= volumes["authors"] else "USER"
+            users.append(User(
+                pk=pk,
+                username=f"{self.prefix}-user-{pk}",
+                email=f"{self.prefix}-user-{pk}@example.com",
+                password=password,
+                role=role,
+                is_staff=role == "ADMIN",
+            ))
+        self.write(User, users)
+        self.user_ids = [user.pk for user in users]
+        self.author_ids = [user.pk for user in users if user.role in ("ADMIN", "AUTHOR")]
+
+    def seed_taxonomy(self):
+        categories = [
+            Category(pk=pk, name=f"{self.prefix} category {pk}", slug=f"{self.prefix}-category-{pk}")
+            for pk in self.next_ids(Category, self.volumes["categories"])
+        ]
+        tags = [
+            Tag(pk=pk, name=f"{self.prefix} tag {pk}", slug=f"{self.prefix}-tag-{pk}")
+            for pk in self.next_ids(Tag, self.volumes["tags"])
+        ]
+        self.write(Category, categories)
+        self.write(Tag, tags)
+        self.category_ids = [category.pk for category in categories]
+        self.tag_ids = [tag.pk for tag in tags]
+
+    def comment_tree(self, blog_id, ids):
+        """Comments of one blog; half the replies extend the newest thread, so some run deep"""
+        depth_limit = min(self.volumes["comment_depth"], Comment.MAX_DEPTH)
+        comments = []
+        for pk in ids:
+            parent = None
+            if comments and self.rng.random() < 0.7:
+                parent = comments[-1] if self.rng.random() < 0.5 else self.rng.choice(comments)
+                if parent.depth >= depth_limit:
+                    parent = None
+            path = (parent.path if parent else "") + Comment.path_step(pk)
+            comments.append(Comment(
+                pk=pk,
+                blog_id=blog_id,
+                user_id=self.rng.choice(self.user_ids),
+                content=self.words(12),
+                parent_id=parent.pk if parent else None,
+                path=path,
+                depth=len(path) // Comment.PATH_STEP - 1,
+            ))
+        return comments
+
+    def seed_blog_chunk(self, blog_ids, comment_ids):
+        volumes = self.volumes
+        blogs, tagged, comments, reactions, views = [], [], [], [], []
+        Through = Blog.tags.through
+
+        for pk in blog_ids:
+            published = self.rng.random() < 0.9
+            content = self.words(120)
+            blog = Blog(
+                pk=pk,
+                title=f"{self.prefix} post {pk}",
+                slug=f"{self.prefix}-post-{pk}",
+                author_id=self.rng.choice(self.author_ids),
+                category_id=self.rng.choice(self.category_ids) if self.category_ids else None,
+                content=content,
+                excerpt=Blog.make_excerpt(content),
+                is_published=published,
+                is_featured=published and self.rng.random() < 0.1,
+                published_at=self.now - timedelta(minutes=self.rng.randrange(525600)) if published else None,
+            )
+            blogs.append(blog)
+
+            for tag_id in self.rng.sample(self.tag_ids, min(volumes["tags_per_blog"], len(self.tag_ids))):
+                tagged.append(Through(blog_id=pk, tag_id=tag_id))
+
+            tree = self.comment_tree(pk, [next(comment_ids) for _ in range(volumes["comments_per_blog"])])
+            comments.extend(tree)
+            blog.comments_count = len(tree)
+
+            # (blog, user) and (blog, ip) are unique
+            for user_id in self.rng.sample(self.user_ids, min(volumes["reactions_per_blog"], len(self.user_ids))):
+                rtype = self.rng.choice(REACTION_TYPES)
+                reactions.append(Reaction(blog_id=pk, user_id=user_id, type=rtype))
+                setattr(blog, f"{rtype}_count", getattr(blog, f"{rtype}_count") + 1)
+
+            for n in range(volumes["views_per_blog"]):
+                views.append(ViewCount(
+                    blog_id=pk,
+                    user_id=self.rng.choice(self.user_ids) if self.rng.random() < 0.3 else None,
+                    ip_address=f"10.{n >> 16 & 255}.{n >> 8 & 255}.{n & 255}",
+                ))
+            blog.views_count = volumes["views_per_blog"]
+
+        with transaction.atomic():
+            self.write(Blog, blogs)
+            self.write(Through, tagged)
+            self.write(Comment, comments)
+            self.write(Reaction, reactions)
+            self.write(ViewCount, views)
+            self.write(BlogVisitor, [BlogVisitor(blog_id=view.blog_id, ip_address=view.ip_address) for view in views])
+
+    def seed_blogs(self):
+        volumes = self.volumes
+        blog_ids = list(self.next_ids(Blog, volumes["blogs"]))
+        comment_ids = iter(self.next_ids(Comment, volumes["blogs"] * volumes["comments_per_blog"]))
+
+        # Enough blogs per chunk to fill about one batch of their busiest child table
+        per_blog = max(volumes["comments_per_blog"], volumes["reactions_per_blog"], volumes["views_per_blog"], 1)
+        chunk = max(self.batch_size // per_blog, 1)
+        for start in range(0, len(blog_ids), chunk):
+            self.seed_blog_chunk(blog_ids[start:start + chunk], comment_ids)
+
+    def seed_notifications(self):
+        per_user = self.volumes["notifications_per_user"]
+        batch = []
+        for user_id in self.user_ids:
+            for n in range(per_user):
+                batch.append(Notification(
+                    user_id=user_id,
+                    message=f"New comment: {self.words(6)}",
+                    link=f"https://example.com/posts/{self.prefix}-post-{n}",
+                    is_read=self.rng.random() < 0.5,
+                ))
+            if len(batch) >= self.batch_size:
+                self.write(Notification, batch)
+                batch = []
+        self.write(Notification, batch)
+
+    def seed_ads(self):
+        ads = [
+            Advertisement(
+                title=f"{self.prefix} ad {n}",
+                image=f"advertisements/{self.prefix}-ad-{n}.png",
+                url=f"https://example.com/ads/{n}",
+                start_date=self.now - timedelta(days=1),
+                end_date=self.now + timedelta(days=30),
+                weight=self.rng.randint(1, 5),
+            )
+            for n in range(self.volumes["ads"])
+        ]
+        self.write(Advertisement, ads)
+
+    # ---------------------------
+    # Entry point
+    # ---------------------------
+    def run(self):
+        """Generate everything and return {model label: rows created}"""
+        self.seed_users()
+        self.seed_taxonomy()
+        self.seed_blogs()
+        self.seed_notifications()
+        self.seed_ads()
+        self.finish()
+        return self.created
+
+    def finish(self):
+        # Explicit primary keys leave PostgreSQL sequences behind
+        models = [User, Category, Tag, Blog, Comment]
+        with connection.cursor() as cursor:
+            for sql in connection.ops.sequence_reset_sql(no_style(), models):
+                cursor.execute(sql)
+
+        # bulk_create sends no signals: rebuild what they would have maintained
+        get_search_backend().rebuild()
+        refresh_site_stats()
+        rollup(batch_size=self.batch_size, settle_seconds=0)
+        for model in (Blog, Category, Tag, User, Advertisement):
+            bump_version(model)
+        ad_index.invalidate()
+
+
+def seed(volumes=None, **options):
+    return Seeder(volumes, **options).run()
@@ -1,10 +1,11 @@
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
-from .models import Category, Tag, Blog, Comment, Reaction
+from .models import Category, Tag, Blog, BlogDailyStats, Comment, Reaction, Notification, Advertisement
 from accounts.serializers import UserSerializer 
 from django.utils.timesince import timesince
-from collections import Counter
-from django.db.models import Count
+from django.urls import reverse
+from .images import SrcsetField
+from .threads import attach_threads
 
 User = get_user_model()
 
@@ -40,6 +41,8 @@ class BlogSerializer(serializers.ModelSerializer):
     tag_ids = serializers.PrimaryKeyRelatedField(
         queryset=Tag.objects.all(), source="tags", many=True, write_only=True, required=False
     )
+    search_snippet = serializers.SerializerMethodField()
+    image_srcset = SrcsetField("image", "image_variants")
 
     class Meta:
         model = Blog
@@ -53,14 +56,20 @@ class BlogSerializer(serializers.ModelSerializer):
             "tag_ids",
             "content",
             "image",
+            "image_srcset",
             "is_published",
             "created_at",
             "updated_at",
             "published_at",
             "is_featured",
             "is_active",
+            "search_snippet",
         ]
 
+    def get_search_snippet(self, obj):
+        """Highlighted content excerpt, only present on search results"""
+        return getattr(obj, "search_snippet", None)
+
     def create(self, validated_data):
         tags = validated_data.pop("tags", [])
         blog = Blog.objects.create(**validated_data)
@@ -77,6 +86,18 @@ class BlogSerializer(serializers.ModelSerializer):
         return instance
 
 
+class BlogListSerializer(BlogSerializer):
+    """Admin/author table rows: excerpt instead of the full content"""
+
+    class Meta(BlogSerializer.Meta):
+        fields = [
+            field if field != "content" else "excerpt"
+            for field in BlogSerializer.Meta.fields
+            if field not in ("category_id", "tag_ids")
+        ]
+        read_only_fields = fields
+
+
 # ---------------------------
 # Blog Publish Serializer
 # ---------------------------
@@ -106,15 +127,45 @@ class BlogPublishSerializer(serializers.ModelSerializer):
 class CommentSerializer(serializers.ModelSerializer):
     user = UserSerializer(read_only=True)
     replies = serializers.SerializerMethodField()
+    replies_count = serializers.SerializerMethodField()
+    has_more_replies = serializers.SerializerMethodField()
 
     class Meta:
         model = Comment
-        fields = ["id", "blog", "user", "content", "parent", "replies", "created_at", "updated_at"]
+        fields = [
+            "id", "blog", "user", "content", "parent", "depth", "replies",
+            "replies_count", "has_more_replies", "created_at", "updated_at",
+        ]
+        # The blog comes from the URL (see CommentListCreateView)
+        read_only_fields = ["blog", "depth"]
+
+    def validate(self, attrs):
+        parent = attrs.get("parent")
+        if self.instance is not None and "parent" in attrs and parent != self.instance.parent:
+            raise serializers.ValidationError({"parent": "A comment cannot be moved to another thread."})
+        if parent is not None and self.instance is None:
+            if parent.blog_id != self.context.get("blog_id"):
+                raise serializers.ValidationError({"parent": "Reply must belong to the same blog."})
+            if parent.depth >= Comment.MAX_DEPTH:
+                raise serializers.ValidationError({"parent": "Maximum reply depth reached."})
+        return attrs
+
+    def _thread(self, obj):
+        # Trees are normally attached by the view; a lone comment loads its own
+        if not hasattr(obj, "thread_replies"):
+            attach_threads([obj])
+        return obj
 
     def get_replies(self, obj):
-        replies = obj.replies.select_related("user").all()
-        return CommentSerializer(replies, many=True).data
-        
+        replies = self._thread(obj).thread_replies
+        return CommentSerializer(replies, many=True, context=self.context).data
+
+    def get_replies_count(self, obj):
+        return self._thread(obj).replies_count
+
+    def get_has_more_replies(self, obj):
+        return self._thread(obj).has_more_replies
+
     def get_time_ago(self, obj):
         return timesince(obj.created_at) + " ago"
 
@@ -128,6 +179,30 @@ class ReactionSerializer(serializers.ModelSerializer):
         model = Reaction
         fields = ["id", "user", "type", "created_at"]
 
+# ---------------------------
+# Notification Serializers
+# ---------------------------
+class NotificationSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Notification
+        fields = ["id", "message", "link", "is_read", "created_at"]
+        read_only_fields = fields
+
+
+class NotificationMarkReadSerializer(serializers.Serializer):
+    """``ids`` to mark read; omit it to mark the whole inbox read"""
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1), required=False, max_length=1000
+    )
+
+
+class BlogDailyStatsSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = BlogDailyStats
+        fields = ["date", "views", "unique_visitors", "reactions", "comments"]
+        read_only_fields = fields
+
+
 class FeaturedBlogSerializer(serializers.ModelSerializer):
     category = serializers.SlugRelatedField(
         slug_field='name', 
@@ -154,34 +229,29 @@ class PublicBlogSerializer(serializers.ModelSerializer):
     author = UserSerializer(read_only=True)
     category = CategorySerializer(read_only=True)
     tags = TagSerializer(many=True, read_only=True)
-    views_count = serializers.SerializerMethodField()
-    comments_count = serializers.SerializerMethodField()
+    views_count = serializers.IntegerField(read_only=True)
+    comments_count = serializers.IntegerField(read_only=True)
     user_reaction = serializers.SerializerMethodField()
-    reaction_counts = serializers.SerializerMethodField()
-
-    def get_views_count(self, obj):
-        """Get unique view count from ViewCount model"""
-        return obj.views.count()
-    
-    def get_comments_count(self, obj):
-        """Get comment count"""
-
-        if hasattr(obj, 'comments_count'):
-            return obj.comments_count
-        return obj.comments.count()
+    reaction_counts = serializers.ReadOnlyField()
+    search_snippet = serializers.SerializerMethodField()
+    image_srcset = SrcsetField("image", "image_variants")
 
     def get_user_reaction(self, obj):
         """Get current user's reaction to this blog"""
+        # Resolved for the whole page by the view's user_reaction_prefetch
+        if hasattr(obj, 'current_user_reactions'):
+            reactions = obj.current_user_reactions
+            return reactions[0].type if reactions else None
+
         request = self.context.get('request')
         if request and request.user.is_authenticated:
             reaction = obj.reactions.filter(user=request.user).first()
             return reaction.type if reaction else None
         return None
-    
-    def get_reaction_counts(self, obj):
-        """Get counts for each reaction type"""
-        counts = obj.reactions.values('type').annotate(count=Count('type'))
-        return {item['type']: item['count'] for item in counts}
+
+    def get_search_snippet(self, obj):
+        """Highlighted content excerpt, only present on search results"""
+        return getattr(obj, "search_snippet", None)
 
     class Meta:
         model = Blog
@@ -194,10 +264,39 @@ class PublicBlogSerializer(serializers.ModelSerializer):
             "tags",
             "content", 
             "image", 
+            "image_srcset",
             "published_at", 
             "created_at",
             "views_count", 
             "comments_count",
             "user_reaction", 
-            "reaction_counts"
-        ]
\ No newline at end of file
+            "reaction_counts",
+            "search_snippet",
+        ]
+
+class PublicBlogListSerializer(PublicBlogSerializer):
+    """Feed cards: excerpt instead of the full content, counters only"""
+
+    class Meta(PublicBlogSerializer.Meta):
+        fields = [
+            field if field != "content" else "excerpt"
+            for field in PublicBlogSerializer.Meta.fields
+        ]
+
+
+# ---------------------------
+# Advertisement Serializer
+# ---------------------------
+class AdvertisementSerializer(serializers.ModelSerializer):
+    """A served ad; links go through the click endpoint so clicks are counted"""
+    image_srcset = SrcsetField("image", "image_variants")
+    click_url = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Advertisement
+        fields = ["id", "title", "image", "image_srcset", "click_url"]
+
+    def get_click_url(self, obj):
+        url = reverse("ad-click", args=[obj.pk])
+        request = self.context.get("request")
+        return request.build_absolute_uri(url) if request else url
@@ -0,0 +1,275 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_init, post_save, pre_delete
+from django.dispatch import receiver
+
+from .ads import ad_index
+from .cache import bump_version
+from .counters import apply_deltas, reaction_deltas
+from .images import image_fields, image_processor
+from .models import Advertisement, Blog, Category, Comment, Reaction, Tag, ViewCount
+from .notifications import notify_comment, notify_published
+from .search import get_search_backend
+from .stats import apply_stats_deltas, blog_stats_deltas, refresh_site_stats
+
+User = get_user_model()
+
+
+def _loaded(instance, *fields):
+    """True when none of ``fields`` is deferred on ``instance``"""
+    return all(field in instance.__dict__ for field in fields)
+
+
+def _deleted_with_blog(origin):
+    """True when the delete cascades from a Blog, whose counters go with it"""
+    return isinstance(origin, Blog) or getattr(origin, "model", None) is Blog
+
+
+# ---------------------------
+# View counters
+# ---------------------------
+# Views are only removed together with their blog or pruned once rolled up
+# (blog_app.rollup), neither of which may lower views_count, so there is
+# deliberately no post_delete receiver: it would also disable fast deletes.
+@receiver(post_save, sender=ViewCount)
+def count_view(sender, instance, created, **kwargs):
+    if created:
+        apply_deltas(instance.blog_id, {"views_count": 1})
+
+
+# ---------------------------
+# Comment counters
+# ---------------------------
+@receiver(post_save, sender=Comment)
+def count_comment(sender, instance, created, **kwargs):
+    if created:
+        apply_deltas(instance.blog_id, {"comments_count": 1})
+
+
+@receiver(post_delete, sender=Comment)
+def uncount_comment(sender, instance, origin=None, **kwargs):
+    if not _deleted_with_blog(origin):
+        apply_deltas(instance.blog_id, {"comments_count": -1})
+
+
+# ---------------------------
+# Reaction counters
+# ---------------------------
+@receiver(post_init, sender=Reaction)
+def remember_reaction_type(sender, instance, **kwargs):
+    # Type as stored in the DB, so a changed reaction can move its count
+    instance._stored_type = instance.type if instance.pk else None
+
+
+@receiver(post_save, sender=Reaction)
+def count_reaction(sender, instance, created, **kwargs):
+    old_type = None if created else instance._stored_type
+    if old_type != instance.type:
+        apply_deltas(instance.blog_id, reaction_deltas(old_type, instance.type))
+    instance._stored_type = instance.type
+
+
+@receiver(post_delete, sender=Reaction)
+def uncount_reaction(sender, instance, origin=None, **kwargs):
+    if not _deleted_with_blog(origin):
+        apply_deltas(instance.blog_id, reaction_deltas(old_type=instance._stored_type))
+
+
+# ---------------------------
+# Search index
+# ---------------------------
+def _reindex(blog_ids):
+    blog_ids = list(blog_ids)
+    if blog_ids:
+        transaction.on_commit(lambda: get_search_backend().index(blog_ids))
+
+
+@receiver(post_save, sender=Blog)
+def index_blog(sender, instance, **kwargs):
+    _reindex([instance.pk])
+
+
+@receiver(post_delete, sender=Blog)
+def unindex_blog(sender, instance, **kwargs):
+    get_search_backend().remove([instance.pk])
+
+
+@receiver(m2m_changed, sender=Blog.tags.through)
+def reindex_blog_tags(sender, instance, action, reverse, pk_set, **kwargs):
+    if action == "pre_clear" and reverse:
+        # tag.blogs.clear() does not report which blogs lost the tag
+        instance._cleared_blog_ids = list(instance.blogs.values_list("pk", flat=True))
+    elif action in ("post_add", "post_remove", "post_clear"):
+        if not reverse:
+            _reindex([instance.pk])
+        else:
+            _reindex(pk_set or getattr(instance, "_cleared_blog_ids", []))
+
+
+@receiver(post_save, sender=Tag)
+def reindex_renamed_tag(sender, instance, created, **kwargs):
+    if not created:
+        _reindex(instance.blogs.values_list("pk", flat=True))
+
+
+@receiver(pre_delete, sender=Tag)
+def remember_tag_blogs(sender, instance, **kwargs):
+    instance._tagged_blog_ids = list(instance.blogs.values_list("pk", flat=True))
+
+
+@receiver(post_delete, sender=Tag)
+def reindex_deleted_tag(sender, instance, **kwargs):
+    _reindex(getattr(instance, "_tagged_blog_ids", []))
+
+
+# ---------------------------
+# Response cache versions
+# ---------------------------
+@receiver(post_save, sender=Blog)
+@receiver(post_save, sender=Category)
+@receiver(post_save, sender=Tag)
+@receiver(post_save, sender=User)
+def bump_saved_model(sender, instance, update_fields=None, **kwargs):
+    # Logins only touch last_login, which no cached response shows
+    if update_fields is not None and set(update_fields) <= {"last_login"}:
+        return
+    bump_version(sender)
+
+
+@receiver(post_delete, sender=Blog)
+@receiver(post_delete, sender=Category)
+@receiver(post_delete, sender=Tag)
+@receiver(post_delete, sender=User)
+def bump_deleted_model(sender, instance, **kwargs):
+    bump_version(sender)
+
+
+@receiver(m2m_changed, sender=Blog.tags.through)
+def bump_blog_tags(sender, action, **kwargs):
+    if action in ("post_add", "post_remove", "post_clear"):
+        bump_version(Blog)
+        bump_version(Tag)
+
+
+# ---------------------------
+# Site statistics
+# ---------------------------
+@receiver(post_init, sender=Blog)
+def remember_blog_visibility(sender, instance, **kwargs):
+    # None when a deferred load leaves the stored state unknown
+    if instance.pk is None:
+        instance._stored_public = False
+    elif _loaded(instance, "is_published", "is_active"):
+        instance._stored_public = instance.is_published and instance.is_active
+    else:
+        instance._stored_public = None
+
+
+@receiver(post_save, sender=Blog)
+def count_public_blog(sender, instance, created, **kwargs):
+    was_public = False if created else instance._stored_public
+    is_public = instance.is_published and instance.is_active
+    if was_public is None:
+        refresh_site_stats()
+    else:
+        apply_stats_deltas(blog_stats_deltas(was_public, is_public, instance.created_at))
+    instance._stored_public = is_public
+
+
+@receiver(post_delete, sender=Blog)
+def uncount_public_blog(sender, instance, **kwargs):
+    if instance.is_published and instance.is_active:
+        apply_stats_deltas(blog_stats_deltas(True, False, instance.created_at))
+
+
+@receiver(post_init, sender=User)
+def remember_user_active(sender, instance, **kwargs):
+    if instance.pk is None:
+        instance._stored_active = False
+    elif _loaded(instance, "is_active"):
+        instance._stored_active = instance.is_active
+    else:
+        instance._stored_active = None
+
+
+@receiver(post_save, sender=User)
+def count_active_user(sender, instance, created, **kwargs):
+    was_active = False if created else instance._stored_active
+    if was_active is None:
+        refresh_site_stats()
+    elif was_active != instance.is_active:
+        apply_stats_deltas({"user_count": 1 if instance.is_active else -1})
+    instance._stored_active = instance.is_active
+
+
+@receiver(post_delete, sender=User)
+def uncount_active_user(sender, instance, **kwargs):
+    if instance.is_active:
+        apply_stats_deltas({"user_count": -1})
+
+
+# ---------------------------
+# Notifications
+# ---------------------------
+# Fan-out runs after commit, so a rolled back write notifies nobody
+@receiver(post_save, sender=Comment)
+def notify_new_comment(sender, instance, created, **kwargs):
+    if created:
+        transaction.on_commit(lambda: notify_comment(instance))
+
+
+@receiver(post_init, sender=Blog)
+def remember_blog_published(sender, instance, **kwargs):
+    instance._stored_published = instance.is_published if _loaded(instance, "is_published") else None
+
+
+@receiver(post_save, sender=Blog)
+def notify_blog_published(sender, instance, created, **kwargs):
+    if not created and instance._stored_published is False and instance.is_published:
+        transaction.on_commit(lambda: notify_published(instance))
+    instance._stored_published = instance.is_published
+
+
+# ---------------------------
+# Image variants
+# ---------------------------
+@receiver(post_init, sender=Blog)
+@receiver(post_init, sender=Advertisement)
+@receiver(post_init, sender=User)
+def remember_image(sender, instance, **kwargs):
+    # Stored image name ("" for none); None when a deferred load leaves it unknown
+    image_field = image_fields(sender)[0]
+    if instance.pk is None:
+        instance._stored_image = ""
+    elif _loaded(instance, image_field):
+        instance._stored_image = str(instance.__dict__[image_field] or "")
+    else:
+        instance._stored_image = None
+
+
+@receiver(post_save, sender=Blog)
+@receiver(post_save, sender=Advertisement)
+@receiver(post_save, sender=User)
+def build_image_variants(sender, instance, update_fields=None, **kwargs):
+    image_field = image_fields(sender)[0]
+    if not _loaded(instance, image_field):
+        return
+    if update_fields is not None and image_field not in update_fields:
+        return
+    name = getattr(instance, image_field).name or ""
+    if name != getattr(instance, "_stored_image", None):
+        image_processor.submit(sender, instance.pk, name)
+    instance._stored_image = name
+
+
+# ---------------------------
+# Ad serving index
+# ---------------------------
+# After commit, so no process reloads the index before the change is visible
+@receiver(post_save, sender=Advertisement)
+@receiver(post_delete, sender=Advertisement)
+def reload_ad_index(sender, instance, **kwargs):
+    def reload():
+        bump_version(Advertisement)
+        ad_index.invalidate()
+    transaction.on_commit(reload)
@@ -0,0 +1,54 @@
+import re
+
+from django.db.models import Q
+
+
+# Prefixes per query; SQLite rejects much deeper OR expression trees
+PREFIXES_PER_QUERY = 250
+
+# Longer numeric suffixes are not read back, and never handed out
+MAX_SUFFIX_DIGITS = 9
+
+
+def unique_slugs(queryset, bases, field="slug"):
+    """
+    A unique slug for each of ``bases`` (in order), resolved with one query
+    (per PREFIXES_PER_QUERY distinct bases) that reads back only the bases
+    themselves and their ``<base>-<n>`` variants; the numeric suffix is
+    matched by the database, so other slugs that merely start with a base
+    are not loaded. A taken slug gets the suffix after the highest one.
+    Slugs handed out earlier in the same call count as taken.
+    """
+    prefixes = sorted(set(bases))
+    highest = {}
+    for start in range(0, len(prefixes), PREFIXES_PER_QUERY):
+        chunk = prefixes[start:start + PREFIXES_PER_QUERY]
+        # The LIKEs narrow the rows down before the regex runs on them
+        candidates = Q()
+        for prefix in chunk:
+            candidates |= Q(**{f"{field}__startswith": prefix})
+        suffixed = "^(%s)-[0-9]{1,%d}$" % ("|".join(re.escape(prefix) for prefix in chunk), MAX_SUFFIX_DIGITS)
+        taken = queryset.filter(candidates).filter(
+            Q(**{f"{field}__in": chunk}) | Q(**{f"{field}__regex": suffixed})
+        ).values_list(field, flat=True)
+
+        chunk = set(chunk)
+        for slug in taken:
+            if slug in chunk:
+                highest[slug] = max(highest.get(slug, 0), 0)
+            prefix, _, suffix = slug.rpartition("-")
+            if prefix in chunk and suffix.isdigit():
+                highest[prefix] = max(highest.get(prefix, 0), int(suffix))
+
+    slugs = []
+    handed_out = set()
+    for base in bases:
+        counter = highest.get(base)
+        slug = base if counter is None else f"{base}-{counter + 1}"
+        while slug in handed_out:
+            counter = (counter or 0) + 1
+            slug = f"{base}-{counter}"
+        highest[base] = counter
+        handed_out.add(slug)
+        slugs.append(slug)
+    return slugs
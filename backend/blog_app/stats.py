@@ -0,0 +1,115 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.db.models import F
+from django.db.models.functions import Greatest, Now
+from django.utils import timezone
+
+from .models import Blog, SiteStats
+from .parallel import gather_queries
+
+User = get_user_model()
+
+
+# Blogs created within this window count as new content
+NEW_CONTENT_WINDOW = timedelta(days=7)
+
+STATS_FIELDS = ["blog_count", "user_count", "new_content_count"]
+
+
+def public_blogs():
+    return Blog.objects.filter(is_published=True, is_active=True)
+
+
+def is_new_content(created_at, now=None):
+    return created_at is not None and created_at >= (now or timezone.now()) - NEW_CONTENT_WINDOW
+
+
+# ---------------------------
+# Full recompute
+# ---------------------------
+def compute_site_stats():
+    """The three homepage numbers, counted from the source tables"""
+    week_ago = timezone.now() - NEW_CONTENT_WINDOW
+    return {
+        "blog_count": public_blogs().count(),
+        "user_count": User.objects.filter(is_active=True).count(),
+        "new_content_count": public_blogs().filter(created_at__gte=week_ago).count(),
+    }
+
+
+def refresh_site_stats():
+    """Recompute the stats row from scratch and return it"""
+    stats, _ = SiteStats.objects.update_or_create(
+        pk=SiteStats.SINGLETON_ID,
+        defaults={**compute_site_stats(), "computed_at": timezone.now()},
+    )
+    return stats
+
+
+# ---------------------------
+# Incremental updates
+# ---------------------------
+def apply_stats_deltas(deltas):
+    """
+    Add ``deltas`` ({stats_field: delta}) to the stats row with one UPDATE,
+    clamping at zero like the blog counters. A missing row is rebuilt.
+    """
+    updates = {}
+    for field, delta in deltas.items():
+        if not delta:
+            continue
+        expression = F(field) + delta
+        updates[field] = expression if delta > 0 else Greatest(expression, 0)
+
+    if not updates:
+        return
+    updated = SiteStats.objects.filter(pk=SiteStats.SINGLETON_ID).update(
+        computed_at=Now(), **updates
+    )
+    if not updated:
+        refresh_site_stats()
+
+
+def blog_stats_deltas(was_public, is_public, created_at):
+    """Stats deltas for a blog entering (or leaving) the public listing"""
+    if was_public == is_public:
+        return {}
+    delta = 1 if is_public else -1
+    deltas = {"blog_count": delta}
+    if is_new_content(created_at):
+        deltas["new_content_count"] = delta
+    return deltas
+
+
+# ---------------------------
+# Reads
+# ---------------------------
+def get_site_stats():
+    """The stats row (one primary-key lookup), computed on first use"""
+    stats = SiteStats.objects.filter(pk=SiteStats.SINGLETON_ID).first()
+    return stats if stats is not None else refresh_site_stats()
+
+
+async def aget_site_stats():
+    """get_site_stats() for async views; a first computation runs the three COUNTs concurrently"""
+    stats = await SiteStats.objects.filter(pk=SiteStats.SINGLETON_ID).afirst()
+    if stats is not None:
+        return stats
+
+    week_ago = timezone.now() - NEW_CONTENT_WINDOW
+    blog_count, user_count, new_content_count = await gather_queries(
+        public_blogs().count,
+        User.objects.filter(is_active=True).count,
+        public_blogs().filter(created_at__gte=week_ago).count,
+    )
+    stats, _ = await SiteStats.objects.aupdate_or_create(
+        pk=SiteStats.SINGLETON_ID,
+        defaults={
+            "blog_count": blog_count,
+            "user_count": user_count,
+            "new_content_count": new_content_count,
+            "computed_at": timezone.now(),
+        },
+    )
+    return stats
@@ -0,0 +1,188 @@
+import json
+import os
+import sys
+from collections import namedtuple
+
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.backends.utils import CursorDebugWrapper
+from django.test.utils import CaptureQueriesContext
+from django.urls import get_resolver, resolve
+from django.urls.resolvers import URLResolver
+
+from .benchmarks import clear_caches
+
+
+# A response may run ``queries`` SQL statements and fetch ``rows`` rows plus
+# ``rows_per_item`` for every object it returns (nested replies included).
+Budget = namedtuple("Budget", ["queries", "rows", "rows_per_item"], defaults=[0])
+
+REPORT_ENV = "QUERY_BUDGET_REPORT"
+
+
+# ---------------------------
+# Row counting
+# ---------------------------
+class RowCountingCursor(CursorDebugWrapper):
+    """CursorDebugWrapper that also counts the rows read back"""
+
+    def __init__(self, cursor, db, counter):
+        super().__init__(cursor, db)
+        self.counter = counter
+
+    def _count(self, rows):
+        self.counter.rows += len(rows)
+        return rows
+
+    def fetchone(self):
+        row = self.cursor.fetchone()
+        if row is not None:
+            self.counter.rows += 1
+        return row
+
+    def fetchmany(self, *args, **kwargs):
+        return self._count(self.cursor.fetchmany(*args, **kwargs))
+
+    def fetchall(self):
+        return self._count(self.cursor.fetchall())
+
+    def __iter__(self):
+        for row in self.cursor:
+            self.counter.rows += 1
+            yield row
+
+
+class CaptureRowsContext(CaptureQueriesContext):
+    """CaptureQueriesContext plus ``rows``: rows fetched by the captured queries"""
+
+    def __enter__(self):
+        self.rows = 0
+        self.connection.make_debug_cursor = lambda cursor: RowCountingCursor(cursor, self.connection, self)
+        return super().__enter__()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        del self.connection.make_debug_cursor
+        super().__exit__(exc_type, exc_value, traceback)
+
+
+def count_items(data):
+    """Objects in a response body: page results or a list, and the replies nested in them"""
+    if isinstance(data, dict) and isinstance(data.get("results"), list):
+        data = data["results"]
+    if isinstance(data, list):
+        return sum(count_items(item) for item in data)
+    if isinstance(data, dict):
+        return 1 + count_items(data.get("replies") or [])
+    return 0
+
+
+def url_routes(urlconf_module):
+    """Full route of every pattern ``urlconf_module`` serves, as ResolverMatch.route spells it"""
+    prefix = ""
+    for resolver in get_resolver().url_patterns:
+        if isinstance(resolver, URLResolver) and resolver.urlconf_name == urlconf_module:
+            prefix = str(resolver.pattern)
+    return {prefix + str(pattern.pattern) for pattern in urlconf_module.urlpatterns}
+
+
+# ---------------------------
+# Test case mixin
+# ---------------------------
+class QueryBudgetMixin:
+    """
+    Per-endpoint SQL budgets for API test cases.
+
+    ``BUDGETS`` maps (method, route) to a Budget; ``request_within_budget``
+    makes a request on a cold cache, checks the statements and rows it
+    cost against the route's budget and records a report line, printed
+    when the class finishes (and appended as JSON lines to the file named
+    by $QUERY_BUDGET_REPORT).
+    """
+    BUDGETS = {}
+    URLCONFS = ()
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.report = []
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.write_report()
+        super().tearDownClass()
+
+    def reset_caches(self):
+        """Every measured request starts cold: no cached responses, versions or principals"""
+        clear_caches()
+
+    def request_within_budget(self, method, path, status=200, label=None, cold=True, **kwargs):
+        """
+        Request ``path`` and check it against its route's budget; ``cold=False``
+        keeps the caches, for endpoints built to be served from memory.
+        Returns (response, statements run, objects returned).
+        """
+        route = resolve(path.split("?")[0]).route
+        budget = self.BUDGETS[(method, route)]
+
+        if cold:
+            self.reset_caches()
+        with CaptureRowsContext(connections[DEFAULT_DB_ALIAS]) as captured:
+            response = getattr(self.client, method.lower())(path, **kwargs)
+            if getattr(response, "streaming", False):
+                response.close()
+
+        self.assertEqual(response.status_code, status, getattr(response, "data", None))
+        items = count_items(getattr(response, "data", None))
+        queries = len(captured)
+        max_rows = budget.rows + budget.rows_per_item * items
+
+        self.report.append({
+            "endpoint": label or f"{method} {path}",
+            "route": route,
+            "items": items,
+            "queries": queries,
+            "max_queries": budget.queries,
+            "rows": captured.rows,
+            "max_rows": max_rows,
+        })
+        sql = "\n".join(query["sql"] for query in captured.captured_queries)
+        self.assertLessEqual(queries, budget.queries, f"{method} {path} ran {queries} queries:\n{sql}")
+        self.assertLessEqual(captured.rows, max_rows, f"{method} {path} fetched {captured.rows} rows:\n{sql}")
+        return response, queries, items
+
+    def assertPageSizeIndependent(self, path, page_sizes, **kwargs):
+        """
+        Within budget at every page size, and the same statements at every
+        size that returns more than one object: no per-object queries.
+        """
+        separator = "&" if "?" in path else "?"
+        counts = {}
+        for size in page_sizes:
+            _, queries, items = self.request_within_budget("GET", f"{path}{separator}page_size={size}", **kwargs)
+            if items > 1:
+                counts[size] = queries
+        self.assertLessEqual(len(set(counts.values())), 1, f"{path} queries by page size: {counts}")
+
+    def test_every_route_has_a_budget(self):
+        routes = set().union(*(url_routes(module) for module in self.URLCONFS))
+        self.assertEqual(routes - {route for _, route in self.BUDGETS}, set())
+
+    @classmethod
+    def write_report(cls):
+        if not cls.report:
+            return
+        width = max(len(line["endpoint"]) for line in cls.report)
+        out = [f"\nQuery budgets: {cls.__module__}.{cls.__qualname__}"]
+        out.append(f"{'endpoint':<{width}}  items  queries (max)   rows (max)")
+        for line in cls.report:
+            out.append(
+                f"{line['endpoint']:<{width}}  {line['items']:>5}  "
+                f"{line['queries']:>7} ({line['max_queries']:>3})  "
+                f"{line['rows']:>5} ({line['max_rows']:>5})"
+            )
+        sys.stderr.write("\n".join(out) + "\n")
+
+        path = os.environ.get(REPORT_ENV)
+        if path:
+            with open(path, "a") as report:
+                for line in cls.report:
+                    report.write(json.dumps({"suite": cls.__qualname__, **line}) + "\n")
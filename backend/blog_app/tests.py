@@ -1,3 +1,1169 @@
-from django.test import TestCase
+"""
+SQL budgets of every blog_app endpoint, and behavior the budgets do not pin.
 
-# Create your tests here.
+Run with ``python manage.py test --settings=backend.test_settings``. Each
+request starts on cold caches and must stay within its route's Budget;
+list endpoints must also run the same statements at every page size, and
+every budget must hold at two data volumes (the Large* subclass).
+"""
+import asyncio
+import base64
+import json
+from datetime import timedelta
+
+from asgiref.sync import async_to_sync, sync_to_async
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import connection
+from django.db.models import Sum
+from django.conf import settings
+from django.test import AsyncRequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient, APITestCase
+
+from accounts.serializers import PrincipalTokenObtainPairSerializer
+from . import async_views, urls
+from .ads import AdIndex, ad_counter
+from .async_views import blog_event_stream
+from .cache import bump_version, cache_settings, check_response_cache, model_versions
+from .counters import COUNTER_FIELDS, rebuild_counters
+from .events import LocalBroker, blog_channel, get_broker, issue_stream_ticket, read_stream_ticket
+from .explain import advise, plan_findings
+from .hll import HyperLogLog
+from .importing import BlogImporter
+from .models import Advertisement, Blog, BlogDailyStats, BlogVisitor, Category, Comment, Notification, Reaction, Tag, ViewCount
+from .rollup import prune_views, prune_visitors, rollup
+from .search import get_search_backend
+from .seeding import Seeder
+from .slugs import unique_slugs
+from .stats import STATS_FIELDS, compute_site_stats, get_site_stats, public_blogs
+from .testing import Budget, QueryBudgetMixin
+from .tracking import ViewEvent, insert_new_visitors, view_tracker
+from .visitors import unique_visitors
+
+User = get_user_model()
+
+BLOG = "api/blog/"
+
+PAGE_SIZES = (1, 10, 50)
+
+
+class BlogEndpointBudgetTests(QueryBudgetMixin, APITestCase):
+    URLCONFS = (urls,)
+    VOLUMES = {}
+    BUDGETS = {
+        ("GET", BLOG + "categories/"): Budget(queries=2, rows=1, rows_per_item=1),
+        ("POST", BLOG + "categories/"): Budget(queries=3, rows=2),
+        ("GET", BLOG + "categories/<int:pk>/"): Budget(queries=1, rows=1),
+        ("PATCH", BLOG + "categories/<int:pk>/"): Budget(queries=4, rows=2),
+        ("GET", BLOG + "categories/all/"): Budget(queries=2, rows=1, rows_per_item=1),
+        ("GET", BLOG + "tags/"): Budget(queries=2, rows=1, rows_per_item=1),
+        ("POST", BLOG + "tags/"): Budget(queries=3, rows=2),
+        ("GET", BLOG + "tags/<int:pk>/"): Budget(queries=1, rows=1),
+        ("PATCH", BLOG + "tags/<int:pk>/"): Budget(queries=5, rows=2),
+        ("GET", BLOG + "tags/all/"): Budget(queries=2, rows=1, rows_per_item=1),
+        ("GET", BLOG + "blogs/"): Budget(queries=4, rows=2, rows_per_item=4),
+        ("POST", BLOG + "blogs/"): Budget(queries=12, rows=9),
+        ("GET", BLOG + "blogs/<int:pk>/"): Budget(queries=2, rows=4),
+        ("PATCH", BLOG + "blogs/<int:pk>/"): Budget(queries=9, rows=10),
+        ("PATCH", BLOG + "blogs/<int:pk>/publish/"): Budget(queries=4, rows=2),
+        ("GET", BLOG + "blogs/<int:blog_id>/comments/"): Budget(queries=4, rows=2, rows_per_item=2),
+        ("POST", BLOG + "blogs/<int:blog_id>/comments/"): Budget(queries=7, rows=4),
+        ("GET", BLOG + "comments/<int:pk>/"): Budget(queries=3, rows=1, rows_per_item=1),
+        ("PATCH", BLOG + "comments/<int:pk>/"): Budget(queries=5, rows=2, rows_per_item=1),
+        ("GET", BLOG + "comments/<int:pk>/replies/"): Budget(queries=3, rows=1, rows_per_item=1),
+        ("GET", BLOG + "blogs/<int:blog_pk>/reactions/"): Budget(queries=3, rows=3),
+        ("POST", BLOG + "blogs/<int:blog_pk>/reactions/"): Budget(queries=9, rows=3),
+        ("GET", BLOG + "blogs/<int:blog_id>/events/"): Budget(queries=2, rows=2),
+        ("POST", BLOG + "blogs/<int:blog_id>/events/ticket/"): Budget(queries=1, rows=1),
+        ("GET", BLOG + "notifications/"): Budget(queries=2, rows=2, rows_per_item=1),
+        ("GET", BLOG + "notifications/unread-count/"): Budget(queries=2, rows=2),
+        ("POST", BLOG + "notifications/mark-read/"): Budget(queries=3, rows=2),
+        ("GET", BLOG + "ads/serve/"): Budget(queries=0, rows=0),
+        ("GET", BLOG + "ads/<int:pk>/click/"): Budget(queries=0, rows=0),
+        ("GET", BLOG + "blogs/featured/"): Budget(queries=2, rows=1, rows_per_item=1),
+        ("GET", BLOG + "stats/"): Budget(queries=1, rows=1),
+        ("GET", BLOG + "blogs/<int:pk>/daily-stats/"): Budget(queries=3, rows=2, rows_per_item=1),
+        ("GET", BLOG + "posts/"): Budget(queries=6, rows=7, rows_per_item=6),
+        ("GET", BLOG + "posts/<str:slug>/"): Budget(queries=12, rows=9),
+    }
+
+    @classmethod
+    def setUpTestData(cls):
+        Seeder(cls.VOLUMES, prefix="budget").run()
+        cls.admin = User.objects.filter(role="ADMIN").first()
+        cls.author = User.objects.filter(role="AUTHOR").first()
+        cls.reader = User.objects.filter(role="USER").first()
+        cls.blog = (
+            Blog.objects.filter(is_published=True, author=cls.author)
+            .order_by("-comments_count", "pk").first()
+        )
+        cls.comment = Comment.objects.filter(blog=cls.blog, parent__isnull=True).order_by("pk").first()
+        cls.thread = Comment.objects.filter(blog=cls.blog, depth__gt=0).order_by("-depth").first().parent
+
+    def login(self, user):
+        token = PrincipalTokenObtainPairSerializer.get_token(user).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+
+    # ---------------------------
+    # Categories and tags
+    # ---------------------------
+    def test_category_endpoints(self):
+        self.assertPageSizeIndependent(f"/{BLOG}categories/", PAGE_SIZES)
+        category = Category.objects.order_by("pk").first()
+        self.request_within_budget("GET", f"/{BLOG}categories/{category.pk}/")
+
+        self.login(self.admin)
+        self.request_within_budget("GET", f"/{BLOG}categories/all/")
+        self.request_within_budget("POST", f"/{BLOG}categories/", status=201, data={"name": "Budgets"})
+        self.request_within_budget(
+            "PATCH", f"/{BLOG}categories/{category.pk}/", data={"name": "Renamed"}, format="json"
+        )
+
+    def test_tag_endpoints(self):
+        self.assertPageSizeIndependent(f"/{BLOG}tags/", PAGE_SIZES)
+        tag = Tag.objects.order_by("pk").first()
+        self.request_within_budget("GET", f"/{BLOG}tags/{tag.pk}/")
+
+        self.login(self.admin)
+        self.request_within_budget("GET", f"/{BLOG}tags/all/")
+        response, *_ = self.request_within_budget("POST", f"/{BLOG}tags/", status=201, data={"name": "budgets"})
+        # Renaming reindexes every blog carrying the tag, so a new tag keeps this one constant
+        self.request_within_budget(
+            "PATCH", f"/{BLOG}tags/{response.data['id']}/", data={"name": "renamed"}, format="json"
+        )
+
+    # ---------------------------
+    # Admin and author blogs
+    # ---------------------------
+    def test_blog_list(self):
+        self.assertPageSizeIndependent(f"/{BLOG}blogs/", PAGE_SIZES)
+        self.assertPageSizeIndependent(f"/{BLOG}blogs/?search=query", PAGE_SIZES)
+        self.login(self.author)
+        self.assertPageSizeIndependent(f"/{BLOG}blogs/?category_id={self.blog.category_id}", PAGE_SIZES)
+
+    def test_blog_writes(self):
+        self.request_within_budget("GET", f"/{BLOG}blogs/{self.blog.pk}/")
+
+        self.login(self.author)
+        tag_ids = list(Tag.objects.values_list("pk", flat=True)[:3])
+        response, *_ = self.request_within_budget("POST", f"/{BLOG}blogs/", status=201, format="json", data={
+            "title": "Budgeted post",
+            "content": "Every endpoint has a query budget.",
+            "category_id": self.blog.category_id,
+            "tag_ids": tag_ids,
+        })
+        self.request_within_budget(
+            "PATCH", f"/{BLOG}blogs/{response.data['id']}/",
+            data={"title": "Budgeted post, edited", "tag_ids": tag_ids[:1]}, format="json",
+        )
+
+        self.login(self.admin)
+        self.request_within_budget(
+            "PATCH", f"/{BLOG}blogs/{response.data['id']}/publish/", data={"is_published": True}, format="json"
+        )
+
+    # ---------------------------
+    # Public feed
+    # ---------------------------
+    def test_public_posts(self):
+        self.login(self.reader)
+        self.assertPageSizeIndependent(f"/{BLOG}posts/", PAGE_SIZES)
+        self.assertPageSizeIndependent(f"/{BLOG}posts/?pagination=cursor", PAGE_SIZES)
+        self.assertPageSizeIndependent(f"/{BLOG}posts/?search=cache", PAGE_SIZES)
+        self.request_within_budget("GET", f"/{BLOG}posts/{self.blog.slug}/")
+
+    def test_featured_and_stats(self):
+        self.request_within_budget("GET", f"/{BLOG}blogs/featured/")
+        self.request_within_budget("GET", f"/{BLOG}stats/")
+
+    def test_daily_stats(self):
+        self.login(self.author)
+        self.request_within_budget("GET", f"/{BLOG}blogs/{self.blog.pk}/daily-stats/?days=365")
+
+    # ---------------------------
+    # Comments
+    # ---------------------------
+    def test_comment_reads(self):
+        path = f"/{BLOG}blogs/{self.blog.pk}/comments/"
+        self.assertPageSizeIndependent(path, PAGE_SIZES)
+        self.assertPageSizeIndependent(f"{path}?max_depth=1&replies_limit=2", PAGE_SIZES)
+        self.request_within_budget("GET", f"/{BLOG}comments/{self.comment.pk}/")
+        self.assertPageSizeIndependent(f"/{BLOG}comments/{self.thread.pk}/replies/", PAGE_SIZES)
+
+    def test_comment_writes(self):
+        self.login(self.reader)
+        path = f"/{BLOG}blogs/{self.blog.pk}/comments/"
+        response, *_ = self.request_within_budget("POST", path, status=201, data={
+            "blog": self.blog.pk, "content": "Within budget",
+        })
+        self.request_within_budget("POST", path, status=201, label=f"POST {path} (reply)", data={
+            "blog": self.blog.pk, "content": "Reply", "parent": self.thread.pk,
+        })
+        self.request_within_budget(
+            "PATCH", f"/{BLOG}comments/{response.data['id']}/", data={"content": "Edited"}, format="json"
+        )
+
+    # ---------------------------
+    # Reactions and live events
+    # ---------------------------
+    def test_reactions(self):
+        self.login(self.reader)
+        path = f"/{BLOG}blogs/{self.blog.pk}/reactions/"
+        self.request_within_budget("GET", path)
+        for reaction_type in ("love", "love", "wow"):
+            self.request_within_budget(
+                "POST", path, data={"type": reaction_type}, label=f"POST {path} ({reaction_type})"
+            )
+        self.assertEqual(
+            Reaction.objects.filter(blog=self.blog, user=self.reader).values_list("type", flat=True).first(),
+            "wow",
+        )
+
+    def test_event_stream(self):
+        self.login(self.reader)
+        response, *_ = self.request_within_budget("GET", f"/{BLOG}blogs/{self.blog.pk}/events/")
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        self.request_within_budget("POST", f"/{BLOG}blogs/{self.blog.pk}/events/ticket/")
+
+    # ---------------------------
+    # Notifications
+    # ---------------------------
+    def test_notifications(self):
+        self.login(self.reader)
+        self.assertPageSizeIndependent(f"/{BLOG}notifications/", PAGE_SIZES)
+        self.assertPageSizeIndependent(f"/{BLOG}notifications/?unread=1", PAGE_SIZES)
+        self.request_within_budget("GET", f"/{BLOG}notifications/unread-count/")
+
+        ids = list(Notification.objects.filter(user=self.reader).values_list("pk", flat=True)[:3])
+        self.request_within_budget(
+            "POST", f"/{BLOG}notifications/mark-read/", data={"ids": ids}, format="json",
+            label=f"POST /{BLOG}notifications/mark-read/ (ids)",
+        )
+        self.request_within_budget("POST", f"/{BLOG}notifications/mark-read/", data={}, format="json")
+
+    # ---------------------------
+    # Advertisements
+    # ---------------------------
+    def test_ads(self):
+        # Served from the in-process index, which only the first request loads
+        self.reset_caches()
+        self.client.get(f"/{BLOG}ads/serve/")
+        response, *_ = self.request_within_budget("GET", f"/{BLOG}ads/serve/?count=3", cold=False)
+        self.assertEqual(len(response.data), 3)
+        ad = Advertisement.objects.order_by("pk").first()
+        self.request_within_budget("GET", f"/{BLOG}ads/{ad.pk}/click/", status=302, cold=False)
+        ad_counter.flush()
+
+
+class LargeBlogEndpointBudgetTests(BlogEndpointBudgetTests):
+    """The same budgets with several times the data"""
+    VOLUMES = {
+        "users": 150,
+        "blogs": 120,
+        "comments_per_blog": 80,
+        "comment_depth": 20,
+        "reactions_per_blog": 100,
+        "views_per_blog": 400,
+        "notifications_per_user": 40,
+        "ads": 20,
+    }
+
+
+class IndexAdvisorTests(TestCase):
+    """Every list and lookup an API view runs is answered from an index"""
+
+    @classmethod
+    def setUpTestData(cls):
+        Seeder({"users": 20, "authors": 2, "blogs": 10}, prefix="advisor").run()
+
+    def test_plan_findings(self):
+        sqlite = "3 0 0 SCAN blog_app_blog\n5 0 0 SEARCH accounts_user USING INTEGER PRIMARY KEY (rowid=?)\n" \
+                 "9 0 0 USE TEMP B-TREE FOR ORDER BY"
+        self.assertEqual([finding.kind for finding in plan_findings("sqlite", sqlite)], ["scan", "sort"])
+        postgres = "Limit  (cost=1.1..1.2 rows=6 width=8)\n  ->  Sort  (cost=1.1..1.2 rows=9 width=8)\n" \
+                   "        Sort Key: published_at DESC\n        ->  Seq Scan on blog_app_blog  (cost=0..1 rows=9 width=8)"
+        findings = plan_findings("postgresql", postgres)
+        self.assertEqual([(finding.kind, finding.table) for finding in findings],
+                         [("sort", None), ("scan", "blog_app_blog")])
+        self.assertIn("published_at DESC", findings[0].detail)
+
+    def test_views_use_indexes(self):
+        # Only search results, ordered by a computed rank, may be sorted
+        flagged = {
+            (plan.route, plan.variant, finding.detail)
+            for plan in advise(min_rows=0) for finding in plan.findings
+            if not (plan.variant == "search" and finding.kind == "sort")
+        }
+        self.assertEqual(flagged, set())
+
+
+class DailyRollupTests(TestCase):
+    """BlogDailyStats stays equal to the raw rows it replaces"""
+
+    @classmethod
+    def setUpTestData(cls):
+        Seeder({"users": 20, "authors": 2, "blogs": 6, "views_per_blog": 15}, prefix="rollup").run()
+        cls.blog = Blog.objects.order_by("pk").first()
+
+    def rolled_up(self, field):
+        return BlogDailyStats.objects.aggregate(total=Sum(field))["total"] or 0
+
+    def test_rollup_is_incremental(self):
+        self.assertEqual(self.rolled_up("views"), ViewCount.objects.count())
+        self.assertEqual(self.rolled_up("reactions"), Reaction.objects.count())
+        self.assertEqual(self.rolled_up("comments"), Comment.objects.count())
+
+        ViewCount.objects.create(blog=self.blog, ip_address="192.0.2.1")
+        added = rollup(settle_seconds=0)
+        self.assertEqual(added, {"blog_app.ViewCount": 1, "blog_app.Reaction": 0, "blog_app.Comment": 0})
+        self.assertEqual(self.rolled_up("views"), ViewCount.objects.count())
+        self.assertEqual(set(rollup(settle_seconds=0).values()), {0})
+
+    def test_prune_keeps_counts(self):
+        counts = dict(Blog.objects.values_list("pk", "views_count"))
+        ViewCount.objects.update(viewed_at=timezone.now() - timedelta(days=100))
+        # Not rolled up yet, so it survives the prune
+        late = ViewCount.objects.create(blog=self.blog, ip_address="192.0.2.2")
+        ViewCount.objects.filter(pk=late.pk).update(viewed_at=timezone.now() - timedelta(days=100))
+
+        pruned = ViewCount.objects.count() - 1
+        self.assertEqual(prune_views(days=90, batch_size=7), pruned)
+        self.assertEqual(list(ViewCount.objects.values_list("pk", flat=True)), [late.pk])
+
+        # Rebuilt counters read the pruned views from the rollup
+        counts[self.blog.pk] += 1
+        rebuild_counters()
+        self.assertEqual(dict(Blog.objects.values_list("pk", "views_count")), counts)
+
+        # A visitor whose view was pruned is still not counted twice
+        pruned_ip = BlogVisitor.objects.filter(blog=self.blog).exclude(ip_address=late.ip_address).first().ip_address
+        self.assertEqual(view_tracker.write_batch([ViewEvent(self.blog.pk, pruned_ip, None, timezone.now())]), 0)
+        self.assertEqual(dict(Blog.objects.values_list("pk", "views_count")), counts)
+
+    def test_prune_visitors(self):
+        long_ago = timezone.now() - timedelta(days=100)
+        # Not rolled up yet, so neither its raw view nor its visitor is pruned
+        late = ViewCount.objects.create(blog=self.blog, ip_address="192.0.2.2")
+        BlogVisitor.objects.create(blog=self.blog, ip_address=late.ip_address)
+        ViewCount.objects.update(viewed_at=long_ago)
+        BlogVisitor.objects.update(first_seen=long_ago)
+        recent = BlogVisitor.objects.create(blog=self.blog, ip_address="192.0.2.3")
+
+        # Visitors go only after their raw views
+        self.assertEqual(prune_visitors(days=90, batch_size=7), 0)
+        prune_views(days=90)
+        forgotten = BlogVisitor.objects.count() - 2
+        self.assertEqual(prune_visitors(days=90, batch_size=7), forgotten)
+        self.assertEqual(
+            set(BlogVisitor.objects.values_list("ip_address", flat=True)), {late.ip_address, recent.ip_address}
+        )
+
+        # A visitor forgotten with the window counts again
+        views = Blog.objects.get(pk=self.blog.pk).views_count
+        self.assertEqual(view_tracker.write_batch([ViewEvent(self.blog.pk, "10.0.0.0", None, timezone.now())]), 1)
+        self.assertEqual(Blog.objects.get(pk=self.blog.pk).views_count, views + 1)
+        visitor = BlogVisitor.objects.get(blog=self.blog, ip_address="10.0.0.0")
+        self.assertGreater(visitor.first_seen, long_ago)
+
+
+class UniqueVisitorSketchTests(TestCase):
+    """The "hll" unique mode counts visitors in sketches instead of ViewCount rows"""
+
+    @classmethod
+    def setUpTestData(cls):
+        Seeder({"users": 10, "authors": 1, "blogs": 2, "views_per_blog": 0}, prefix="sketch").run()
+        cls.blog = Blog.objects.order_by("pk").first()
+
+    def test_sketch(self):
+        sketch = HyperLogLog().update(range(20000))
+        self.assertAlmostEqual(sketch.count(), 20000, delta=20000 * sketch.error * 4)
+
+        # Merging overlapping sketches counts the union, after a round trip through bytes
+        other = HyperLogLog.from_bytes(HyperLogLog().update(range(10000, 30000)).to_bytes())
+        self.assertAlmostEqual(sketch.merge(other).count(), 30000, delta=30000 * sketch.error * 4)
+        with self.assertRaises(ValueError):
+            sketch.merge(HyperLogLog(precision=10))
+
+    def test_hll_tracking(self):
+        views_count = self.blog.views_count
+        raw_views = ViewCount.objects.count()
+        tracking = {**settings.VIEW_TRACKING, "BUFFERED": False, "UNIQUE_MODE": "hll"}
+        with override_settings(VIEW_TRACKING=tracking):
+            for _ in range(2):
+                for n in range(50):
+                    view_tracker.record(self.blog.pk, f"192.0.2.{n}")
+
+        self.assertEqual(ViewCount.objects.count(), raw_views)
+        self.blog.refresh_from_db()
+        self.assertAlmostEqual(self.blog.views_count - views_count, 50, delta=2)
+        self.assertAlmostEqual(unique_visitors(self.blog.pk), 50, delta=2)
+        today = BlogDailyStats.objects.get(blog=self.blog, date=timezone.localdate())
+        self.assertAlmostEqual(today.unique_visitors, 50, delta=2)
+        self.assertEqual(unique_visitors(self.blog.pk, since=today.date), today.unique_visitors)
+
+
+class CommentThreadTests(APITestCase):
+    """Replies stay in the thread, and the blog, of their parent"""
+
+    @classmethod
+    def setUpTestData(cls):
+        Seeder({"users": 10, "authors": 2, "blogs": 4}, prefix="thread").run()
+        cls.reader = User.objects.filter(role="USER").first()
+        cls.blog, cls.other = Blog.objects.filter(is_published=True).order_by("pk")[:2]
+        cls.parent = Comment.objects.filter(blog=cls.other, parent__isnull=True).order_by("pk").first()
+
+    def setUp(self):
+        token = PrincipalTokenObtainPairSerializer.get_token(self.reader).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+
+    def test_cross_blog_reply(self):
+        path = f"/{BLOG}blogs/{self.blog.pk}/comments/"
+        # Naming the parent's blog in the body does not move the reply there
+        for body_blog in (self.blog.pk, self.other.pk):
+            response = self.client.post(path, {"blog": body_blog, "content": "Hi", "parent": self.parent.pk})
+            self.assertEqual(response.status_code, 400)
+            self.assertIn("parent", response.data)
+        self.assertFalse(Comment.objects.filter(blog=self.blog, parent=self.parent).exists())
+
+        response = self.client.post(f"/{BLOG}blogs/{self.other.pk}/comments/", {
+            "blog": self.blog.pk, "content": "Hi", "parent": self.parent.pk,
+        })
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data["blog"], self.other.pk)
+        self.assertEqual(Comment.objects.get(pk=response.data["id"]).depth, self.parent.depth + 1)
+
+    def test_thread_shape(self):
+        blog = Blog.objects.create(author=self.blog.author, title="Quiet", content="None yet", is_published=True)
+        root = Comment.objects.create(blog=blog, user=self.reader, content="Root")
+        first = Comment.objects.create(blog=blog, user=self.reader, content="First", parent=root)
+        second = Comment.objects.create(blog=blog, user=self.reader, content="Second", parent=root)
+        nested = Comment.objects.create(blog=blog, user=self.reader, content="Nested", parent=first)
+        path = f"/{BLOG}blogs/{blog.pk}/comments/"
+
+        def shape(node):
+            return (node["id"], node["depth"], node["replies_count"], [shape(reply) for reply in node["replies"]])
+
+        # Whole trees, newest replies first
+        thread = self.client.get(path).data["results"]
+        self.assertEqual([shape(node) for node in thread], [
+            (root.pk, 0, 2, [(second.pk, 1, 0, []), (first.pk, 1, 1, [(nested.pk, 2, 0, [])])]),
+        ])
+
+        # Cut trees still count what they leave out
+        root_node = self.client.get(path, {"max_depth": 1, "replies_limit": 1}).data["results"][0]
+        self.assertEqual(shape(root_node), (root.pk, 0, 2, [(second.pk, 1, 0, [])]))
+        self.assertTrue(root_node["has_more_replies"])
+        replies = self.client.get(f"/{BLOG}comments/{root.pk}/replies/", {"max_depth": 0}).data["results"]
+        self.assertEqual([shape(node) for node in replies], [(second.pk, 1, 0, []), (first.pk, 1, 1, [])])
+
+        # The limit applies in the query: replies of left-out replies are not loaded either
+        with CaptureQueriesContext(connection) as queries:
+            root_node = self.client.get(path, {"replies_limit": 1}).data["results"][0]
+        self.assertEqual(shape(root_node), (root.pk, 0, 2, [(second.pk, 1, 0, [])]))
+        self.assertFalse(any(" LIKE " in query["sql"] for query in queries.captured_queries))
+        self.assertEqual(shape(self.client.get(path, {"replies_limit": 0}).data["results"][0]), (root.pk, 0, 2, []))
+
+    def test_subtree(self):
+        # Ids whose next id carries into more base36 digits
+        for pk in (35, 36 ** 2 - 1):
+            path = Comment.path_step(7) + Comment.path_step(pk)
+            (_, lower), (_, upper) = Comment.subtree(path).children
+            self.assertEqual((lower, upper), (path, Comment.path_step(7) + Comment.path_step(pk + 1)))
+            self.assertLess(path + Comment.path_step(36 ** Comment.PATH_STEP - 1), upper)
+
+
+class KeysetPaginationTests(APITestCase):
+    """Cursor pages of the public feed walk every post once, both ways"""
+
+    @classmethod
+    def setUpTestData(cls):
+        Seeder({"users": 10, "authors": 2, "blogs": 9}, prefix="keyset").run()
+        # Ties on published_at are broken by created_at and id
+        Blog.objects.filter(pk__in=Blog.objects.order_by("pk").values("pk")[:3]).update(
+            published_at=timezone.now() - timedelta(days=1)
+        )
+        cls.feed = list(
+            Blog.objects.filter(is_active=True, is_published=True)
+            .order_by("-published_at", "-created_at", "-id").values_list("pk", flat=True)
+        )
+        cls.reader = User.objects.filter(role="USER").first()
+
+    def setUp(self):
+        self.client.force_authenticate(self.reader)
+
+    def walk(self, url, link):
+        pks = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            pks += [blog["id"] for blog in response.data["results"]]
+            url = response.data[link]
+        return pks, response.data
+
+    def test_round_trip(self):
+        self.assertGreater(len(self.feed), 4)
+        pks, last = self.walk(f"/{BLOG}posts/?pagination=cursor&page_size=2", "next")
+        self.assertEqual(pks, self.feed)
+        self.assertIsNone(last["next"])
+
+        # Back from the last page, one page at a time
+        pks, first = self.walk(last["previous"], "previous")
+        self.assertEqual(sorted(pks, key=self.feed.index), self.feed[:len(self.feed) - len(last["results"])])
+        self.assertIsNone(first["previous"])
+
+    def cursor(self, key):
+        payload = json.dumps({"k": key, "r": 0}).encode()
+        return base64.urlsafe_b64encode(payload).decode().rstrip("=")
+
+    def test_invalid_cursors(self):
+        for cursor in ("not-a-cursor", self.cursor([1, 2]), self.cursor(["yesterday", None, 1]),
+                       self.cursor([None, None, None])):
+            response = self.client.get(f"/{BLOG}posts/", {"cursor": cursor})
+            self.assertEqual(response.status_code, 404, cursor)
+
+
+class ResponseCacheTests(APITestCase):
+    """Cached responses last until a model they are built from changes"""
+
+    @classmethod
+    def setUpTestData(cls):
+        Seeder({"users": 5, "authors": 1, "blogs": 6}, prefix="respcache").run()
+        cls.blog = Blog.objects.filter(is_published=True).order_by("pk").first()
+
+    def setUp(self):
+        caches[cache_settings()["ALIAS"]].clear()
+
+    def featured(self):
+        response = self.client.get(f"/{BLOG}blogs/featured/")
+        return response["X-Cache"], [blog["id"] for blog in response.data["results"]]
+
+    def test_version_bump(self):
+        Blog.objects.update(is_featured=False)
+        self.assertEqual(self.featured(), ("MISS", []))
+        self.assertEqual(self.featured(), ("HIT", []))
+
+        before = model_versions([Blog])
+        self.blog.is_featured = True
+        self.blog.save()
+        self.assertGreater(model_versions([Blog])["blog_app.blog"], before["blog_app.blog"])
+        self.assertEqual(self.featured(), ("MISS", [self.blog.pk]))
+        self.assertEqual(self.featured(), ("HIT", [self.blog.pk]))
+
+    def test_process_local_cache(self):
+        # A version bumped in one worker's locmem would never reach the others,
+        # so public reads are served uncached and without validators
+        reader = User.objects.filter(role="USER").first()
+        with override_settings(SINGLE_PROCESS=False):
+            self.assertIsNone(model_versions([Blog]))
+            self.assertEqual([warning.id for warning in check_response_cache(None)], ["blog_app.W001"])
+
+            self.assertNotIn("X-Cache", self.client.get(f"/{BLOG}blogs/featured/"))
+            for path in ("blogs/featured/", "categories/", "tags/", "stats/"):
+                response = self.client.get(f"/{BLOG}{path}")
+                self.assertEqual(response.status_code, 200, path)
+                self.assertNotIn("ETag", response, path)
+            self.client.force_authenticate(reader)
+            for path in ("posts/", f"posts/{self.blog.slug}/"):
+                response = self.client.get(f"/{BLOG}{path}")
+                self.assertEqual(response.status_code, 200, path)
+                self.assertNotIn("ETag", response, path)
+        self.assertEqual(check_response_cache(None), [])
+
+
+class AdIndexTests(TestCase):
+    """The in-process ad index notices changes made by other processes"""
+
+    @classmethod
+    def setUpTestData(cls):
+        Seeder({"users": 5, "authors": 1, "blogs": 0, "ads": 6}, prefix="adindex").run()
+
+    def test_version_check(self):
+        index, patient = AdIndex(check_interval=0), AdIndex(check_interval=3600)
+        ads, _ = index.running()
+        self.assertTrue(ads)
+        ad = ads[0]
+        patient.running()
+
+        # A save in another worker: the row and the shared version change, no signal here
+        Advertisement.objects.filter(pk=ad.pk).update(is_active=False)
+        bump_version(Advertisement)
+        self.assertIsNone(index.get(ad.pk))
+        # Until its next check, an index keeps what it loaded
+        self.assertIsNotNone(patient.get(ad.pk))
+
+    def test_process_local_cache(self):
+        with override_settings(SINGLE_PROCESS=False):
+            index = AdIndex(check_interval=0)
+            ad = index.running()[0][0]
+            # No versions to compare, so every check reloads
+            Advertisement.objects.filter(pk=ad.pk).update(is_active=False)
+            self.assertIsNone(index.get(ad.pk))
+
+
+class ViewTrackingTests(TestCase):
+    """views_count grows by the (blog, ip) pairs actually recorded"""
+
+    @classmethod
+    def setUpTestData(cls):
+        Seeder({"users": 5, "authors": 1, "blogs": 2, "views_per_blog": 0}, prefix="tracking").run()
+        cls.blog, cls.other = Blog.objects.order_by("pk")[:2]
+
+    def views_counts(self):
+        return dict(Blog.objects.values_list("pk", "views_count"))
+
+    def test_write_batch(self):
+        counts = self.views_counts()
+        yesterday = timezone.now() - timedelta(days=1)
+        # Recorded by another worker after this batch looked for existing visitors
+        BlogVisitor.objects.create(blog=self.blog, ip_address="192.0.2.1")
+        inserted = insert_new_visitors([(self.blog.pk, "192.0.2.1"), (self.blog.pk, "192.0.2.2")])
+        self.assertEqual(inserted, [(self.blog.pk, "192.0.2.2")])
+
+        events = [
+            ViewEvent(self.blog.pk, "192.0.2.2", None, yesterday),
+            ViewEvent(self.blog.pk, "192.0.2.3", None, yesterday),
+            ViewEvent(self.blog.pk, "192.0.2.3", None, timezone.now()),
+            ViewEvent(self.other.pk, "192.0.2.3", None, yesterday),
+        ]
+        self.assertEqual(view_tracker.write_batch(events), 2)
+        counts[self.blog.pk] += 1
+        counts[self.other.pk] += 1
+        self.assertEqual(self.views_counts(), counts)
+        self.assertEqual(ViewCount.objects.get(blog=self.other, ip_address="192.0.2.3").viewed_at, yesterday)
+
+    def test_deleted_blog(self):
+        counts = self.views_counts()
+        # Deleted while its views were buffered: they are dropped, not the batch
+        events = [ViewEvent(blog.pk, "192.0.2.4", None, timezone.now()) for blog in (self.blog, self.other)]
+        self.other.delete()
+        self.assertEqual(view_tracker.write_batch(events), 1)
+        self.assertEqual(self.views_counts(), {self.blog.pk: counts[self.blog.pk] + 1})
+        self.assertEqual(view_tracker.write_batch(events[1:]), 0)
+
+
+class ImportTests(TestCase):
+    """Imported blogs get unique slugs and every tag they name"""
+
+    @classmethod
+    def setUpTestData(cls):
+        Seeder({"users": 5, "authors": 1, "blogs": 0}, prefix="import").run()
+        cls.author = User.objects.filter(role="AUTHOR").first()
+
+    def test_unique_slugs(self):
+        Tag.objects.bulk_create([
+            Tag(name=name, slug=name) for name in ("news", "news-2", "news-09", "news-flash", "news-flash-7")
+        ])
+        with self.assertNumQueries(1):
+            slugs = unique_slugs(Tag.objects.all(), ["news", "news", "news-flash", "news-2", "sport"])
+        self.assertEqual(slugs, ["news-10", "news-11", "news-flash-8", "news-2-1", "sport"])
+
+    def test_import(self):
+        Tag.objects.create(name="django", slug="django")
+        importer = BlogImporter(default_author=self.author, batch_size=2)
+        created = importer.run(enumerate([
+            {"title": "One", "content": "First", "tags": ["django", "python"], "is_published": True},
+            {"title": "Two", "content": "Second", "slug": "one", "category": "Web", "tags": "python,web"},
+            {"title": "One", "content": "Again"},
+        ], 1))
+        self.assertEqual(created, 2)
+        self.assertEqual(importer.errors, [(3, "title already exists: 'One'")])
+        blogs = {blog.title: blog for blog in Blog.objects.prefetch_related("tags")}
+        self.assertEqual(blogs["Two"].slug, "one-1")
+        self.assertEqual(sorted(tag.name for tag in blogs["Two"].tags.all()), ["python", "web"])
+        self.assertEqual(sorted(tag.name for tag in blogs["One"].tags.all()), ["django", "python"])
+
+        # A tag that could not be created skips its record instead of vanishing from it
+        importer = BlogImporter(default_author=self.author)
+        rows = [(1, {"category": "", "tags": ["django"]}), (2, {"category": "", "tags": ["django", "lost"]})]
+        self.assertEqual(importer.drop_unresolved(rows, {}, {"django": 1}), rows[:1])
+        self.assertEqual(importer.errors, [(2, "tags could not be created: 'lost'")])
+
+
+class EngagementCounterTests(TestCase):
+    """Counter columns follow every reaction and comment write, and match a rebuild"""
+
+    @classmethod
+    def setUpTestData(cls):
+        Seeder({"users": 10, "authors": 1, "blogs": 2}, prefix="counters").run()
+        cls.blog = Blog.objects.order_by("pk").first()
+        cls.reader = User.objects.create_user(username="counters-reader", password="password")
+
+    def counters(self):
+        return Blog.objects.values(*COUNTER_FIELDS).get(pk=self.blog.pk)
+
+    def assertMoved(self, before, **deltas):
+        expected = {field: before[field] + deltas.get(field, 0) for field in COUNTER_FIELDS}
+        self.assertEqual(self.counters(), expected)
+
+    def assertNoDrift(self):
+        counters = self.counters()
+        rebuild_counters()
+        self.assertEqual(self.counters(), counters)
+
+    def test_reactions(self):
+        before = self.counters()
+        reaction = Reaction.objects.create(blog=self.blog, user=self.reader, type="like")
+        self.assertMoved(before, like_count=1)
+
+        # A changed type moves the count; saving it unchanged does not
+        reaction = Reaction.objects.get(pk=reaction.pk)
+        reaction.type = "love"
+        reaction.save()
+        reaction.save()
+        self.assertMoved(before, love_count=1)
+        self.assertNoDrift()
+
+        Reaction.objects.get(pk=reaction.pk).delete()
+        self.assertMoved(before)
+        self.assertNoDrift()
+
+    def test_comments(self):
+        before = self.counters()
+        parent = Comment.objects.create(blog=self.blog, user=self.reader, content="Hi")
+        Comment.objects.create(blog=self.blog, user=self.reader, content="Hi", parent=parent)
+        self.assertMoved(before, comments_count=2)
+        self.assertNoDrift()
+
+        # Replies deleted with their parent are uncounted too
+        parent.delete()
+        self.assertMoved(before)
+        self.assertNoDrift()
+
+
+class SearchTests(APITestCase):
+    """Public search ranks title matches first and follows tag changes"""
+
+    @classmethod
+    def setUpTestData(cls):
+        Seeder({"users": 5, "authors": 1, "blogs": 0}, prefix="search").run()
+        author = User.objects.filter(role="AUTHOR").first()
+        cls.titled, cls.mentioned, cls.tagged = [
+            Blog.objects.create(author=author, title=title, content=content, is_published=True)
+            for title, content in (
+                ("Kubernetes in practice", "Clusters and pods."),
+                ("Weekend cooking", "Between courses I read about kubernetes operators."),
+                ("Spring planting", "Seeds and soil."),
+            )
+        ]
+        cls.tag = Tag.objects.create(name="gardening", slug="gardening")
+        cls.tagged.tags.add(cls.tag)
+        get_search_backend().rebuild()
+        cls.reader = User.objects.filter(role="USER").first()
+
+    def setUp(self):
+        self.client.force_authenticate(self.reader)
+
+    def search(self, query):
+        response = self.client.get(f"/{BLOG}posts/", {"search": query})
+        self.assertEqual(response.status_code, 200, query)
+        return response.data["results"]
+
+    def test_ranking(self):
+        results = self.search("kubernetes")
+        self.assertEqual([blog["id"] for blog in results], [self.titled.pk, self.mentioned.pk])
+        self.assertIn("<mark>", results[1]["search_snippet"])
+        # Terms match as prefixes
+        self.assertEqual(len(self.search("kubern")), 2)
+
+    def test_query_syntax(self):
+        # Search syntax in user input is taken as plain words
+        for query in ('"kubernetes', "kubernetes*", "-kubernetes", "(kubernetes)", "{kubernetes}:"):
+            self.assertEqual(len(self.search(query)), 2, query)
+        self.assertEqual(self.search("***"), [])
+
+    def test_tag_rename(self):
+        self.assertEqual([blog["id"] for blog in self.search("gardening")], [self.tagged.pk])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.tag.name = "horticulture"
+            self.tag.save()
+        self.assertEqual(self.search("gardening"), [])
+        self.assertEqual([blog["id"] for blog in self.search("horticulture")], [self.tagged.pk])
+
+
+class SiteStatsTests(TestCase):
+    """The materialized site stats stay equal to a fresh count"""
+
+    @classmethod
+    def setUpTestData(cls):
+        Seeder({"users": 10, "authors": 2, "blogs": 8}, prefix="sitestats").run()
+        cls.author = User.objects.filter(role="AUTHOR").order_by("pk").first()
+
+    def assertCurrent(self):
+        stats = get_site_stats()
+        self.assertEqual({field: getattr(stats, field) for field in STATS_FIELDS}, compute_site_stats())
+
+    def test_blog_visibility(self):
+        self.assertCurrent()
+        blog = Blog.objects.create(author=self.author, title="Fresh", content="New", is_published=True)
+        self.assertCurrent()
+        blog.is_active = False
+        blog.save()
+        self.assertCurrent()
+
+        # Public blogs of a deleted author leave the stats with them
+        self.assertTrue(public_blogs().filter(author=self.author).exists())
+        self.author.delete()
+        self.assertCurrent()
+
+    def test_deferred_load(self):
+        # A save without the stored visibility recounts instead of guessing
+        blog = Blog.objects.filter(is_published=True).only("id", "title").first()
+        blog.is_published = False
+        blog.save()
+        self.assertCurrent()
+
+        user = User.objects.filter(is_active=True).only("id").first()
+        user.is_active = False
+        user.save()
+        self.assertCurrent()
+
+
+class ReactionToggleTests(APITestCase):
+    """Posting a reaction adds it, switches its type, or takes it back"""
+
+    @classmethod
+    def setUpTestData(cls):
+        Seeder({"users": 5, "authors": 1, "blogs": 2}, prefix="toggle").run()
+        cls.blog = Blog.objects.order_by("pk").first()
+        cls.reader = User.objects.create_user(username="toggle-reader", password="password")
+
+    def setUp(self):
+        self.client.force_authenticate(self.reader)
+        self.path = f"/{BLOG}blogs/{self.blog.pk}/reactions/"
+
+    def react(self, reaction_type, path=None):
+        return self.client.post(path or self.path, {"type": reaction_type})
+
+    def test_toggle(self):
+        before = Blog.objects.get(pk=self.blog.pk).reaction_counts
+        steps = [
+            ("like", "like", {"like": 1}),
+            ("love", "love", {"love": 1}),
+            ("love", None, {}),
+        ]
+        for reaction_type, user_reaction, moved in steps:
+            response = self.react(reaction_type)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.data["user_reaction"], user_reaction)
+            expected = {rtype: count + moved.get(rtype, 0) for rtype, count in before.items()}
+            self.assertEqual(response.data["counts"], expected)
+            self.assertEqual(Blog.objects.get(pk=self.blog.pk).reaction_counts, expected)
+            self.assertEqual(
+                list(Reaction.objects.filter(blog=self.blog, user=self.reader).values_list("type", flat=True)),
+                [user_reaction] if user_reaction else [],
+            )
+
+    def test_invalid(self):
+        self.assertEqual(self.react("meh").status_code, 400)
+        self.assertEqual(self.react("like", f"/{BLOG}blogs/0/reactions/").status_code, 404)
+        self.assertFalse(Reaction.objects.filter(user=self.reader).exists())
+
+
+class NotificationTests(APITestCase):
+    """Comments and publishing notify each recipient once; unread counts stay right"""
+
+    @classmethod
+    def setUpTestData(cls):
+        Seeder({"users": 5, "authors": 1, "blogs": 2}, prefix="notify").run()
+        cls.blog = Blog.objects.order_by("pk").first()
+        cls.commenter, cls.replier, cls.latecomer = [
+            User.objects.create_user(username=f"notify-{name}", password="password")
+            for name in ("commenter", "replier", "latecomer")
+        ]
+
+    def setUp(self):
+        # Unread counts cached by earlier tests are not rolled back with them
+        caches["default"].clear()
+
+    def inboxes(self):
+        users = [self.blog.author_id, self.commenter.pk, self.replier.pk, self.latecomer.pk]
+        return [Notification.objects.filter(user_id=user_id).count() for user_id in users]
+
+    def comment(self, user, parent=None):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Comment.objects.create(blog=self.blog, user=user, content="Hi", parent=parent)
+
+    def test_comment_fanout(self):
+        before = self.inboxes()
+        parent = self.comment(self.commenter)
+        reply = self.comment(self.replier, parent)
+        # The post author, the parent's author and the earlier replier, once each
+        self.comment(self.latecomer, reply)
+        moved = [after - start for after, start in zip(self.inboxes(), before)]
+        self.assertEqual(moved, [3, 2, 1, 0])
+        latest = {
+            user.pk: Notification.objects.filter(user=user).latest("pk").message
+            for user in (self.commenter, self.replier)
+        }
+        self.assertTrue(latest[self.replier.pk].startswith("notify-latecomer replied to your comment"))
+        self.assertTrue(latest[self.commenter.pk].startswith("notify-latecomer also replied"))
+
+    def test_publish(self):
+        blog = Blog.objects.create(author=self.commenter, title="Draft", content="Soon")
+        with self.captureOnCommitCallbacks(execute=True):
+            blog.is_published = True
+            blog.save()
+            blog.save()
+        self.assertEqual(Notification.objects.filter(user=self.commenter).count(), 1)
+
+    def unread_count(self):
+        response = self.client.get(f"/{BLOG}notifications/unread-count/")
+        self.assertEqual(response.status_code, 200)
+        return response.data["unread_count"]
+
+    def test_unread_count(self):
+        self.client.force_authenticate(self.blog.author)
+        unread = self.unread_count()
+        self.comment(self.commenter)
+        self.assertEqual(self.unread_count(), unread + 1)
+
+        newest = Notification.objects.filter(user=self.blog.author).latest("pk")
+        response = self.client.post(f"/{BLOG}notifications/mark-read/", {"ids": [newest.pk]}, format="json")
+        self.assertEqual(response.data, {"updated": 1, "unread_count": unread})
+        response = self.client.post(f"/{BLOG}notifications/mark-read/", {}, format="json")
+        self.assertEqual(response.data["unread_count"], 0)
+
+    def test_process_local_cache(self):
+        self.client.force_authenticate(self.blog.author)
+        self.comment(self.commenter)
+        with self.settings(SINGLE_PROCESS=False):
+            self.assertGreater(self.unread_count(), 0)
+            # As if another worker marked the inbox read
+            Notification.objects.filter(user=self.blog.author).update(is_read=True)
+            self.assertEqual(self.unread_count(), 0)
+
+
+class BlogEventStreamTests(TestCase):
+    """Open streams get a blog's reactions once they commit, and lagging clients are told to resync"""
+
+    @classmethod
+    def setUpTestData(cls):
+        Seeder({"users": 5, "authors": 1, "blogs": 4}, prefix="events").run()
+        cls.blog = Blog.objects.filter(is_published=True).order_by("pk").first()
+        cls.draft = Blog.objects.create(author=cls.blog.author, title="Draft", content="Soon")
+        cls.reader = User.objects.create_user(username="events-reader", password="password")
+        cls.token = str(PrincipalTokenObtainPairSerializer.get_token(cls.reader).access_token)
+
+    def open(self, blog, ticket=None):
+        if ticket is None:
+            ticket = issue_stream_ticket(self.reader.pk, blog.pk)
+        request = AsyncRequestFactory().get(f"/{BLOG}blogs/{blog.pk}/events/", {"ticket": ticket})
+        return blog_event_stream(request, blog.pk)
+
+    def react(self, reaction_type):
+        client = APIClient()
+        client.force_authenticate(self.reader)
+        with self.captureOnCommitCallbacks(execute=True):
+            return client.post(f"/{BLOG}blogs/{self.blog.pk}/reactions/", {"type": reaction_type})
+
+    def test_ticket(self):
+        client = APIClient()
+        client.force_authenticate(self.reader)
+        ticket = client.post(f"/{BLOG}blogs/{self.blog.pk}/events/ticket/").data["ticket"]
+        self.assertEqual(read_stream_ticket(ticket, self.blog.pk), self.reader.pk)
+        self.assertNotIn(self.token, ticket)
+        # Only for the stream of the blog it was issued for, and only for a while
+        self.assertIsNone(read_stream_ticket(ticket, self.draft.pk))
+        self.assertIsNone(read_stream_ticket(ticket + "x", self.blog.pk))
+        with override_settings(EVENT_STREAM={"TICKET_MAX_AGE": -1}):
+            self.assertIsNone(read_stream_ticket(ticket, self.blog.pk))
+        self.assertEqual(APIClient().post(f"/{BLOG}blogs/{self.blog.pk}/events/ticket/").status_code, 401)
+
+    async def test_stream(self):
+        # Access tokens are not taken from the URL
+        request = AsyncRequestFactory().get(f"/{BLOG}blogs/{self.blog.pk}/events/", {"token": self.token})
+        self.assertEqual((await blog_event_stream(request, self.blog.pk)).status_code, 401)
+        other_blog = issue_stream_ticket(self.reader.pk, self.draft.pk)
+        self.assertEqual((await self.open(self.blog, ticket=other_blog)).status_code, 401)
+        self.assertEqual((await self.open(self.draft)).status_code, 404)
+
+        response = await self.open(self.blog)
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        stream = aiter(response.streaming_content)
+        self.assertTrue((await anext(stream)).startswith(b"retry:"))
+
+        await sync_to_async(self.react)("wow")
+        frame = (await asyncio.wait_for(anext(stream), 5)).decode()
+        self.assertTrue(frame.startswith("event: reaction\n"))
+        self.assertEqual(json.loads(frame.split("data: ", 1)[1])["delta"], {"wow": 1})
+
+        # A client going away cancels the pending read, which gives the subscription back
+        with self.assertRaises(asyncio.TimeoutError):
+            await asyncio.wait_for(anext(stream), 0.05)
+        self.assertNotIn(blog_channel(self.blog.pk), get_broker()._subscribers)
+
+    async def test_lagged(self):
+        broker = LocalBroker(queue_size=2)
+        subscription = broker.subscribe("blog:1")
+        for n in range(3):
+            broker.publish("blog:1", n)
+        await asyncio.sleep(0)
+        self.assertTrue(subscription.lagged)
+        self.assertEqual([subscription.queue.get_nowait() for _ in range(2)], [1, 2])
+
+
+class AsyncPublicApiTests(APITestCase):
+    """The async public views answer exactly like the sync views they replace"""
+
+    @classmethod
+    def setUpTestData(cls):
+        Seeder({"users": 10, "authors": 2, "blogs": 8}, prefix="asyncapi").run()
+        cls.blog = Blog.objects.filter(is_published=True).order_by("pk").first()
+        cls.reader = User.objects.filter(role="USER").first()
+        cls.token = str(PrincipalTokenObtainPairSerializer.get_token(cls.reader).access_token)
+
+    def setUp(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {self.token}")
+
+    def async_get(self, view, path, data=None, token=None, **kwargs):
+        headers = {"authorization": f"Bearer {token or self.token}"}
+        request = AsyncRequestFactory().get(f"/{BLOG}{path}", data, headers=headers)
+        return async_to_sync(view.as_view())(request, **kwargs)
+
+    def test_same_responses(self):
+        # Record this client's view first, so both reads see the same views_count
+        self.client.get(f"/{BLOG}posts/{self.blog.slug}/")
+        cases = [
+            (async_views.BlogPostListView, "posts/", {"page_size": 3, "page": 2}, {}),
+            (async_views.BlogPostListView, "posts/", {"search": self.blog.title.split()[0]}, {}),
+            (async_views.BlogPostDetailView, f"posts/{self.blog.slug}/", None, {"slug": self.blog.slug}),
+            (async_views.FeaturedBlogListView, "blogs/featured/", None, {}),
+            (async_views.StatsCountView, "stats/", None, {}),
+        ]
+        for view, path, data, kwargs in cases:
+            expected = self.client.get(f"/{BLOG}{path}", data)
+            response = self.async_get(view, path, data, **kwargs)
+            self.assertEqual(response.status_code, expected.status_code, path)
+            self.assertEqual(json.loads(response.content), json.loads(expected.content), path)
+            self.assertEqual(response.get("ETag"), expected.get("ETag"), path)
+
+    def test_errors(self):
+        response = self.async_get(async_views.BlogPostListView, "posts/", token="not-a-token")
+        self.assertEqual(response.status_code, 401)
+        response = self.async_get(async_views.BlogPostDetailView, "posts/missing/", slug="missing")
+        self.assertEqual(response.status_code, 404)
+        self.assertIn("detail", json.loads(response.content))
+
+
+class ConditionalGetTests(APITestCase):
+    """Unchanged public responses revalidate to 304; any change a reader could see refetches"""
+
+    @classmethod
+    def setUpTestData(cls):
+        Seeder({"users": 10, "authors": 2, "blogs": 6}, prefix="conditional").run()
+        cls.blog = Blog.objects.filter(is_published=True).order_by("-published_at", "-created_at").first()
+        cls.reader = User.objects.filter(role="USER").first()
+        cls.other = User.objects.create_user(username="conditional-other", password="password")
+
+    def setUp(self):
+        self.client.force_authenticate(self.reader)
+
+    def revalidate(self, path, response, user=None):
+        if user is not None:
+            self.client.force_authenticate(user)
+        return self.client.get(path, HTTP_IF_NONE_MATCH=response["ETag"])
+
+    def test_post_detail(self):
+        path = f"/{BLOG}posts/{self.blog.slug}/"
+        # The first read records a view, which moves the ETag
+        self.client.get(path)
+        response = self.client.get(path)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("private", response["Cache-Control"])
+
+        revalidated = self.revalidate(path, response)
+        self.assertEqual(revalidated.status_code, 304)
+        self.assertEqual(revalidated.content, b"")
+        self.assertEqual(
+            self.client.get(path, HTTP_IF_MODIFIED_SINCE=response["Last-Modified"]).status_code, 304
+        )
+
+        # A revalidation from a new address is still a view
+        views = Blog.objects.get(pk=self.blog.pk).views_count
+        revalidated = self.client.get(path, HTTP_IF_NONE_MATCH=response["ETag"], REMOTE_ADDR="192.0.2.9")
+        self.assertEqual(revalidated.status_code, 304)
+        self.assertEqual(Blog.objects.get(pk=self.blog.pk).views_count, views + 1)
+        response = self.client.get(path)
+
+        # Reactions move the counters the response shows
+        Reaction.objects.create(blog=self.blog, user=self.other, type="haha")
+        self.assertEqual(self.revalidate(path, response).status_code, 200)
+        # Validators are per user: the response says which reaction is theirs
+        response = self.client.get(path)
+        self.assertEqual(self.revalidate(path, response, user=self.other).status_code, 200)
+
+    def test_post_list(self):
+        path = f"/{BLOG}posts/"
+        response = self.client.get(path)
+        self.assertEqual(self.revalidate(path, response).status_code, 304)
+
+        self.blog.title = "Retitled"
+        self.blog.save()
+        self.assertEqual(self.revalidate(path, response).status_code, 200)
+
+    def test_featured(self):
+        path = f"/{BLOG}blogs/featured/"
+        response = self.client.get(path)
+        self.assertIn("public", response["Cache-Control"])
+        self.assertEqual(self.revalidate(path, response).status_code, 304)
+
+        Category.objects.create(name="Conditional", slug="conditional")
+        self.assertEqual(self.revalidate(path, response).status_code, 200)
+
+
+class FeedReactionTests(APITestCase):
+    """Every card in a feed page shows the requesting user's own reaction"""
+
+    @classmethod
+    def setUpTestData(cls):
+        Seeder({"users": 5, "authors": 1, "blogs": 6}, prefix="feedreact").run()
+        cls.reader, cls.other = [
+            User.objects.create_user(username=f"feedreact-{name}", password="password") for name in ("reader", "other")
+        ]
+        blogs = list(Blog.objects.filter(is_published=True).order_by("pk"))
+        Reaction.objects.create(blog=blogs[0], user=cls.reader, type="love")
+        Reaction.objects.create(blog=blogs[1], user=cls.reader, type="sad")
+        Reaction.objects.create(blog=blogs[1], user=cls.other, type="like")
+
+    def user_reactions(self, user):
+        self.client.force_authenticate(user)
+        results = self.client.get(f"/{BLOG}posts/", {"page_size": 50}).data["results"]
+        return {blog["id"]: blog["user_reaction"] for blog in results}
+
+    def test_user_reactions(self):
+        for user in (self.reader, self.other):
+            expected = dict.fromkeys(self.user_reactions(user))
+            expected.update(Reaction.objects.filter(user=user).values_list("blog_id", "type"))
+            self.assertEqual(self.user_reactions(user), expected, user.username)
+
+
+class ExcerptTests(APITestCase):
+    """List rows carry a plain-text excerpt kept in step with the content"""
+
+    @classmethod
+    def setUpTestData(cls):
+        Seeder({"users": 5, "authors": 1, "blogs": 0}, prefix="excerpt").run()
+        cls.author = User.objects.filter(role="AUTHOR").first()
+        cls.blog = Blog.objects.create(
+            author=cls.author, title="Long read", is_published=True,
+            content="<p>Hello <b>world</b></p>\n" + "word " * 100,
+        )
+
+    def test_excerpt(self):
+        self.assertTrue(self.blog.excerpt.startswith("Hello world word"))
+        self.assertLessEqual(len(self.blog.excerpt), Blog.EXCERPT_LENGTH)
+
+        self.blog.content = "<em>Short</em> now"
+        self.blog.save(update_fields=["content"])
+        self.assertEqual(Blog.objects.get(pk=self.blog.pk).excerpt, "Short now")
+
+    def test_list_projection(self):
+        self.client.force_authenticate(self.author)
+        cards = self.client.get(f"/{BLOG}posts/").data["results"]
+        self.assertEqual(cards[0]["excerpt"], self.blog.excerpt)
+        self.assertNotIn("content", cards[0])
+        rows = self.client.get(f"/{BLOG}blogs/").data["results"]
+        self.assertNotIn("content", rows[0])
+        self.assertEqual(self.client.get(f"/{BLOG}posts/{self.blog.slug}/").data["content"], self.blog.content)
@@ -0,0 +1,101 @@
+from collections import defaultdict
+
+from django.db.models import Count, F, Q, Window
+from django.db.models.functions import RowNumber
+
+from .models import Comment
+
+
+def thread_options(query_params):
+    """``max_depth`` and ``replies_limit`` query params; None means unlimited"""
+    def non_negative(name):
+        value = query_params.get(name, "").strip()
+        return int(value) if value.isdigit() else None
+
+    return non_negative("max_depth"), non_negative("replies_limit")
+
+
+def attach_threads(roots, max_depth=None, replies_limit=None):
+    """
+    Load the replies below ``roots`` with one query over their path ranges,
+    ordered by materialized path, and assemble the trees in memory.
+
+    Each node gets ``thread_replies`` (newest first, at most ``replies_limit``),
+    ``replies_count`` and ``has_more_replies``, which is what clients need to
+    ask for the rest through the replies endpoint. ``replies_limit`` is applied
+    in the query, by ranking each reply among its siblings, so a large thread
+    does not load the replies it will not show. ``max_depth`` counts levels
+    below the roots; replies of nodes on the last level are only counted, with
+    one extra grouped query.
+    """
+    roots = list(roots)
+    if not roots:
+        return roots
+    if replies_limit == 0:
+        max_depth = 0
+
+    depth_limit = {}
+    children = defaultdict(list)
+    reply_counts = defaultdict(int)
+    for root in roots:
+        depth_limit[root.pk] = None if max_depth is None else root.depth + max_depth
+
+    if max_depth != 0:
+        subtrees = Q()
+        for root in roots:
+            subtree = Comment.subtree(root.path) & Q(depth__gt=root.depth)
+            if max_depth is not None:
+                subtree &= Q(depth__lte=depth_limit[root.pk])
+            subtrees |= subtree
+
+        descendants = (
+            Comment.objects.select_related("user")
+            .filter(subtrees, blog_id__in={root.blog_id for root in roots})
+            .order_by("path")
+        )
+        if replies_limit is not None:
+            descendants = descendants.annotate(
+                sibling_rank=Window(
+                    RowNumber(), partition_by=F("parent_id"), order_by=[F("created_at").desc(), F("pk").desc()]
+                ),
+                siblings=Window(Count("pk"), partition_by=F("parent_id")),
+            ).filter(sibling_rank__lte=replies_limit)
+
+        # Path order visits every parent before its replies
+        for node in descendants:
+            # Below a reply that the limit left out
+            if node.parent_id not in depth_limit:
+                continue
+            depth_limit[node.pk] = depth_limit[node.parent_id]
+            children[node.parent_id].append(node)
+            if replies_limit is None:
+                reply_counts[node.parent_id] += 1
+            else:
+                reply_counts[node.parent_id] = node.siblings
+
+    nodes = roots + [node for replies in children.values() for node in replies]
+
+    frontier = {
+        node.pk for node in nodes
+        if depth_limit[node.pk] is not None and node.depth >= depth_limit[node.pk]
+    }
+    hidden_counts = {}
+    if frontier:
+        hidden_counts = dict(
+            Comment.objects.filter(parent_id__in=frontier)
+            .order_by()
+            .values("parent_id")
+            .annotate(total=Count("pk"))
+            .values_list("parent_id", "total")
+        )
+
+    for node in nodes:
+        replies = sorted(children[node.pk], key=lambda reply: (reply.created_at, reply.pk), reverse=True)
+        if node.pk in frontier:
+            node.replies_count = hidden_counts.get(node.pk, 0)
+        else:
+            node.replies_count = reply_counts[node.pk]
+        node.thread_replies = replies if replies_limit is None else replies[:replies_limit]
+        node.has_more_replies = node.replies_count > len(node.thread_replies)
+
+    return roots
@@ -0,0 +1,157 @@
+from collections import Counter, namedtuple
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import IntegrityError, connection, transaction
+from django.utils import timezone
+
+from .buffers import BufferedWriter
+from .counters import apply_bulk_deltas
+from .models import Blog, BlogVisitor, ViewCount
+from .visitors import write_sketch_batch
+
+
+ViewEvent = namedtuple("ViewEvent", ["blog_id", "ip_address", "user_id", "viewed_at"])
+
+DEFAULTS = {
+    "BUFFERED": True,
+    "BATCH_SIZE": 500,
+    "FLUSH_INTERVAL": 2.0,
+    "MAX_QUEUE": 10000,
+    "OVERFLOW": "drop",
+    "UNIQUE_MODE": "exact",
+    "HLL_PRECISION": 12,
+}
+
+
+def tracking_settings():
+    return {**DEFAULTS, **getattr(settings, "VIEW_TRACKING", {})}
+
+
+# ---------------------------
+# Write-behind view tracker
+# ---------------------------
+class ViewTracker(BufferedWriter):
+    """
+    Collects blog views in memory and writes them in batches.
+
+    A batch costs one SELECT for the blogs still live (views of blogs
+    deleted while buffered are dropped), one for the visitors (BlogVisitor)
+    already seen, one INSERT of the new ones (conflicts skipped, so
+    concurrent workers cannot fail it), one bulk INSERT of their ViewCount
+    rows, which keep the time of the view, and one UPDATE for the
+    views_count of every blog in the batch. In "hll" unique mode batches go to HyperLogLog sketches
+    instead (blog_app.visitors).
+    """
+
+    def record(self, blog_id, ip_address, user_id=None):
+        if not ip_address:
+            return False
+        event = ViewEvent(blog_id, ip_address, user_id, timezone.now())
+        if not tracking_settings()["BUFFERED"]:
+            self.write_batch([event])
+            return True
+        return self.submit(event)
+
+    async def arecord(self, blog_id, ip_address, user_id=None):
+        """record() for async views; only hops to a thread when it may write to the DB"""
+        config = tracking_settings()
+        if config["BUFFERED"] and config["OVERFLOW"] != "sync":
+            return self.record(blog_id, ip_address, user_id)
+        return await sync_to_async(self.record)(blog_id, ip_address, user_id)
+
+    def write_batch(self, events):
+        config = tracking_settings()
+        if config["UNIQUE_MODE"] == "hll":
+            return write_sketch_batch(events, config["HLL_PRECISION"])
+
+        # First view wins: one visitor and one ViewCount row per (blog, ip)
+        first_views = {}
+        for event in events:
+            first_views.setdefault((event.blog_id, event.ip_address), event)
+
+        # Blogs deleted while their views were buffered
+        live = set(
+            Blog.objects.filter(pk__in={blog_id for blog_id, _ in first_views}).order_by().values_list("pk", flat=True)
+        )
+        first_views = {key: event for key, event in first_views.items() if key[0] in live}
+        if not first_views:
+            return 0
+
+        with transaction.atomic():
+            existing = set(
+                BlogVisitor.objects.filter(
+                    blog_id__in={blog_id for blog_id, _ in first_views},
+                    ip_address__in={ip for _, ip in first_views},
+                ).values_list("blog_id", "ip_address")
+            )
+            # A concurrent worker may have recorded some visitors since the SELECT
+            new_visitors = insert_new_visitors([key for key in first_views if key not in existing])
+            ViewCount.objects.bulk_create([
+                ViewCount(
+                    blog_id=blog_id, ip_address=ip_address,
+                    user_id=first_views[(blog_id, ip_address)].user_id,
+                    viewed_at=first_views[(blog_id, ip_address)].viewed_at,
+                )
+                for blog_id, ip_address in new_visitors
+            ], ignore_conflicts=True)
+            apply_bulk_deltas("views_count", Counter(blog_id for blog_id, _ in new_visitors))
+
+        return len(new_visitors)
+
+
+# Rows per INSERT ... RETURNING, well under every backend's parameter limit
+INSERT_CHUNK_SIZE = 500
+
+
+def insert_new_visitors(pairs):
+    """
+    INSERT a BlogVisitor for each (blog_id, ip_address) in ``pairs`` that is
+    not one yet, and return the pairs actually inserted. bulk_create() with
+    ignore_conflicts cannot say which rows it skipped, so PostgreSQL and
+    SQLite use INSERT ... ON CONFLICT DO NOTHING RETURNING; other backends
+    insert row by row in savepoints.
+    """
+    if connection.vendor not in ("postgresql", "sqlite"):
+        inserted = []
+        for blog_id, ip_address in pairs:
+            try:
+                with transaction.atomic():
+                    BlogVisitor.objects.create(blog_id=blog_id, ip_address=ip_address)
+            except IntegrityError:
+                continue
+            inserted.append((blog_id, ip_address))
+        return inserted
+
+    quote = connection.ops.quote_name
+    columns = ", ".join(
+        quote(BlogVisitor._meta.get_field(name).column) for name in ("blog", "ip_address")
+    )
+    first_seen_field = BlogVisitor._meta.get_field("first_seen")
+    first_seen = first_seen_field.get_db_prep_value(timezone.now(), connection)
+    inserted = []
+    with connection.cursor() as cursor:
+        for start in range(0, len(pairs), INSERT_CHUNK_SIZE):
+            chunk = pairs[start:start + INSERT_CHUNK_SIZE]
+            cursor.execute(
+                f"INSERT INTO {quote(BlogVisitor._meta.db_table)} "
+                f"({columns}, {quote(first_seen_field.column)}) "
+                f"VALUES {', '.join(['(%s, %s, %s)'] * len(chunk))} "
+                f"ON CONFLICT ({columns}) DO NOTHING RETURNING {columns}",
+                [value for pair in chunk for value in (*pair, first_seen)],
+            )
+            inserted += [tuple(row) for row in cursor.fetchall()]
+    return inserted
+
+
+def _build_tracker():
+    config = tracking_settings()
+    return ViewTracker(
+        batch_size=config["BATCH_SIZE"],
+        flush_interval=config["FLUSH_INTERVAL"],
+        max_queue=config["MAX_QUEUE"],
+        overflow=config["OVERFLOW"],
+    )
+
+
+view_tracker = _build_tracker()
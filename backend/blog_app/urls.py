@@ -1,5 +1,9 @@
+from django.conf import settings
 from django.urls import path
-from . import views
+from . import async_views, views
+
+# Async implementations of the public read endpoints, for ASGI deployments
+public_views = async_views if getattr(settings, "ASYNC_PUBLIC_API", False) else views
 
 urlpatterns = [
     # Categories
@@ -17,17 +21,32 @@ urlpatterns = [
     path("blogs/<int:pk>/", views.BlogDetailView.as_view(), name="blog-detail"),
 
     path("blogs/<int:pk>/publish/", views.BlogPublishToggleView.as_view(), name="blog-publish-toggle"),
+    path("blogs/<int:pk>/daily-stats/", views.BlogDailyStatsView.as_view(), name="blog-daily-stats"),
 
     # Comments
     path("blogs/<int:blog_id>/comments/", views.CommentListCreateView.as_view(), name="comment-list"),
     path("comments/<int:pk>/", views.CommentDetailView.as_view(), name="comment-detail"),
+    path("comments/<int:pk>/replies/", views.CommentRepliesView.as_view(), name="comment-replies"),
 
     # Likes
     path('blogs/<int:blog_pk>/reactions/', views.ReactionViewSet.as_view({'get': 'list', 'post': 'create'}), name='blog-reactions'),
 
+    # Live updates (Server-Sent Events, served under ASGI)
+    path("blogs/<int:blog_id>/events/", async_views.blog_event_stream, name="blog-events"),
+    path("blogs/<int:blog_id>/events/ticket/", views.BlogEventTicketView.as_view(), name="blog-events-ticket"),
+
+    # Notifications
+    path("notifications/", views.NotificationListView.as_view(), name="notification-list"),
+    path("notifications/unread-count/", views.NotificationUnreadCountView.as_view(), name="notification-unread-count"),
+    path("notifications/mark-read/", views.NotificationMarkReadView.as_view(), name="notification-mark-read"),
+
+    # Advertisements
+    path("ads/serve/", views.AdServeView.as_view(), name="ad-serve"),
+    path("ads/<int:pk>/click/", views.AdClickView.as_view(), name="ad-click"),
+
     # public urls 
-    path("blogs/featured/", views.FeaturedBlogListView.as_view(), name="featured-blogs"),
-    path("stats/", views.StatsCountView.as_view(), name="stats-count"),
-    path("posts/", views.BlogPostListView.as_view(), name="blog-list"),
-    path("posts/<str:slug>/", views.BlogPostDetailView.as_view(), name="blog-detail"),
+    path("blogs/featured/", public_views.FeaturedBlogListView.as_view(), name="featured-blogs"),
+    path("stats/", public_views.StatsCountView.as_view(), name="stats-count"),
+    path("posts/", public_views.BlogPostListView.as_view(), name="blog-list"),
+    path("posts/<str:slug>/", public_views.BlogPostDetailView.as_view(), name="blog-detail"),
 ]
\ No newline at end of file
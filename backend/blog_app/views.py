@@ -1,28 +1,53 @@
 from rest_framework import generics, permissions
 from rest_framework.response import Response
 from rest_framework import status, viewsets
-from django.db.models import Count, Prefetch
+from django.db.models import Prefetch
 from rest_framework.decorators import action
 from django.contrib.auth import get_user_model
-from .models import Category, Tag, Blog, Comment, Reaction, ViewCount
+from .models import Category, Tag, Blog, Comment, Reaction, Notification, Advertisement
 from .serializers import (
     CategorySerializer,
     TagSerializer,
     BlogSerializer,
+    BlogListSerializer,
     BlogPublishSerializer,
     CommentSerializer,
     ReactionSerializer,
     PublicBlogSerializer,
-    FeaturedBlogSerializer
+    PublicBlogListSerializer,
+    FeaturedBlogSerializer,
+    NotificationSerializer,
+    NotificationMarkReadSerializer,
+    AdvertisementSerializer,
+    BlogDailyStatsSerializer,
 )
 from accounts.permissions import IsAdminOrAuthor, IsAuthorOrAdminForObject, IsAdmin,IsOwnerOrAdminForObject
+from accounts.throttling import IPThrottle, UserThrottle
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.permissions import AllowAny
-from .pagination import CategoryPagination, TagPagination, BlogPagination, PublicBlogPagination
+from rest_framework.throttling import BaseThrottle
+from .pagination import (
+    CategoryPagination, TagPagination, BlogPagination, PublicBlogPagination, CommentPagination,
+    NotificationPagination,
+)
+from .ads import ad_counter, ad_index, ad_settings
+from .cache import cached_response, model_versions
+from .conditional import conditional_get, latest, make_etag, version_datetime, version_validators
+from .counters import COUNTER_FIELDS
+from .reactions import toggle_reaction
+from .rollup import daily_stats
+from .events import issue_stream_ticket, publish_blog_event
+from .notifications import mark_read, unread_count
+from .search import get_search_backend
+from .stats import get_site_stats
+from .threads import attach_threads, thread_options
+from .tracking import view_tracker
 from django.utils import timezone
 from datetime import timedelta
 from django.db import IntegrityError
 from django.db.models import Q
+from django.http import Http404, HttpResponseRedirect
+from django.utils.cache import patch_cache_control
 
 
 User = get_user_model()
@@ -40,6 +65,11 @@ class CategoryListCreateView(generics.ListCreateAPIView):
         if self.request.method == "POST":  # only ADMIN can create
             return [permissions.IsAuthenticated(), IsAdmin()]
         return [permissions.AllowAny()]
+
+    @conditional_get(version_validators(Category))
+    @cached_response(Category)
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
     
     def get_queryset(self):
         queryset = Category.objects.all()
@@ -84,6 +114,11 @@ class TagListCreateView(generics.ListCreateAPIView):
             return [permissions.IsAuthenticated(), IsAdmin()]
         return [permissions.AllowAny()]
 
+    @conditional_get(version_validators(Tag))
+    @cached_response(Tag)
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
+
     def get_queryset(self):
         queryset = Tag.objects.all()
 
@@ -126,9 +161,20 @@ class BlogListCreateView(generics.ListCreateAPIView):
         if self.request.method == "POST":  # only ADMIN or AUTHOR can create
             return [permissions.IsAuthenticated(), IsAdminOrAuthor()]
         return [permissions.AllowAny()]
+
+    def get_serializer_class(self):
+        # Table rows only need an excerpt; creating still returns the full blog
+        if self.request.method == "GET":
+            return BlogListSerializer
+        return BlogSerializer
+
     def get_queryset(self):
         user = self.request.user
-        queryset = Blog.objects.select_related("author", "category").prefetch_related("tags", "views")
+        queryset = (
+            Blog.objects.select_related("author", "category")
+            .prefetch_related("tags")
+            .defer("content")
+        )
 
         if user.is_authenticated and hasattr(user, "role") and user.role == "AUTHOR":
             queryset = queryset.filter(author=user)
@@ -137,18 +183,14 @@ class BlogListCreateView(generics.ListCreateAPIView):
         search = self.request.query_params.get("search", "").strip()
         category_id = self.request.query_params.get("category_id")
 
-        # Filter by search
-        if search:
-            queryset = queryset.filter(
-                Q(title__icontains=search)
-                | Q(content__icontains=search)
-                | Q(tags__name__icontains=search)
-            ).distinct()
-
         # Filter by category_id
         if category_id and category_id.isdigit():
             queryset = queryset.filter(category_id=category_id)
 
+        # Full-text search, best matches first
+        if search:
+            return get_search_backend().search(queryset, search).order_by("-search_rank", "-id")
+
         return queryset.order_by("-id")
 
     def perform_create(self, serializer):
@@ -177,112 +219,170 @@ class BlogPublishToggleView(generics.UpdateAPIView):
 # ---------------------------
 # Blog Post Views for public
 # ---------------------------
-class BlogPostListView(generics.ListAPIView):
-    serializer_class = PublicBlogSerializer
-    permission_classes = [permissions.IsAuthenticated]
-    pagination_class = PublicBlogPagination
+def user_reaction_prefetch(user):
+    """
+    Prefetch only the current user's reaction, as ``current_user_reactions``,
+    so a whole page resolves ``user_reaction`` with one query.
+    """
+    reactions = Reaction.objects.none()
+    if user.is_authenticated:
+        reactions = Reaction.objects.filter(user=user).only("id", "blog_id", "type")
+    return Prefetch("reactions", queryset=reactions, to_attr="current_user_reactions")
+
+
+def public_blog_queryset(user):
+    """Published, active blogs with everything the public serializers read"""
+    return (
+        Blog.objects.filter(is_active=True, is_published=True)
+        .select_related("author", "category")
+        .prefetch_related(
+            "tags",
+            user_reaction_prefetch(user),
+        )
+    )
 
-    def get_queryset(self):
-        queryset = (
-            Blog.objects.filter(is_active=True, is_published=True)
-            .select_related("author", "category")
-            .prefetch_related(
-                "tags",
-                "views",
-                Prefetch(
-                    "comments",
-                    queryset=Comment.objects.select_related("user")
-                ),
-                "reactions"
-            )
+
+def filter_public_blog_list(queryset, params, search_backend=None):
+    """Category filter and search (best matches first) of the public feed"""
+    search = params.get("search", "").strip()
+    category_id = params.get("category_id")
+
+    # Filter by category_id
+    if category_id and category_id.isdigit():
+        queryset = queryset.filter(category_id=category_id)
+
+    # Full-text search, best matches first
+    if search:
+        search_backend = search_backend or get_search_backend()
+        return search_backend.search(queryset, search).order_by(
+            "-search_rank", "-published_at", "-created_at"
         )
 
-        search = self.request.query_params.get("search", "").strip()
-        category_id = self.request.query_params.get("category_id")
+    return queryset.order_by("-published_at", "-created_at")
+
+
+def get_client_ip(request):
+    """
+    Extract client IP address from request.
+    Trusts X-Forwarded-For only as far as REST_FRAMEWORK["NUM_PROXIES"]
+    says, like the throttles, so a client cannot pick its own address.
+    """
+    return BaseThrottle().get_ident(request)
+
+
+# Everything a public blog response shows besides its own row
+PUBLIC_BLOG_RELATED_MODELS = (Category, Tag, User)
+
+VALIDATOR_FIELDS = ("pk", "updated_at", "last_engaged_at", *COUNTER_FIELDS)
+
+
+def _public_blog_validators(request, rows, models):
+    """ETag and Last-Modified of a per-user public blog response; None without model versions"""
+    versions = model_versions(models)
+    if versions is None:
+        return None
+    etag = make_etag(request.user.pk, request.get_full_path(), rows, sorted(versions.items()))
+    last_modified = latest(
+        *(row[1] for row in rows),
+        *(row[2] for row in rows),
+        *map(version_datetime, versions.values()),
+    )
+    return etag, last_modified
+
+
+def post_list_validators(request, *args, **kwargs):
+    """
+    Validators of a feed page from the page's own rows (one indexed slice
+    of narrow columns, no prefetches) and the versions of Blog and its
+    related models, which move whenever the page's membership can.
+    """
+    # Ranked search results are always rendered
+    if request.query_params.get("search", "").strip():
+        return None
+    queryset = filter_public_blog_list(
+        Blog.objects.filter(is_active=True, is_published=True), request.query_params
+    )
+    window = PublicBlogPagination().page_window(queryset, request)
+    if window is None:
+        return None
+    rows = list(window.values_list(*VALIDATOR_FIELDS))
+    return _public_blog_validators(request, rows, (Blog, *PUBLIC_BLOG_RELATED_MODELS))
+
+
+def post_detail_validators(request, slug=None, *args, **kwargs):
+    """
+    Validators of one post from a single lookup on the slug index. Also
+    tracks the view: a revalidation is a view too, and a 304 never reaches
+    the handler.
+    """
+    row = (
+        Blog.objects.filter(slug=slug, is_active=True, is_published=True)
+        .values_list(*VALIDATOR_FIELDS)
+        .first()
+    )
+    if row is None:
+        return None
+    track_post_view(request, row[0])
+    return _public_blog_validators(request, [row], PUBLIC_BLOG_RELATED_MODELS)
+
+
+def track_post_view(request, blog_id):
+    """Queue a view of ``blog_id`` (unique per IP per blog) for the write-behind tracker, once per request"""
+    if getattr(request, "tracked_view", False):
+        return
+    request.tracked_view = True
+    user_id = request.user.pk if request.user.is_authenticated else None
+    view_tracker.record(blog_id, get_client_ip(request), user_id)
 
-        # Filter by search
-        if search:
-            queryset = queryset.filter(
-                Q(title__icontains=search)
-                | Q(content__icontains=search)
-                | Q(tags__name__icontains=search)
-            ).distinct()
 
-        # Filter by category_id
-        if category_id and category_id.isdigit():
-            queryset = queryset.filter(category_id=category_id)
+class BlogPostListView(generics.ListAPIView):
+    serializer_class = PublicBlogListSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = PublicBlogPagination
 
-        # Add annotation counts before ordering
-        queryset = queryset.annotate(
-            views_count_annotated=Count("views", distinct=True),
-            comments_count_annotated=Count("comments", distinct=True),
-        ).order_by("-published_at", "-created_at")
+    @conditional_get(post_list_validators, private=True)
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
 
-        return queryset
+    def get_queryset(self):
+        # Cards show counters and an excerpt: no engagement rows, no content
+        queryset = public_blog_queryset(self.request.user).defer("content")
+        return filter_public_blog_list(queryset, self.request.query_params)
 
 class BlogPostDetailView(generics.RetrieveAPIView):
 
     serializer_class = PublicBlogSerializer
     permission_classes = [permissions.IsAuthenticated]
+    # Every hit may record a view
+    throttle_classes = [IPThrottle]
+    throttle_scope = "post_views"
     lookup_field = 'slug'
     lookup_url_kwarg = 'slug'
 
     def get_queryset(self):
-        return (
-            Blog.objects.filter(is_active=True, is_published=True)
-            .select_related("author", "category")
-            .prefetch_related(
-                "tags",
-                "views",
-                Prefetch(
-                    'comments',
-                    queryset=Comment.objects.select_related('user').order_by('-created_at')
-                ),
-                "reactions"
-            )
-            .annotate(
-                comments_count=Count('comments', distinct=True)
-            )
-        )
+        return public_blog_queryset(self.request.user)
+
+    @conditional_get(post_detail_validators, private=True)
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
 
     def retrieve(self, request, *args, **kwargs):
         """
         Override retrieve to track view count by IP address.
-        Uses update_or_create to prevent duplicate views from same IP.
+        Views are queued for the write-behind tracker, so the response never
+        waits on a DB write; duplicate views from the same IP are ignored.
         """
         instance = self.get_object()
-        
-        # Get client IP address
-        ip = self.get_client_ip(request)
-        user = request.user if request.user.is_authenticated else None
 
-        # Track view (unique per IP per blog)
-        try:
-            ViewCount.objects.update_or_create(
-                blog=instance,
-                ip_address=ip,
-                defaults={'user': user}
-            )
-        except IntegrityError:
-            # Ignore duplicate view
-            pass
+        # Unless the validators already did
+        track_post_view(request, instance.pk)
 
         # Return serialized blog data
         serializer = self.get_serializer(instance)
         return Response(serializer.data)
 
     def get_client_ip(self, request):
-        """
-        Extract client IP address from request.
-        Handles proxy forwarding (X-Forwarded-For header).
-        """
-        x_forwarded_for = request.META.get("HTTP_X_FORWARDED_FOR")
-        if x_forwarded_for:
-            # Take first IP in chain
-            ip = x_forwarded_for.split(",")[0].strip()
-        else:
-            ip = request.META.get("REMOTE_ADDR")
-        return ip
+        return get_client_ip(request)
 
 # ---------------------------
 # Blog posts and user count Views
@@ -291,42 +391,102 @@ class StatsCountView(generics.GenericAPIView):
     permission_classes = [AllowAny]   # anyone can view stats
 
     def get(self, request, *args, **kwargs):
-        blog_count = Blog.objects.filter(is_published=True, is_active=True).count()
-        user_count = User.objects.filter(is_active=True).count()
-        week_ago = timezone.now() - timedelta(days=7)
-        new_content_count = Blog.objects.filter(created_at__gte=week_ago, is_published=True, is_active=True).count()
+        # Materialized by blog_app.stats: one primary-key lookup, no COUNTs
+        stats = get_site_stats()
 
         return Response({
-            "blog_count": blog_count,
-            "user_count": user_count,
-            "new_content_count": new_content_count,
+            "blog_count": stats.blog_count,
+            "user_count": stats.user_count,
+            "new_content_count": stats.new_content_count,
+            "computed_at": stats.computed_at,
         })
 
+
+class BlogDailyStatsView(generics.ListAPIView):
+    """
+    A blog's views, unique visitors, reactions and comments per day for its
+    author or an admin, read from the rollup (``?days=``, 30 by default,
+    at most 365); today fills in as ``rollup_blog_stats`` runs.
+    """
+    serializer_class = BlogDailyStatsSerializer
+    permission_classes = [permissions.IsAuthenticated, IsAuthorOrAdminForObject]
+    pagination_class = None
+
+    MAX_DAYS = 365
+
+    def get_queryset(self):
+        blog = generics.get_object_or_404(Blog.objects.only("id", "author_id"), pk=self.kwargs["pk"])
+        self.check_object_permissions(self.request, blog)
+        days = self.request.query_params.get("days", "")
+        days = min(max(int(days), 1), self.MAX_DAYS) if days.isdigit() else 30
+        return daily_stats(blog.pk, days)
+
 # ---------------------------
 # Featured Blog posts Views
 # ---------------------------
+def featured_blog_queryset():
+    return Blog.objects.filter(
+        is_featured=True, is_published=True, is_active=True
+    ).select_related("category").order_by("-published_at", "-created_at")[:3]
+
+
 class FeaturedBlogListView(generics.ListAPIView):
     serializer_class = FeaturedBlogSerializer
     permission_classes = [AllowAny]
 
+    @conditional_get(version_validators(Blog, Category))
+    @cached_response(Blog, Category)
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
+
     def get_queryset(self):
-        return Blog.objects.filter(
-            is_featured=True, is_published=True, is_active=True
-        ).order_by("-published_at", "-created_at")[:3]
+        return featured_blog_queryset()
 
 # ---------------------------
 # Comment Views
 # ---------------------------
-class CommentListCreateView(generics.ListCreateAPIView):
+class ThreadedCommentListMixin:
+    """
+    List comments with their reply trees: one query for the page and one
+    path-ordered query for every reply below it, whatever the thread depth.
+    Supports ``max_depth`` and ``replies_limit`` query params.
+    """
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        comments = list(queryset) if page is None else page
+
+        max_depth, replies_limit = thread_options(request.query_params)
+        attach_threads(comments, max_depth, replies_limit)
+
+        serializer = self.get_serializer(comments, many=True)
+        if page is None:
+            return Response(serializer.data)
+        return self.get_paginated_response(serializer.data)
+
+
+class CommentListCreateView(ThreadedCommentListMixin, generics.ListCreateAPIView):
     serializer_class = CommentSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    pagination_class = CommentPagination
+    throttle_classes = [UserThrottle, IPThrottle]
+    throttle_scope = "comments"
+    throttle_methods = ["POST"]
 
     def get_queryset(self):
-        return Comment.objects.filter(blog_id=self.kwargs["blog_id"], parent__isnull=True)
+        return Comment.objects.select_related("user").filter(
+            blog_id=self.kwargs["blog_id"], parent__isnull=True
+        )
+
+    def get_serializer_context(self):
+        # Replies are checked against the blog of the URL they are posted to
+        return {**super().get_serializer_context(), "blog_id": self.kwargs["blog_id"]}
 
     def perform_create(self, serializer):
         blog_id = self.kwargs["blog_id"]
         serializer.save(user=self.request.user, blog_id=blog_id)
+        publish_blog_event(blog_id, "comment", serializer.data)
 
 
 class CommentDetailView(generics.RetrieveUpdateDestroyAPIView):
@@ -339,11 +499,24 @@ class CommentDetailView(generics.RetrieveUpdateDestroyAPIView):
         return [permissions.AllowAny()]
 
 
+class CommentRepliesView(ThreadedCommentListMixin, generics.ListAPIView):
+    """Direct replies of one comment, newest first ("load more replies")"""
+    serializer_class = CommentSerializer
+    permission_classes = [permissions.AllowAny]
+    pagination_class = CommentPagination
+
+    def get_queryset(self):
+        return Comment.objects.select_related("user").filter(parent_id=self.kwargs["pk"])
+
+
 # ---------------------------
 # Like Views
 # ---------------------------
 class ReactionViewSet(viewsets.ViewSet):
     permission_classes = [permissions.IsAuthenticated]
+    throttle_classes = [UserThrottle, IPThrottle]
+    throttle_scope = "reactions"
+    throttle_methods = ["POST"]
 
     def list(self, request, blog_pk=None):
         """Get reaction counts for a blog"""
@@ -352,13 +525,8 @@ class ReactionViewSet(viewsets.ViewSet):
         except Blog.DoesNotExist:
             return Response({"error": "Blog not found"}, status=404)
 
-        # Get counts for each reaction type
-        counts = blog.reactions.values('type').annotate(count=Count('type'))
-        reaction_counts = {item['type']: item['count'] for item in counts}
-        
-        # Initialize all types with 0
-        all_counts = {rtype: 0 for rtype, _ in Reaction.REACTION_CHOICES}
-        all_counts.update(reaction_counts)
+        # Counts for each reaction type come from the blog's counter columns
+        all_counts = blog.reaction_counts
 
         # Get user's current reaction
         user_reaction = None
@@ -373,11 +541,6 @@ class ReactionViewSet(viewsets.ViewSet):
 
     def create(self, request, blog_pk=None):
         """Add or toggle a reaction"""
-        try:
-            blog = Blog.objects.get(pk=blog_pk)
-        except Blog.DoesNotExist:
-            return Response({"error": "Blog not found"}, status=404)
-
         reaction_type = request.data.get('type')
         
         if not reaction_type or reaction_type not in dict(Reaction.REACTION_CHOICES):
@@ -386,39 +549,113 @@ class ReactionViewSet(viewsets.ViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        # Get existing reaction
-        existing_reaction = Reaction.objects.filter(
-            blog=blog, 
-            user=request.user
-        ).first()
+        # Upsert/delete plus maintained counters, in one transaction
+        try:
+            previous, user_reaction, all_counts = toggle_reaction(blog_pk, request.user.pk, reaction_type)
+        except Blog.DoesNotExist:
+            return Response({"error": "Blog not found"}, status=404)
 
+        # Live update for open streams of this blog
+        delta = {rtype: 0 for rtype in all_counts}
+        if previous:
+            delta[previous] -= 1
+        if user_reaction:
+            delta[user_reaction] += 1
+        publish_blog_event(blog_pk, "reaction", {
+            "blog": blog_pk,
+            "counts": all_counts,
+            "delta": {rtype: change for rtype, change in delta.items() if change},
+        })
 
-        if existing_reaction and existing_reaction.type == reaction_type:
-            existing_reaction.delete()
-            user_reaction = None
+        return Response({
+            'counts': all_counts,
+            'user_reaction': user_reaction
+        })
 
-        elif existing_reaction:
-            existing_reaction.type = reaction_type
-            existing_reaction.save()
-            user_reaction = reaction_type
 
-        else:
-            Reaction.objects.create(
-                blog=blog,
-                user=request.user,
-                type=reaction_type
-            )
-            user_reaction = reaction_type
+# ---------------------------
+# Live update Views
+# ---------------------------
+class BlogEventTicketView(generics.GenericAPIView):
+    """A short-lived ``?ticket=`` for EventSource to open the blog's event stream with"""
+    permission_classes = [permissions.IsAuthenticated]
 
+    def post(self, request, blog_id):
+        return Response({"ticket": issue_stream_ticket(request.user.pk, blog_id)})
 
-        counts = blog.reactions.values('type').annotate(count=Count('type'))
-        reaction_counts = {item['type']: item['count'] for item in counts}
-        
 
-        all_counts = {rtype: 0 for rtype, _ in Reaction.REACTION_CHOICES}
-        all_counts.update(reaction_counts)
+# ---------------------------
+# Notification Views
+# ---------------------------
+class NotificationListView(generics.ListAPIView):
+    """The current user's inbox, newest first, keyset paginated (``?unread=1`` for unread only)"""
+    serializer_class = NotificationSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = NotificationPagination
+
+    def get_queryset(self):
+        queryset = Notification.objects.filter(user=self.request.user)
+        if self.request.query_params.get("unread") in ("1", "true"):
+            queryset = queryset.filter(is_read=False)
+        return queryset
+
+
+class NotificationUnreadCountView(generics.GenericAPIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, *args, **kwargs):
+        return Response({"unread_count": unread_count(request.user.pk)})
+
+
+class NotificationMarkReadView(generics.GenericAPIView):
+    """Mark ``ids`` (or everything) read with a single UPDATE"""
+    serializer_class = NotificationMarkReadSerializer
+    permission_classes = [permissions.IsAuthenticated]
 
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        updated = mark_read(request.user.pk, serializer.validated_data.get("ids"))
         return Response({
-            'counts': all_counts,
-            'user_reaction': user_reaction
-        })
\ No newline at end of file
+            "updated": updated,
+            "unread_count": unread_count(request.user.pk),
+        })
+
+
+# ---------------------------
+# Advertisement Views
+# ---------------------------
+class AdServeView(generics.GenericAPIView):
+    """
+    ``?count=`` running ads (default 1) chosen by weight, from the in-process
+    index: no database query per request. Each one served is an impression.
+    """
+    serializer_class = AdvertisementSerializer
+    permission_classes = [AllowAny]
+
+    def get(self, request, *args, **kwargs):
+        count = request.query_params.get("count", "1")
+        count = min(int(count), ad_settings()["MAX_ADS"]) if count.isdigit() else 1
+        ads = ad_index.pick(max(count, 1))
+        ad_counter.record([ad.pk for ad in ads], "impression")
+
+        response = Response(self.get_serializer(ads, many=True).data)
+        patch_cache_control(response, no_store=True)
+        return response
+
+
+class AdClickView(generics.GenericAPIView):
+    """Count a click and redirect to the advertiser"""
+    permission_classes = [AllowAny]
+
+    def get(self, request, pk, *args, **kwargs):
+        ad = ad_index.get(pk)
+        # Ads that stopped running since they were served still redirect
+        url = ad.url if ad else Advertisement.objects.filter(pk=pk).values_list("url", flat=True).first()
+        if url is None:
+            raise Http404
+        ad_counter.record([pk], "click")
+
+        response = HttpResponseRedirect(url)
+        patch_cache_control(response, no_store=True)
+        return response
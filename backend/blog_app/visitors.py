@@ -0,0 +1,101 @@
+from collections import defaultdict
+
+from django.db import transaction
+from django.utils import timezone
+
+from .counters import apply_bulk_deltas
+from .hll import HyperLogLog
+from .models import Blog, BlogDailyStats, VisitorSketch
+from .rollup import locked_daily_stats
+
+
+# ---------------------------
+# Sketches
+# ---------------------------
+def load_sketch(data, precision):
+    """The stored sketch, or an empty one; a stored sketch keeps its own precision"""
+    return HyperLogLog.from_bytes(data) if data else HyperLogLog(precision)
+
+
+def write_sketch_batch(events, precision=12):
+    """
+    Fold a batch of view events into the visitor sketches of their blogs and
+    of their blogs' days, instead of a BlogVisitor row per visitor.
+
+    Each blog's batch becomes one sketch that is merged into the stored one
+    under a row lock, so workers never lose each other's visitors. A blog's
+    views_count and the views of its latest day in the batch grow by how
+    much its estimated audience grew; a day's unique_visitors is the
+    estimate of that day's sketch. Costs one query for the live blogs, an
+    INSERT, SELECT and UPDATE batch for each of the two sketch tables and
+    one UPDATE for views_count. Returns the estimated new visitors.
+    """
+    visitors, daily_visitors, latest_day = defaultdict(set), defaultdict(set), {}
+    for event in events:
+        day = timezone.localdate(event.viewed_at)
+        visitors[event.blog_id].add(event.ip_address)
+        daily_visitors[(event.blog_id, day)].add(event.ip_address)
+        latest_day[event.blog_id] = max(day, latest_day.get(event.blog_id, day))
+
+    # Blogs deleted while their views were buffered
+    live = set(Blog.objects.filter(pk__in=visitors).values_list("pk", flat=True))
+    visitors = {blog_id: ips for blog_id, ips in visitors.items() if blog_id in live}
+    daily_visitors = {key: ips for key, ips in daily_visitors.items() if key[0] in live}
+    if not visitors:
+        return 0
+
+    with transaction.atomic():
+        VisitorSketch.objects.bulk_create(
+            [VisitorSketch(blog_id=blog_id, sketch=b"") for blog_id in visitors], ignore_conflicts=True
+        )
+        rows = list(VisitorSketch.objects.select_for_update().filter(blog_id__in=visitors))
+        new_visitors = {}
+        for row in rows:
+            sketch = load_sketch(row.sketch, precision)
+            before = sketch.count()
+            sketch.merge(HyperLogLog(sketch.precision).update(visitors[row.blog_id]))
+            new_visitors[row.blog_id] = max(sketch.count() - before, 0)
+            row.sketch = sketch.to_bytes()
+            row.updated_at = timezone.now()
+        VisitorSketch.objects.bulk_update(rows, ["sketch", "updated_at"])
+
+        days = locked_daily_stats(daily_visitors, ["views", "unique_visitors", "visitor_sketch"])
+        for (blog_id, day), ips in daily_visitors.items():
+            stats = days[(blog_id, day)]
+            sketch = load_sketch(stats.visitor_sketch, precision)
+            sketch.merge(HyperLogLog(sketch.precision).update(ips))
+            stats.visitor_sketch = sketch.to_bytes()
+            stats.unique_visitors = sketch.count()
+            if day == latest_day[blog_id]:
+                stats.views += new_visitors.get(blog_id, 0)
+        BlogDailyStats.objects.bulk_update(
+            [days[key] for key in daily_visitors], ["views", "unique_visitors", "visitor_sketch"]
+        )
+
+        apply_bulk_deltas("views_count", new_visitors)
+    return sum(new_visitors.values())
+
+
+# ---------------------------
+# Reads
+# ---------------------------
+def unique_visitors(blog_id, since=None, until=None):
+    """
+    Estimated distinct visitors of a blog between two dates (inclusive), by
+    merging its daily sketches; all time without dates. None when the blog
+    has no sketches ("exact" mode).
+    """
+    if since is None and until is None:
+        data = VisitorSketch.objects.filter(blog_id=blog_id).values_list("sketch", flat=True).first()
+        return HyperLogLog.from_bytes(data).count() if data else None
+
+    days = BlogDailyStats.objects.filter(blog_id=blog_id, visitor_sketch__isnull=False)
+    if since is not None:
+        days = days.filter(date__gte=since)
+    if until is not None:
+        days = days.filter(date__lte=until)
+    merged = None
+    for data in days.values_list("visitor_sketch", flat=True).iterator():
+        sketch = HyperLogLog.from_bytes(data)
+        merged = sketch if merged is None else merged.merge(sketch)
+    return merged.count() if merged is not None else None
@@ -2,6 +2,7 @@ import { useEffect, useState } from 'react';
 import { Heart, Eye, Calendar, User } from 'lucide-react';
 import { Link } from 'react-router-dom';
 import ReactionBar from '../reactions/ReactionBar';
+import ResponsiveImage from '../common/ResponsiveImage';
 
 export default function BlogCard({ blog, isLoading, currentUser, onReact }) {
   const [userReaction, setUserReaction] = useState(blog?.user_reaction || null);
@@ -53,8 +54,10 @@ export default function BlogCard({ blog, isLoading, currentUser, onReact }) {
   return (
     <div className="bg-white dark:bg-slate-800 rounded-xl shadow-lg overflow-hidden hover:shadow-xl transition-all duration-300 transform hover:-translate-y-1">
       <Link to={`/posts/${blog.slug}`}>
-        <img
+        <ResponsiveImage
           src={blog.image || '/fallback-image.jpg'}
+          srcset={blog.image_srcset}
+          sizes="(min-width: 1024px) 33vw, (min-width: 768px) 50vw, 100vw"
           alt={blog.title}
           className="w-full h-48 object-cover"
         />
@@ -86,7 +89,7 @@ export default function BlogCard({ blog, isLoading, currentUser, onReact }) {
 
         {/* Excerpt */}
         <p className="text-slate-600 dark:text-slate-400 mb-4 line-clamp-3">
-          {blog.content?.substring(0, 150)}...
+          {blog.excerpt ?? `${blog.content?.substring(0, 150)}...`}
         </p>
 
         {/* Tags */}
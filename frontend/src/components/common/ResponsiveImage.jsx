@@ -0,0 +1,25 @@
+// components/common/ResponsiveImage.jsx
+const SOURCE_TYPES = {
+    avif: "image/avif",
+    webp: "image/webp",
+};
+
+// <picture> over the API's srcset map ({format: "url 320w, ..."}),
+// falling back to the original upload until variants exist
+export default function ResponsiveImage({ src, srcset, sizes = "100vw", alt, className = "" }) {
+    if (!srcset) {
+        return <img src={src} alt={alt} className={className} />;
+    }
+
+    const fallback = srcset.jpeg || srcset.png;
+    return (
+        <picture>
+            {Object.entries(SOURCE_TYPES).map(([format, type]) =>
+                srcset[format] ? (
+                    <source key={format} type={type} srcSet={srcset[format]} sizes={sizes} />
+                ) : null
+            )}
+            <img src={src} srcSet={fallback} sizes={sizes} alt={alt} className={className} loading="lazy" />
+        </picture>
+    );
+}
@@ -43,7 +43,7 @@ export default function Blog() {
         { key: "title", header: "Title" },
         { key: "category", header: "Category" },
         { key: "tags", header: "Tags" },
-        { key: "content", header: "Content", truncate: 100 },
+        { key: "excerpt", header: "Content", truncate: 100 },
         { key: "image", header: "Image" },
         { key: "is_featured", header: "Featured" },
         { key: "is_active", header: "Status" },
@@ -97,8 +97,10 @@ export default function Blog() {
     const onlyAdmin = isAdmin(currentUser);
 
     // Modal open/close
-    const openBlogModal = (blog = null) => {
-        if (blog) {
+    const openBlogModal = async (row = null) => {
+        if (row) {
+            // List rows only carry an excerpt; load the full post for editing
+            const blog = await blogService.getBlog(row.id);
             setFormData({
                 title: blog.title || "",
                 content: blog.content || "",
@@ -213,8 +215,8 @@ export default function Blog() {
         }
     };
 
-    const openBlogDetailsModel = blog => {
-        setDetailsBlog(blog);
+    const openBlogDetailsModel = async row => {
+        setDetailsBlog(await blogService.getBlog(row.id));
         setDetailsOpen(true);
     };
     const closeBlogDetailsModel = () => {
@@ -5,6 +5,7 @@ import { commentService } from '../../services/commentService';
 import { reactionService } from '../../services/reactionService';
 import { useAuth } from '../../hooks/useAuth';
 import ReactionBar from '../../components/reactions/ReactionBar';
+import ResponsiveImage from '../../components/common/ResponsiveImage';
 import { postService } from '../../services/postService';
 
 
@@ -70,6 +71,29 @@ export default function BlogDetails() {
         getComments();
     }, [blog?.id]);
 
+    // Live updates from other readers instead of re-polling
+    useEffect(() => {
+        if (!blog?.id) return;
+
+        return reactionService.subscribeToBlogEvents(blog.id, {
+            onReaction: (data) => setReactions(data.counts),
+            onComment: (comment) => {
+                if (comment.parent) return;
+                setComments((current) =>
+                    current.some((c) => c.id === comment.id) ? current : [comment, ...current]
+                );
+            },
+            onResync: async () => {
+                const [reactionData, commentsData] = await Promise.all([
+                    reactionService.getReactions(blog.id),
+                    commentService.getComments(blog.id),
+                ]);
+                setReactions(reactionData.counts);
+                setComments(commentsData.results || []);
+            },
+        });
+    }, [blog?.id]);
+
     const handleReact = async (type) => {
         if (!blog?.id) return;
         
@@ -160,8 +184,9 @@ export default function BlogDetails() {
                 {/* Blog Header */}
                 <div className="bg-white dark:bg-slate-800 rounded-xl shadow-lg overflow-hidden">
                 {/* Featured Image */}
-                    <img
+                    <ResponsiveImage
                         src={blog.image || '/fallback-image.jpg'}
+                        srcset={blog.image_srcset}
                         alt={blog.title}
                         className="w-full h-96 object-cover"
                     />
@@ -1,6 +1,6 @@
 import axios from "axios";
 
-const baseURL = "http://localhost:8000/api";
+export const baseURL = "http://localhost:8000/api";
 
 // Token helpers
 const getAccessToken = () => localStorage.getItem("access_token");
@@ -99,6 +99,11 @@ export const authService = {
                     Authorization: `Bearer ${localStorage.getItem("access_token")}`,
                 },
             });
+            // The old tokens stop working once the password changes
+            if (response.data.access) {
+                localStorage.setItem("access_token", response.data.access);
+                localStorage.setItem("refresh_token", response.data.refresh);
+            }
             return response.data;
         } catch (error) {
             throw new Error(
@@ -36,6 +36,18 @@ export const blogService = {
         }
     },
 
+    async getBlog(id) {
+        try {
+            const response = await api.get(`/blog/blogs/${id}/`, {
+                headers: { Authorization: `Bearer ${localStorage.getItem("access_token")}` },
+            });
+            return response.data;
+        } catch (error) {
+            console.error("Error fetching blog post:", error);
+            throw error;
+        }
+    },
+
     async updateBlog(id, formData) {
         try {
             const response = await api.put(`/blog/blogs/${id}/`, formData, {
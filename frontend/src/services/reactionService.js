@@ -1,4 +1,4 @@
-import api from "./api";
+import api, { baseURL, getAccessToken } from "./api";
 
 export const reactionService = {
   async reactToBlog(blogId, reactionType) {
@@ -16,4 +16,39 @@ export const reactionService = {
     const res = await api.get(url);
     return res.data; 
   },
+
+  // Live reaction counts and new comments (Server-Sent Events); returns an unsubscribe function
+  subscribeToBlogEvents(blogId, { onReaction, onComment, onResync }) {
+    // Streams are for signed-in readers
+    if (!getAccessToken()) return () => {};
+
+    let source = null;
+    let closed = false;
+    const parse = (handler) => (event) => handler?.(JSON.parse(event.data));
+
+    // EventSource cannot send headers, so it opens the stream with a short-lived ticket
+    // instead of putting the access token in the URL
+    const open = async () => {
+      const res = await api.post(`/blog/blogs/${blogId}/events/ticket/`);
+      if (closed) return;
+      source = new EventSource(
+        `${baseURL}/blog/blogs/${blogId}/events/?ticket=${encodeURIComponent(res.data.ticket)}`
+      );
+      source.addEventListener("reaction", parse(onReaction));
+      source.addEventListener("comment", parse(onComment));
+      source.addEventListener("resync", parse(onResync));
+      // Reconnects reuse the URL, so once the ticket has expired the browser gives up: get a new one
+      source.onerror = () => {
+        if (source.readyState === EventSource.CLOSED && !closed) {
+          setTimeout(() => open().catch(() => {}), 5000);
+        }
+      };
+    };
+    open().catch(() => {});
+
+    return () => {
+      closed = true;
+      source?.close();
+    };
+  },
 };